@@ -21,16 +21,25 @@ class TaskTracker:
     def __post_init__(self):
         self.lock = threading.Lock()
         self.spinner_thread = None
+        self.headless = not sys.stdout.isatty()
 
     def start(self):
         with self.lock:
             self.status = "running"
+            if self.headless:  # No TTY: a plain progress line instead of a spinner
+                print(f"Running OSINT query for {self._get_query_type()}: {self.target}", flush=True)
+                return
             sys.stdout.write("\033[s\n\n\nDetails:\n\n")  # Save cursor and add initial spacing
             self.spinner_thread = threading.Thread(target=self._run_spinner, daemon=True)
             self.spinner_thread.start()
 
     def complete(self):
         with self.lock:
+            if self.headless:
+                if self.status != "completed":
+                    print(f"✓ Running OSINT query for {self._get_query_type()}: {self.target}", flush=True)
+                self.status = "completed"
+                return
             self.status = "completed"
             self._update_display("✓")
 
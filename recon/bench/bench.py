@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Offline benchmark for the orchestration in recon.py.
+
+Every external tool is replaced by bench/stub_tool.py on PATH, DNS answers,
+record lookups and HTTP probes come from in-process stand-ins and JavaScript
+bundles are served from a loopback HTTP server, so a run needs no network at
+all. The report shows end-to-end time plus, per phase, wall time, Python-side
+CPU (this process only, children excluded) and peak memory, followed by the
+per-stage child telemetry recorded by recon.py itself.
+
+  python3 bench.py --size 1k
+  python3 bench.py --size 10k --crawl-bytes 1M --latency 0.2 --stream
+  python3 bench.py --size 100k --json results.json
+"""
+
+import argparse
+import http.server
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RECON_DIR = os.path.dirname(BENCH_DIR)
+STUB_TOOL = os.path.join(BENCH_DIR, "stub_tool.py")
+STUB_TOOLS = ("bbot", "gospider", "ffuf", "wafw00f", "dnsreaper", "arjun", "corsy", "cloudbrute", "jsluice")
+SIZES = {"1k": 1000, "10k": 10000, "100k": 100000}
+DOMAIN = "bench.example"
+
+def parse_size(text):
+    units = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+    text = text.strip().lower().rstrip("b")
+    return int(float(text[:-1]) * units[text[-1]]) if text[-1:] in units else int(text)
+
+class JSHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"// {self.path}\nvar config = {{apiKey: 'AKIA{zlib.crc32(self.path.encode()) % 10 ** 12:012d}'}};\n".encode() * 64
+        self.send_response(200)
+        self.send_header("Content-Type", "application/javascript")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class PhaseMeter:
+    """Wall time, Python CPU time and peak memory for consecutive phases of one run"""
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = []
+        if trace_memory:
+            tracemalloc.start()
+
+    def measure(self, name, func, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = func(*args, **kwargs)
+        self.phases.append({
+            "phase": name,
+            "wall": time.perf_counter() - wall,
+            "python_cpu": time.process_time() - cpu,
+            "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            "peak_python_heap": tracemalloc.get_traced_memory()[1] if self.trace_memory else None,
+        })
+        return result
+
+def stub_exchange(dead_ratio, latency):
+    """Stand-in for DNSClient._exchange: one (rcode, answers, negative TTL) reply per query, so the client's
+    cache and retries run as they would against a real resolver"""
+    def exchange(name, rtype, server):
+        if latency:
+            time.sleep(latency)
+        if rtype == "TXT" and name == DOMAIN:
+            return 0, [(name, "TXT", 300, "v=spf1 include:_spf.example.net ~all")], 300
+        seed = zlib.crc32(name.encode())
+        if random.Random(seed).random() < dead_ratio:
+            return 3, [], 300
+        if rtype == "A":
+            return 0, [(name, "A", 300, f"10.{(seed >> 16) & 255}.{(seed >> 8) & 255}.{seed & 255}")], 300
+        return 0, [], 300
+    return exchange
+
+def stub_probe(host, gateway=None):
+    return {"http": [301, "", "stub", f"https://{host}/", []], "https": [200, host, "stub", "", [host]]}, [200, "stub", 0, ""]
+
+def setup_environment(options, workdir):
+    bin_dir = os.path.join(workdir, "bin")
+    os.makedirs(bin_dir)
+    for tool in STUB_TOOLS:
+        os.symlink(STUB_TOOL, os.path.join(bin_dir, tool))
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+    os.environ["HOME"] = os.path.join(workdir, "home")
+    os.environ.update({
+        "SECOS_STUB_SUBDOMAINS": str(options.subdomains),
+        "SECOS_STUB_LATENCY": str(options.latency),
+        "SECOS_STUB_CRAWL_BYTES": str(options.crawl_bytes),
+        "SECOS_STUB_JS_PER_HOST": str(options.js_per_host),
+        "SECOS_STUB_FFUF_RESULTS": str(options.ffuf_results),
+    })
+    os.makedirs(os.environ["HOME"])
+    os.chdir(workdir)
+
+def run_benchmark(options):
+    workdir = tempfile.mkdtemp(prefix="secos-bench-")
+    setup_environment(options, workdir)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), JSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["SECOS_STUB_JS_BASE"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    sys.path.insert(0, RECON_DIR)
+    import recon
+
+    recon.VAULT_FOLDER = os.path.join(os.environ["HOME"], "secos-vault")
+    recon.js_cache.cache_folder = os.path.join(os.environ["HOME"], ".cache", "secos", "js")
+    recon.task_tracker.headless = True
+    recon.HEADLESS_INTERVAL = float("inf")
+    recon.dns_client._exchange = stub_exchange(options.dead_ratio, options.dns_latency)
+    recon.http_prober.probe = stub_probe
+    recon.http_prober.path_signatures = lambda host, gateway=None: []
+    recon.rate_governor.configure(0)
+    config_file = os.path.join(RECON_DIR, "config", "ffuf", "ffuf_default.conf")
+    for step in range(len(recon.BUILD_STEPS)):
+        recon.task_tracker.add_task(step)
+
+    meter = PhaseMeter(options.trace_memory)
+    started = time.perf_counter()
+    txt_records = meter.measure("txt records", recon.fetch_txt_records, DOMAIN)
+    scan_data = recon.HostTable(DOMAIN, txt_records)
+    if options.stream:
+        subdomains_file, results = meter.measure("bbot + scans (stream)", recon.run_streaming_scans, DOMAIN, scan_data, config_file)
+    else:
+        subdomains_file, resolved = meter.measure("bbot + resolve", recon.run_bbot_scan, DOMAIN)
+
+        def build_scan_data():
+            for subdomain, addresses in resolved.items():
+                scan_data.add(subdomain, addresses)
+        meter.measure("scan_data", build_scan_data)
+        results = meter.measure("scans", recon.run_scans, DOMAIN, subdomains_file, scan_data, config_file)
+    _, dnsreaper_data, root_waf, different_wafs, _, _, _, corsy_results = results
+    meter.measure("vault", recon.save_to_obsidian, recon.VAULT_FOLDER, DOMAIN, txt_records, scan_data,
+                  dnsreaper_data, root_waf, different_wafs, corsy_results)
+    total = time.perf_counter() - started
+    server.shutdown()
+
+    report = {
+        "options": vars(options),
+        "hosts": len(scan_data) - 1,
+        "total_wall": total,
+        "phases": meter.phases,
+        "stages": recon.telemetry.summary(DOMAIN)["stages"],
+    }
+    if not options.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    else:
+        report["workdir"] = workdir
+    return report
+
+def print_report(report):
+    mib = 1024 * 1024
+    print(f"\n{report['hosts']} live hosts, {report['total_wall']:.2f}s end to end\n")
+    print(f"{'phase':<24}{'wall s':>10}{'py cpu s':>10}{'peak rss MiB':>14}{'py heap MiB':>13}")
+    for phase in report["phases"]:
+        heap = f"{phase['peak_python_heap'] / mib:.1f}" if phase["peak_python_heap"] is not None else "-"
+        print(f"{phase['phase']:<24}{phase['wall']:>10.2f}{phase['python_cpu']:>10.2f}{phase['peak_rss'] / mib:>14.1f}{heap:>13}")
+    print(f"\n{'stage':<14}{'jobs':>7}{'procs':>7}{'child wall s':>14}{'child cpu s':>13}{'queue wait s':>14}")
+    for name, stage in sorted(report["stages"].items()):
+        print(f"{name:<14}{stage.get('jobs', 0):>7}{stage.get('invocations', 0):>7}{stage.get('wall', 0):>14.2f}"
+              f"{stage.get('cpu', 0):>13.2f}{stage.get('queue_wait', 0):>14.2f}")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the recon.py pipeline")
+    parser.add_argument("--size", choices=SIZES, default="1k", help="number of subdomains BBOT reports")
+    parser.add_argument("--subdomains", type=int, help="exact subdomain count (overrides --size)")
+    parser.add_argument("--crawl-bytes", type=parse_size, default=parse_size("64k"), help="gospider output per host, e.g. 64k, 10M, 1G")
+    parser.add_argument("--js-per-host", type=int, default=5, help="JavaScript URLs in each crawl")
+    parser.add_argument("--ffuf-results", type=int, default=25, help="ffuf matches per host")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds each stub tool invocation takes")
+    parser.add_argument("--dns-latency", type=float, default=0.0, help="seconds per stub DNS query")
+    parser.add_argument("--dead-ratio", type=float, default=0.2, help="share of subdomains that do not resolve")
+    parser.add_argument("--stream", action="store_true", help="benchmark -stream mode instead of batch mode")
+    parser.add_argument("--trace-memory", action="store_true", help="also report the Python heap peak per phase (slower)")
+    parser.add_argument("--json", help="write the report as JSON to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    options = parser.parse_args()
+    options.subdomains = options.subdomains or SIZES[options.size]
+    if options.json:
+        options.json = os.path.abspath(options.json)
+    return options
+
+if __name__ == "__main__":
+    options = parse_arguments()
+    report = run_benchmark(options)
+    print_report(report)
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(report, f, indent=2)
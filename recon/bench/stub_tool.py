@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Offline stand-in for the external recon tools.
+
+bench.py symlinks this script under each tool name (bbot, gospider, ffuf, ...)
+and the name it is invoked as decides which output format it fakes. Sizes and
+latency come from SECOS_STUB_* environment variables so the harness can scale
+them without touching the stubs.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+SUBDOMAINS = int(os.environ.get("SECOS_STUB_SUBDOMAINS", "1000"))
+LATENCY = float(os.environ.get("SECOS_STUB_LATENCY", "0"))
+CRAWL_BYTES = int(os.environ.get("SECOS_STUB_CRAWL_BYTES", "65536"))
+JS_PER_HOST = int(os.environ.get("SECOS_STUB_JS_PER_HOST", "5"))
+JS_UNIQUE = int(os.environ.get("SECOS_STUB_JS_UNIQUE", "200"))
+JS_BASE = os.environ.get("SECOS_STUB_JS_BASE", "http://127.0.0.1:1")
+FFUF_RESULTS = int(os.environ.get("SECOS_STUB_FFUF_RESULTS", "25"))
+
+def option(args, flag, default=None):
+    return args[args.index(flag) + 1] if flag in args and args.index(flag) + 1 < len(args) else default
+
+def host_of(url):
+    return url.split("://", 1)[-1].split("/", 1)[0]
+
+def seeded(text):
+    return int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+
+def bbot(args):
+    domain = option(args, "-t")
+    output_dir = os.path.join(option(args, "-o", "bbot_output"), option(args, "-n", "secos"))
+    os.makedirs(output_dir, exist_ok=True)
+    subdomains = [domain] + [f"host{i}.{domain}" for i in range(SUBDOMAINS - 1)]
+    # Discovery is spread over the configured latency, the way a real BBOT run trickles out events
+    delay = LATENCY / max(1, len(subdomains))
+    with open(os.path.join(output_dir, "subdomains.txt"), "w") as f:
+        for subdomain in subdomains:
+            if "--json" in args:
+                print(json.dumps({"type": "DNS_NAME", "data": subdomain, "scope_distance": 0}), flush=True)
+            f.write(f"{subdomain}\n")
+            if delay:
+                time.sleep(delay)
+
+def gospider(args):
+    host = host_of(option(args, "-s"))
+    output_folder = option(args, "-o")
+    os.makedirs(output_folder, exist_ok=True)
+    seed = seeded(host)
+    written = 0
+    i = 0
+    with open(os.path.join(output_folder, host.replace(".", "_")), "w") as f:
+        while written < CRAWL_BYTES:
+            if i < JS_PER_HOST:
+                line = f"[javascript] - {JS_BASE}/static/bundle{(seed + i) % JS_UNIQUE}.js\n"
+            elif i % 7 == 0:
+                line = f"[url] - [code-200] - https://{host}/api/v1/item{i}\n"
+            elif i % 3 == 0:
+                line = f"[href] - https://{host}/page/{i}\n"
+            else:
+                line = f"[linkfinder] - [from: https://{host}/] - /assets/{i}.png\n"
+            f.write(line)
+            written += len(line)
+            i += 1
+    time.sleep(LATENCY)
+
+def ffuf(args):
+    url = option(args, "-u")
+    results = [{"status": 200, "url": url.replace("FUZZ", f"path{i}"), "length": 1234 + i, "words": 40, "lines": 12}
+               for i in range(FFUF_RESULTS)]
+    time.sleep(LATENCY)
+    if "-json" in args:
+        for result in results:
+            print(json.dumps(result))
+    # Like ffuf, command-line -o and -debug-log override the [output] section of the -config file
+    config = {}
+    if option(args, "-config"):
+        with open(option(args, "-config")) as f:
+            config = dict(re.findall(r'^\s*(outputfile|debuglog)\s*=\s*"([^"]*)"', f.read(), re.MULTILINE))
+    output_file = option(args, "-o", config.get("outputfile"))
+    if output_file:
+        with open(output_file, "w") as f:
+            json.dump({"commandline": " ".join(args), "results": results}, f)
+    debug_log = option(args, "-debug-log", config.get("debuglog"))
+    if debug_log:
+        with open(debug_log, "a") as f:
+            f.write(f"{url} done\n")
+
+def wafw00f(args):
+    urls = [arg for arg in args if arg.startswith("http")]
+    verdicts = [{"url": url, "detected": seeded(url) % 4 == 0, "firewall": "Cloudflare", "manufacturer": "Cloudflare Inc."}
+                for url in urls]
+    time.sleep(LATENCY)
+    output_file = option(args, "-o")
+    if output_file in (None, "-"):
+        print(json.dumps(verdicts))
+    else:
+        with open(output_file, "w") as f:
+            json.dump(verdicts, f)
+
+def dnsreaper(args):
+    with open(option(args, "--filename")) as f:
+        hosts = [line.strip() for line in f if line.strip()]
+    findings = [{"domain": host, "signature": "stub"} for host in hosts if seeded(host) % 97 == 0]
+    time.sleep(LATENCY)
+    if option(args, "--out") == "stdout":
+        for finding in findings:
+            print(json.dumps(finding))
+    else:
+        with open(option(args, "--out"), "w") as f:
+            json.dump(findings, f)
+
+def cloudbrute(args):
+    keyword = option(args, "-k")
+    time.sleep(LATENCY)
+    with open(option(args, "-o"), "w") as f:
+        for i in range(50):
+            f.write(f"https://{keyword}-{i % 25}.s3.amazonaws.com\n")
+
+def arjun(args):
+    time.sleep(LATENCY)
+    with open(option(args, "-oJ"), "w") as f:
+        json.dump({option(args, "-u"): {"params": ["id", "debug"], "method": "GET"}}, f)
+
+def corsy(args):
+    input_file = option(args, "-i")
+    urls = [line.strip() for line in open(input_file)] if input_file else [option(args, "-u")]
+    time.sleep(LATENCY)
+    output_file = option(args, "-o")
+    with open(output_file, "w") as f:
+        json.dump({url: {"class": "origin reflected", "severity": "high"} for url in urls if seeded(url) % 5 == 0}, f)
+
+def jsluice(args):
+    time.sleep(LATENCY)
+    for path in args[1:]:
+        if os.path.isfile(path):
+            print(json.dumps({"kind": "AWSAccessKey", "data": {"key": "AKIA" + hashlib.md5(path.encode()).hexdigest()[:16].upper()},
+                              "filename": path, "severity": "high"}))
+
+TOOLS = {
+    "bbot": bbot, "gospider": gospider, "ffuf": ffuf, "wafw00f": wafw00f, "dnsreaper": dnsreaper,
+    "cloudbrute": cloudbrute, "arjun": arjun, "corsy": corsy, "jsluice": jsluice,
+}
+
+if __name__ == "__main__":
+    TOOLS[os.path.basename(sys.argv[0])](sys.argv[1:])
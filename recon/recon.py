@@ -14,8 +14,25 @@ import threading
 import re
 import boto3
 import botocore
+import botocore.auth
+import botocore.awsrequest
+import requests
+import urllib3
 import socket
 import logging
+import collections
+import itertools
+import queue
+import hashlib
+import tempfile
+import contextlib
+import math
+import sqlite3
+import ssl
+import secrets
+import struct
+import signal
+import resource
 
 COLORS = {'GREEN': '\033[0;32m', 'YELLOW': '\033[1;33m', 'BLUE': '\033[0;34m', 'RED': '\033[0;31m', 'NC': '\033[0m'}
 
@@ -42,73 +59,1038 @@ CLOUDBRUTE_CONFIG = "/usr/local/bin/.recon/config/cloudbrute.conf"
 FFUF_DEFAULT_CONFIG = "/usr/local/bin/.recon/config/ffuf/ffuf_default.conf"
 FFUF_FULL_CONFIG = "/usr/local/bin/.recon/config/ffuf/ffuf_full.conf"
 
-WAFW00F_OUTPUT = "wafw00f_output.json"
-DNSREAPER_OUTPUT = "dnsreaper_output.json"
 ARJUN_OUTPUT = "arjun_output.json"
 CORSY_OUTPUT = "corsy_output.json"
 
-# Task tracking system
+# Intermediate tool output goes to a per-run scratch directory, on tmpfs when it has room
+WORK_DIR_TMPFS = "/dev/shm"
+WORK_DIR_MIN_FREE = 1024 ** 3
+
+# Bulk DNS resolution defaults (overridable with -dns-concurrency/-dns-timeout/-dns-retries)
+DNS_CONCURRENCY = 100
+DNS_TIMEOUT = 3.0
+DNS_RETRIES = 2
+
+# Built-in HTTP/HTTPS prober: hosts probed at once, seconds per request, body bytes read for the title
+HTTP_PROBE_WORKERS = 32
+HTTP_PROBE_TIMEOUT = 5
+HTTP_PROBE_MAX_BYTES = 65536
+
+# Hosts sharing addresses, CNAME target and response get the heavy tools once, plus a few sampled members
+CLUSTER_HOSTS = True
+CLUSTER_SAMPLE = 2
+CLUSTER_STAGES = ("gospider", "ffuf", "arjun")
+
+# Native DNS client for record lookups: resolvers (overridable with -resolvers), pooled UDP sockets,
+# backoff base in seconds and how long NXDOMAIN/NODATA answers are cached without an SOA
+DNS_RESOLVERS = ["1.1.1.1", "8.8.8.8", "9.9.9.9"]
+DNS_RECORD_TYPES = ("A", "AAAA", "CNAME", "MX", "NS", "TXT", "SOA", "CAA")
+DNS_SOCKETS = 32
+DNS_BACKOFF = 0.25
+DNS_NEGATIVE_TTL = 300
+DNS_RECORD_WORKERS = 16
+
+# Wildcard DNS detection: random labels resolved per zone level, verdicts cached across runs
+WILDCARD_PROBES = 3
+WILDCARD_CACHE_PATH = os.path.expanduser("~/.cache/secos/wildcards.json")
+WILDCARD_CACHE_TTL = 24 * 3600
+
+# wafw00f verdicts shared by every host behind the same edge (last CNAME target, else address set), cached across runs
+WAF_CACHE_PATH = os.path.expanduser("~/.cache/secos/wafs.json")
+WAF_CACHE_TTL = 24 * 3600
+
+# Catch-all calibration before ffuf: random paths probed per host, and how long a stored baseline stays valid
+CALIBRATION_PROBES = 3
+CALIBRATION_TTL = 7 * 24 * 3600
+
+# Scan scheduler slots per resource class, and per-stage worker counts
+SCAN_RESOURCE_LIMITS = {"network": 12, "probe": HTTP_PROBE_WORKERS}
+# CPU-bound tool runs outside any stage slot, i.e. the jsluice batches pooled across hosts. The load governor
+# scales this "cpu" class together with the scheduler classes
+CPU_SLOTS = os.cpu_count() or 4
+WAFW00F_WORKERS = 4
+CORSY_WORKERS = 2
+ARJUN_WORKERS = 2
+ARJUN_MAX_URLS_PER_HOST = 5
+ARJUN_URL_WORKERS = 2
+
+# How long -incremental reuses an Arjun/Corsy result for a URL that still answers with the same response
+ENDPOINT_CACHE_TTL = 7 * 24 * 3600
+
+# Concurrent ffuf processes and the requests/second budget they share (0 = unlimited)
+FFUF_WORKERS = 4
+FFUF_RATE = 0
+
+# Concurrent gospider crawls
+GOSPIDER_WORKERS = 4
+
+# Requests/second each target origin may receive across all tools (0 = unlimited, opt in with -target-rate)
+TARGET_RATE = 0
+TARGET_RATE_MIN = 2
+RATE_THROTTLE_RATIO = 0.05
+WAFW00F_REQUEST_COST = 10
+
+# Hard deadlines in seconds (0 = none): each tool process, each stage job and the whole run (-budget).
+# An expired tool's process group gets SIGTERM, then SIGKILL after the grace period. ffuf stops itself at its
+# config's maxtime, so outside -budget runs its deadlines are that plus FFUF_MAXTIME_GRACE instead of the ones below
+TOOL_TIMEOUT = 30 * 60
+TOOL_TIMEOUTS = {"bbot": 0, "wafw00f": 5 * 60, "corsy": 10 * 60, "arjun": 15 * 60, "jsluice": 10 * 60}
+STAGE_TIMEOUTS = {"wafw00f": 10 * 60, "corsy": 15 * 60, "gospider": 30 * 60, "ffuf": 45 * 60, "jsluice": 20 * 60,
+                  "arjun": 30 * 60, "cloudbrute": 45 * 60, "dnsreaper": 30 * 60}
+SCAN_BUDGET = 0
+FFUF_MAXTIME_GRACE = 2 * 60
+KILL_GRACE = 5
+DEADLINE_POLL_INTERVAL = 1.0
+
+# Adaptive concurrency: a resource class is halved under load, memory, file descriptor or child RSS pressure
+# and grows back one slot per check while the machine has headroom, up to its ceiling
+GOVERNOR_INTERVAL = 2.0
+GOVERNOR_COOLDOWN = 30
+GOVERNOR_LOAD_HIGH = 1.5
+GOVERNOR_LOAD_LOW = 0.75
+GOVERNOR_MIN_AVAILABLE_MEMORY = 0.10
+GOVERNOR_MAX_CHILD_RSS = 0.70
+GOVERNOR_MAX_FDS = 0.80
+GOVERNOR_CEILINGS = {"network": max(12, 2 * (os.cpu_count() or 4)), "cpu": CPU_SLOTS, "probe": 2 * HTTP_PROBE_WORKERS}
+
+# Optional tool priorities (-nice) and per-tool cgroup v2 limits (-cgroup), as shares of the machine
+CHILD_NICE = 10
+CHILD_IONICE_LEVEL = 7
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_CPU_SHARE = 0.75
+CGROUP_MEMORY_HIGH = 0.60
+CGROUP_MEMORY_MAX = 0.80
+
+# Content-addressed JavaScript cache feeding batched jsluice runs
+JS_CACHE_FOLDER = os.path.expanduser("~/.cache/secos/js")
+JS_FETCH_WORKERS = 16
+JS_FETCH_TIMEOUT = 15
+JS_MAX_BYTES = 20 * 1024 * 1024
+JSLUICE_BATCH_SIZE = 50
+JSLUICE_BATCH_WAIT = 2.0
+# Hosts fetching bundles and pooling them at once; jsluice processes themselves are bounded by the cpu class
+JSLUICE_HOSTS = 8
+
+# Persistent scan store; -incremental reruns these stages only for new or changed hosts
+SCAN_DB_PATH = os.path.expanduser("~/.local/share/secos/recon.db")
+INCREMENTAL_STAGES = ("gospider", "ffuf", "arjun", "cloudbrute")
+
+# Checkpoints of unfinished runs, resumable with -resume <run-id>
+RUNS_FOLDER = os.path.expanduser("~/.local/share/secos/runs")
+
+# -targets batch mode: targets in flight at once, and how many of them may run BBOT together
+TARGET_WORKERS = 4
+BBOT_WORKERS = 2
+
+# Status display: frames per second on a TTY, seconds between progress lines otherwise
+RENDER_FPS = 10
+HEADLESS_INTERVAL = 30
+
+# Task tracking system: one render loop redraws the whole status block per frame
 class TaskTracker:
-    def __init__(self):
+    def __init__(self, fps=RENDER_FPS, headless=None):
         self.tasks = {}
         self.lock = threading.Lock()
-        self.spinner_threads = {}
+        self.frame_interval = 1 / fps
+        self.headless = not sys.stdout.isatty() if headless is None else headless
+        self.spinner = 0
+        self.dirty = True
+        self.render_thread = None
+        self.last_report = 0
 
     def add_task(self, step):
         with self.lock:
-            self.tasks[step] = {"status": "idle", "spinner": 0}
-            
+            self.tasks[step] = {"status": "idle", "done": 0, "total": 0}
+            self.dirty = True
+
     def start_task(self, step):
         with self.lock:
-            if step in self.tasks:
+            if step in self.tasks and self.tasks[step]["status"] != "running":
                 self.tasks[step]["status"] = "running"
-                # Create and start a new spinner thread for this task
-                spinner_thread = threading.Thread(target=display_spinner, args=(step,))
-                spinner_thread.daemon = True
-                self.spinner_threads[step] = spinner_thread
-                spinner_thread.start()
+                self.dirty = True
+                self._ensure_renderer()
 
     def complete_task(self, step):
         with self.lock:
             if step in self.tasks:
                 self.tasks[step]["status"] = "completed"
-                update_step_status(step, "completed")
+                self.dirty = True
+                if self.headless:
+                    print(f"✓ {BUILD_STEPS[step]}{self._progress_suffix(self.tasks[step])}", flush=True)
+                else:
+                    self._write_frame()
 
-    def update_task(self, step, status, spinner_index=None):
+    def add_progress(self, step, done=0, total=0):
+        """Count per-host sub-jobs of a step so the status line can show hosts done/total"""
         with self.lock:
             if step in self.tasks:
-                self.tasks[step]["status"] = status
-                if spinner_index is not None:
-                    self.tasks[step]["spinner"] = spinner_index
+                self.tasks[step]["done"] += done
+                self.tasks[step]["total"] += total
+                self.dirty = True
+
+    def advance(self, step):
+        """Count one unit of step done, completing the step with the last one"""
+        with self.lock:
+            task = self.tasks.get(step)
+            if task is None:
+                return
+            task["done"] += 1
+            self.dirty = True
+            finished = task["done"] >= task["total"]
+        if finished:
+            self.complete_task(step)
 
-    def get_task_status(self, step):
+    def render(self):
         with self.lock:
-            return self.tasks[step]["status"], self.tasks[step]["spinner"]
+            if not self.headless:
+                self._write_frame()
+
+    def _ensure_renderer(self):
+        if self.render_thread is None:
+            self.render_thread = threading.Thread(target=self._render_loop, daemon=True)
+            self.render_thread.start()
+
+    def _progress_suffix(self, task):
+        return f" ({task['done']}/{task['total']})" if task["total"] else ""
+
+    def _write_frame(self):
+        # The whole block goes out as a single coalesced write
+        frame = []
+        for step, task in sorted(self.tasks.items()):
+            frame.append(f"\033[{step + 3};0H\033[K")
+            if task["status"] == "idle":
+                frame.append(f"{COLORS['BLUE']}◯ {BUILD_STEPS[step]}{COLORS['NC']}")
+            elif task["status"] == "running":
+                frame.append(f"{COLORS['YELLOW']}{SPINNER_CHARS[self.spinner]} {BUILD_STEPS[step]}{self._progress_suffix(task)}{COLORS['NC']}")
+            else:
+                frame.append(f"{COLORS['GREEN']}✓ {BUILD_STEPS[step]}{self._progress_suffix(task)}{COLORS['NC']}")
+        frame.append(f"\033[{len(BUILD_STEPS) + 4};0H")  # Move cursor to the end
+        sys.stdout.write("".join(frame))
+        sys.stdout.flush()
+        self.dirty = False
+
+    def _write_report(self):
+        running = [task for task in self.tasks.values() if task["status"] == "running"]
+        completed = sum(task["status"] == "completed" for task in self.tasks.values())
+        parts = [f"{completed}/{len(self.tasks)} steps done"]
+        parts += [f"{BUILD_STEPS[step]}{self._progress_suffix(task)}" for step, task in sorted(self.tasks.items()) if task in running]
+        print(" | ".join(parts), flush=True)
+        self.dirty = False
+
+    def _render_loop(self):
+        while True:
+            time.sleep(self.frame_interval)
+            with self.lock:
+                running = any(task["status"] == "running" for task in self.tasks.values())
+                if self.headless:
+                    # Periodic progress lines only, and only when something changed
+                    if self.dirty and running and time.monotonic() - self.last_report >= HEADLESS_INTERVAL:
+                        self.last_report = time.monotonic()
+                        self._write_report()
+                elif running:
+                    self.spinner = (self.spinner + 1) % len(SPINNER_CHARS)
+                    self._write_frame()
+                elif self.dirty:
+                    self._write_frame()
 
 task_tracker = TaskTracker()
 
-def update_step_status(step, status, message=""):
-    line = step + 3  # Add 3 to account for the header and empty line
-    sys.stdout.write(f"\033[{line};0H")  # Move cursor to the beginning of the line
-    sys.stdout.write("\033[K")  # Clear the line
-    if status == "idle":
-        sys.stdout.write(f"{COLORS['BLUE']}◯ {BUILD_STEPS[step]}{COLORS['NC']}")
-    elif status == "running":
-        sys.stdout.write(f"{COLORS['YELLOW']}{message} {BUILD_STEPS[step]}{COLORS['NC']}")
-    elif status == "completed":
-        sys.stdout.write(f"{COLORS['GREEN']}✓ {BUILD_STEPS[step]}{COLORS['NC']}")
-    sys.stdout.write("\033[{};0H".format(len(BUILD_STEPS) + 4))  # Move cursor to the end
-    sys.stdout.flush()
-
-def display_spinner(step):
-    while True:
-        status, spinner_index = task_tracker.get_task_status(step)
-        if status == "completed":
-            update_step_status(step, "completed")
-            break
-        update_step_status(step, "running", SPINNER_CHARS[spinner_index])
-        task_tracker.update_task(step, "running", (spinner_index + 1) % len(SPINNER_CHARS))
-        time.sleep(0.1)
+# Scratch directory of this run; None means the current directory
+work_dir = None
+
+def create_work_dir(run_id):
+    """Make a private scratch directory for one run, tmpfs-backed when there is enough free space"""
+    root = None
+    try:
+        stats = os.statvfs(WORK_DIR_TMPFS)
+        if os.access(WORK_DIR_TMPFS, os.W_OK) and stats.f_bavail * stats.f_frsize >= WORK_DIR_MIN_FREE:
+            root = WORK_DIR_TMPFS
+    except OSError:
+        pass
+    return tempfile.mkdtemp(prefix=f"secos-recon-{run_id}-", dir=root)
+
+def work_path(*parts):
+    return os.path.join(work_dir or "", *parts)
+
+# BBOT is the heaviest tool, so targets in a -targets batch take turns running it
+bbot_slots = threading.BoundedSemaphore(BBOT_WORKERS)
+
+DNS_TYPES = {"A": 1, "NS": 2, "CNAME": 5, "SOA": 6, "MX": 15, "TXT": 16, "AAAA": 28, "CAA": 257}
+DNS_TYPE_NAMES = {number: name for name, number in DNS_TYPES.items()}
+
+def encode_dns_name(name):
+    labels = [label.encode("ascii") if label.isascii() else label.encode("idna") for label in name.rstrip(".").split(".") if label]
+    return b"".join(bytes([len(label)]) + label for label in labels) + b"\x00"
+
+def decode_dns_name(message, offset):
+    """Read a possibly compressed name at offset; returns (name, offset just past it)"""
+    labels = []
+    end = None
+    for _ in range(128):
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | message[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            return ".".join(labels).lower(), end if end is not None else offset
+        labels.append(message[offset:offset + length].decode("ascii", errors="replace"))
+        offset += length
+    raise ValueError("DNS name compression loop")
+
+def decode_dns_rdata(message, rtype, offset, length):
+    """Render one record's data the way dig +short does"""
+    rdata = message[offset:offset + length]
+    if rtype == DNS_TYPES["A"]:
+        return socket.inet_ntop(socket.AF_INET, rdata)
+    if rtype == DNS_TYPES["AAAA"]:
+        return socket.inet_ntop(socket.AF_INET6, rdata)
+    if rtype in (DNS_TYPES["NS"], DNS_TYPES["CNAME"]):
+        return decode_dns_name(message, offset)[0]
+    if rtype == DNS_TYPES["MX"]:
+        return f"{int.from_bytes(rdata[:2], 'big')} {decode_dns_name(message, offset + 2)[0]}"
+    if rtype == DNS_TYPES["TXT"]:
+        strings, index = [], 0
+        while index < len(rdata):
+            strings.append(rdata[index + 1:index + 1 + rdata[index]].decode(errors="replace"))
+            index += 1 + rdata[index]
+        return "".join(strings)
+    if rtype == DNS_TYPES["SOA"]:
+        mname, position = decode_dns_name(message, offset)
+        rname, position = decode_dns_name(message, position)
+        return " ".join([mname, rname] + [str(number) for number in struct.unpack("!IIIII", message[position:position + 20])])
+    if rtype == DNS_TYPES["CAA"]:
+        tag_end = 2 + rdata[1]
+        return f'{rdata[0]} {rdata[2:tag_end].decode(errors="replace")} "{rdata[tag_end:].decode(errors="replace")}"'
+    return rdata.hex()
+
+def build_dns_query(query_id, name, rtype):
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 1)
+    question = encode_dns_name(name) + struct.pack("!HH", DNS_TYPES[rtype], 1)
+    # EDNS0 OPT record advertising a 1232-byte UDP payload keeps most answers off TCP
+    return header + question + b"\x00" + struct.pack("!HHIH", 41, 1232, 0, 0)
+
+def parse_dns_response(message):
+    """Return (rcode, answers as (owner, type, ttl, value), negative-caching TTL)"""
+    _, flags, questions, answer_count, authority_count, _ = struct.unpack("!HHHHHH", message[:12])
+    offset = 12
+    for _ in range(questions):
+        _, offset = decode_dns_name(message, offset)
+        offset += 4
+    answers = []
+    negative_ttl = DNS_NEGATIVE_TTL
+    for index in range(answer_count + authority_count):
+        owner, offset = decode_dns_name(message, offset)
+        rtype, _, ttl, length = struct.unpack("!HHIH", message[offset:offset + 10])
+        offset += 10
+        if index < answer_count and rtype in DNS_TYPE_NAMES:
+            answers.append((owner, DNS_TYPE_NAMES[rtype], ttl, decode_dns_rdata(message, rtype, offset, length)))
+        elif index >= answer_count and rtype == DNS_TYPES["SOA"]:
+            # RFC 2308: negative answers live for min(SOA TTL, SOA minimum)
+            negative_ttl = min(ttl, int.from_bytes(message[offset + length - 4:offset + length], "big"))
+        offset += length
+    return flags & 0x0F, answers, negative_ttl
+
+def recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("DNS server closed the connection")
+        data += chunk
+    return data
+
+class DNSClient:
+    """In-process stub resolver: DNS over a pool of UDP sockets to public resolvers, TCP when an answer is truncated.
+    Answers are cached for their TTL, empty ones for the negative-caching TTL"""
+    def __init__(self, resolvers=DNS_RESOLVERS, timeout=DNS_TIMEOUT, retries=DNS_RETRIES, sockets=DNS_SOCKETS):
+        self.resolvers = list(resolvers)
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.pools = collections.defaultdict(queue.LifoQueue)
+        self.socket_slots = threading.BoundedSemaphore(sockets)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=DNS_CONCURRENCY)
+
+    def configure(self, resolvers=None, timeout=None, retries=None):
+        if resolvers:
+            self.resolvers = list(resolvers)
+        if timeout is not None:
+            self.timeout = timeout
+        if retries is not None:
+            self.retries = max(0, retries)
+
+    @contextlib.contextmanager
+    def _udp_socket(self, family):
+        self.socket_slots.acquire()
+        try:
+            sock = self.pools[family].get_nowait()
+        except queue.Empty:
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+        try:
+            yield sock
+        finally:
+            self.pools[family].put(sock)
+            self.socket_slots.release()
+
+    def _exchange(self, name, rtype, server):
+        message = build_dns_query(secrets.randbelow(65536), name, rtype)
+        family = socket.AF_INET6 if ":" in server else socket.AF_INET
+        with self._udp_socket(family) as sock:
+            sock.sendto(message, (server, 53))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"no DNS answer from {server}")
+                sock.settimeout(remaining)
+                response, peer = sock.recvfrom(65535)
+                # Late answers to queries that timed out earlier on this pooled socket are skipped
+                if peer[0] == server and response[:2] == message[:2]:
+                    break
+        # A truncated answer may not even parse, so the TC bit is checked on the raw header
+        if response[2] & 0x02:
+            with socket.create_connection((server, 53), timeout=self.timeout) as sock:
+                sock.sendall(struct.pack("!H", len(message)) + message)
+                response = recv_exact(sock, struct.unpack("!H", recv_exact(sock, 2))[0])
+        return parse_dns_response(response)
+
+    def query(self, name, rtype):
+        """Return the (owner, type, ttl, value) answers for name/rtype, CNAMEs on the way included; [] when there are none"""
+        key = (name.lower().rstrip("."), rtype)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+        for attempt in range(self.retries + 1):
+            server = self.resolvers[(hash(key) + attempt) % len(self.resolvers)]
+            try:
+                rcode, answers, negative_ttl = self._exchange(key[0], rtype, server)
+            except (OSError, ValueError, IndexError, struct.error):
+                rcode = None
+            # NOERROR and NXDOMAIN are answers; SERVFAIL, REFUSED and timeouts move on to the next resolver
+            if rcode in (0, 3):
+                ttl = min((answer[2] for answer in answers), default=negative_ttl)
+                with self.lock:
+                    self.cache[key] = (time.monotonic() + ttl, answers)
+                return answers
+            if attempt < self.retries:
+                time.sleep(DNS_BACKOFF * 2 ** attempt)
+        return []
+
+    def records(self, name, types=DNS_RECORD_TYPES):
+        """Return {type: [values]} for name, querying every type at once"""
+        futures = {rtype: self.executor.submit(self.query, name, rtype) for rtype in types}
+        return {rtype: [value for _, answer_type, _, value in future.result() if answer_type == rtype] for rtype, future in futures.items()}
+
+    def cname_chain(self, name):
+        """Every CNAME target between name and its addresses, in order"""
+        return [value for _, answer_type, _, value in self.query(name, "A") if answer_type == "CNAME"]
+
+dns_client = DNSClient()
+
+# Bulk address lookups on top of dns_client, so liveness checks share its sockets, timeouts and TTL cache
+class BulkResolver:
+    def __init__(self, client, concurrency=DNS_CONCURRENCY):
+        self.client = client
+        self.concurrency = concurrency
+
+    def configure(self, concurrency=None):
+        if concurrency is not None:
+            self.concurrency = max(1, concurrency)
+
+    def _addresses(self, answers):
+        """Sorted A/AAAA values of a query's answers, IPv4 first; CNAMEs on the way are dropped"""
+        return sorted({value for _, rtype, _, value in answers if rtype in ("A", "AAAA")}, key=lambda ip: (':' in ip, ip))
+
+    def cached(self, hostname):
+        """Addresses of hostname still in the client's cache, without querying; None when either lookup is missing"""
+        now = time.monotonic()
+        answers = []
+        with self.client.lock:
+            for rtype in ("A", "AAAA"):
+                entry = self.client.cache.get((hostname.lower().rstrip("."), rtype))
+                if not entry or entry[0] <= now:
+                    return None
+                answers.extend(entry[1])
+        return self._addresses(answers)
+
+    def resolve(self, hostname):
+        return self.resolve_many([hostname]).get(hostname, [])
+
+    def resolve_many(self, hostnames):
+        """Return {hostname: addresses}, [] for names without any. A and AAAA are asked in parallel; the client's
+        socket timeouts and retries bound every query, so a slow resolver cannot pin a worker"""
+        hostnames = list(dict.fromkeys(hostnames))
+        results = {}
+        pending = []
+        for hostname in hostnames:
+            addresses = self.cached(hostname)
+            if addresses is None:
+                pending.append(hostname)
+            else:
+                results[hostname] = addresses
+        if not pending:
+            return results
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.concurrency, 2 * len(pending))) as executor:
+            futures = {hostname: [executor.submit(self.client.query, hostname, rtype) for rtype in ("A", "AAAA")] for hostname in pending}
+        for hostname, queries in futures.items():
+            results[hostname] = self._addresses([answer for query in queries for answer in query.result()])
+        # Cached names come back in their place, so callers keep BBOT's order
+        return {hostname: results[hostname] for hostname in hostnames}
+
+dns_resolver = BulkResolver(dns_client)
+
+def zone_parents(host, domain):
+    """Every zone level between host and the apex domain, nearest first"""
+    labels = host.split(".")
+    return [".".join(labels[i:]) for i in range(1, len(labels) - len(domain.split(".")) + 1)]
+
+class WildcardFilter:
+    """Finds wildcard DNS by resolving random labels at each zone level and prunes the subdomains it explains"""
+    def __init__(self, cache_path=WILDCARD_CACHE_PATH, ttl=WILDCARD_CACHE_TTL):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.verdicts = None
+        self.probing = {}
+        self.pruned = collections.defaultdict(list)
+        self.lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.cache_path) as f:
+                verdicts = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {parent: verdict for parent, verdict in verdicts.items() if now - verdict["checked"] < self.ttl}
+
+    def wildcard_answers(self, parents):
+        """Return {parent: wildcard addresses}, empty for parents without a wildcard; uncached parents are probed once"""
+        with self.lock:
+            if self.verdicts is None:
+                self.verdicts = self._load()
+            # Parents another thread is already probing are waited for rather than probed again
+            waiting = [self.probing[parent] for parent in parents if parent not in self.verdicts and parent in self.probing]
+            missing = [parent for parent in dict.fromkeys(parents) if parent not in self.verdicts and parent not in self.probing]
+            done = threading.Event()
+            for parent in missing:
+                self.probing[parent] = done
+        if missing:
+            try:
+                labels = {f"secos-{secrets.token_hex(6)}.{parent}": parent for parent in missing for _ in range(WILDCARD_PROBES)}
+                resolved = dns_resolver.resolve_many(labels)
+                found = {parent: set() for parent in missing}
+                for label, parent in labels.items():
+                    found[parent].update(resolved.get(label, []))
+                with self.lock:
+                    for parent, answers in found.items():
+                        self.verdicts[parent] = {"answers": sorted(answers), "checked": time.time()}
+                    os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                    write_file_atomic(self.cache_path, json.dumps(self.verdicts))
+            finally:
+                with self.lock:
+                    for parent in missing:
+                        del self.probing[parent]
+                done.set()
+        for event in waiting:
+            event.wait()
+        with self.lock:
+            return {parent: set(self.verdicts.get(parent, {}).get("answers", [])) for parent in parents}
+
+    def is_wildcard(self, domain, host, addresses):
+        """True when every address of host is also what a random name at one of its zone levels resolves to"""
+        parents = zone_parents(host, domain)
+        if not parents or not addresses:
+            return False
+        answers = self.wildcard_answers(parents)
+        return any(answers[parent] and set(addresses) <= answers[parent] for parent in parents)
+
+    def prune(self, domain, hosts, resolved):
+        """Return the hosts of domain that resolve on their own; the others are remembered for the overview note"""
+        self.wildcard_answers(list(dict.fromkeys(parent for host in hosts for parent in zone_parents(host, domain))))
+        kept = []
+        for host in hosts:
+            if self.is_wildcard(domain, host, resolved.get(host)):
+                with self.lock:
+                    self.pruned[domain].append(host)
+            else:
+                kept.append(host)
+        return kept
+
+    def summary(self, domain):
+        """Wildcard zones seen under domain with their addresses, and the subdomains pruned because of them"""
+        with self.lock:
+            verdicts = dict(self.verdicts or {})
+            pruned = list(self.pruned.get(domain, []))
+        zones = {parent: verdict["answers"] for parent, verdict in verdicts.items()
+                 if verdict["answers"] and (parent == domain or parent.endswith(f".{domain}"))}
+        return {"zones": zones, "pruned": pruned} if zones or pruned else None
+
+wildcard_filter = WildcardFilter()
+
+# Per-origin token buckets shared by every tool that hits the same host/IP
+class RateGovernor:
+    def __init__(self, rate=TARGET_RATE):
+        self.rate = rate
+        self.target_rates = {}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def configure(self, rate=None):
+        if rate is not None:
+            self.rate = max(0, rate)
+
+    def configure_target(self, domain, rate):
+        """Give hosts under domain their own base rate (0 = unlimited) instead of the global one"""
+        with self.lock:
+            self.target_rates[domain.lower()] = max(0, rate)
+
+    def _base_rate(self, host):
+        host = host.lower()
+        for domain, rate in self.target_rates.items():
+            if host == domain or host.endswith("." + domain):
+                return rate
+        return self.rate
+
+    def _bucket(self, host):
+        # Hosts that resolve to the same address share one bucket
+        addresses = dns_resolver.cached(host)
+        key = addresses[0] if addresses else host
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            base = float(self._base_rate(host))
+            bucket = self.buckets[key] = {"base": base, "rate": base, "tokens": base, "updated": time.monotonic(), "leases": 0}
+        return bucket
+
+    def _limited(self):
+        return bool(self.target_rates) or bool(self.rate)
+
+    def acquire(self, host, tokens=1):
+        """Block until tokens are available in host's bucket (used for in-process requests)"""
+        if not self._limited():
+            return
+        while True:
+            with self.lock:
+                bucket = self._bucket(host)
+                if not bucket["base"]:
+                    return
+                now = time.monotonic()
+                bucket["tokens"] = min(bucket["rate"], bucket["tokens"] + (now - bucket["updated"]) * bucket["rate"])
+                bucket["updated"] = now
+                if bucket["tokens"] >= min(tokens, bucket["rate"]):
+                    bucket["tokens"] -= tokens
+                    return
+                wait = (min(tokens, bucket["rate"]) - bucket["tokens"]) / bucket["rate"]
+            time.sleep(wait)
+
+    @contextlib.contextmanager
+    def lease(self, host, processes=1):
+        """Register processes tool processes against host and yield each one's share of the bucket rate (0 = unlimited)"""
+        if not self._limited():
+            yield 0
+            return
+        with self.lock:
+            bucket = self._bucket(host)
+            bucket["leases"] += processes
+            share = bucket["rate"] / bucket["leases"] if bucket["base"] else 0
+        try:
+            yield share
+        finally:
+            with self.lock:
+                bucket["leases"] -= processes
+
+    def report(self, host, statuses):
+        """Adapt host's rate to the response codes a tool observed: halve on a 429/403 spike, creep back up otherwise"""
+        if not self._limited():
+            return
+        total = sum(statuses.values())
+        if not total:
+            return
+        throttled = statuses.get(429, 0)
+        if statuses.get(403, 0) * 2 > total:
+            throttled += statuses[403]
+        with self.lock:
+            bucket = self._bucket(host)
+            if not bucket["base"]:
+                return
+            if throttled / total > RATE_THROTTLE_RATIO:
+                bucket["rate"] = max(TARGET_RATE_MIN, bucket["rate"] / 2)
+            else:
+                bucket["rate"] = min(bucket["base"], bucket["rate"] * 1.25)
+            bucket["tokens"] = min(bucket["tokens"], bucket["rate"])
+
+rate_governor = RateGovernor()
+
+def write_file_atomic(path, text):
+    """Replace path in one step so readers and crashes never see a half-written file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+# Per-invocation and per-job measurements, exported as JSON, Chrome trace events and Prometheus text
+class Telemetry:
+    def __init__(self):
+        self.invocations = []
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.context = threading.local()
+        self.started = time.time()
+        self.target_started = {}
+        self.concurrency = []
+
+    def current(self):
+        return getattr(self.context, "stage", None), getattr(self.context, "host", None)
+
+    def begin_target(self, domain):
+        """Attribute the processes this thread starts outside scheduler jobs (BBOT, dig) to domain"""
+        self.context.target = domain
+        with self.lock:
+            self.target_started.setdefault(domain, time.time())
+
+    @contextlib.contextmanager
+    def job(self, stage, host=None, queue_wait=0.0, target=None):
+        """Attribute every process started on this thread to (stage, host) of target and time the job.
+        Yields the job record; its "signalled" count says how many of its processes were killed by a signal"""
+        previous = self.current() + (getattr(self.context, "target", None),)
+        self.context.stage, self.context.host = stage, host
+        self.context.target = target or previous[2]
+        record = {"stage": stage, "host": host, "target": self.context.target, "start": time.time(), "queue_wait": queue_wait,
+                  "signalled": 0, "thread": threading.get_ident()}
+        self.context.job = record
+        try:
+            yield record
+        finally:
+            self.context.stage, self.context.host, self.context.target = previous
+            self.context.job = None
+            record["wall"] = time.time() - record["start"]
+            with self.lock:
+                self.jobs.append(record)
+
+    def record_process(self, command, stage, host, start, wall, rusage, returncode, bytes_written):
+        tool = os.path.basename(strip_proxychains(command)[0])
+        job = getattr(self.context, "job", None)
+        if job is not None and returncode is not None and returncode < 0:
+            job["signalled"] += 1
+        with self.lock:
+            self.invocations.append({
+                "tool": tool,
+                "stage": stage or tool,
+                "host": host,
+                "target": getattr(self.context, "target", None),
+                "start": start,
+                "wall": wall,
+                "cpu_user": rusage.ru_utime if rusage else 0.0,
+                "cpu_system": rusage.ru_stime if rusage else 0.0,
+                "peak_rss": rusage.ru_maxrss * 1024 if rusage else 0,
+                "bytes_written": bytes_written,
+                "returncode": returncode,
+                "thread": threading.get_ident(),
+            })
+
+    def record_limits(self, limits, sample):
+        """Note a change of the scheduler's per-class concurrency and the machine state behind it"""
+        with self.lock:
+            self.concurrency.append({"time": time.time(), "limits": dict(limits), **sample})
+
+    def summary(self, domain):
+        """Per-stage totals of domain's jobs and processes (work not tied to any target is included)"""
+        stages = {}
+        with self.lock:
+            invocations = [invocation for invocation in self.invocations if invocation["target"] in (domain, None)]
+            jobs = [job for job in self.jobs if job["target"] in (domain, None)]
+            started = self.target_started.get(domain, self.started)
+            concurrency = list(self.concurrency)
+        for invocation in invocations:
+            stage = stages.setdefault(invocation["stage"], collections.Counter())
+            stage["invocations"] += 1
+            stage["failures"] += invocation["returncode"] != 0
+            stage["wall"] += invocation["wall"]
+            stage["cpu"] += invocation["cpu_user"] + invocation["cpu_system"]
+            stage["bytes_written"] += invocation["bytes_written"]
+            stage["peak_rss"] = max(stage["peak_rss"], invocation["peak_rss"])
+        for job in jobs:
+            stage = stages.setdefault(job["stage"], collections.Counter())
+            stage["jobs"] += 1
+            stage["job_wall"] += job["wall"]
+            stage["queue_wait"] += job["queue_wait"]
+        return {
+            "domain": domain,
+            "started": datetime.fromtimestamp(started).isoformat(),
+            "duration": time.time() - started,
+            "stages": {name: dict(values) for name, values in stages.items()},
+            "invocations": invocations,
+            "jobs": jobs,
+            "concurrency": concurrency,
+        }
+
+    def trace_events(self, domain=None):
+        pid = os.getpid()
+        events = []
+        with self.lock:
+            for job in self.jobs:
+                if domain and job["target"] not in (domain, None):
+                    continue
+                events.append({"name": f"{job['stage']} {job['host'] or ''}".strip(), "cat": "job", "ph": "X", "pid": pid, "tid": job["thread"],
+                               "ts": int((job["start"] - self.started) * 1e6), "dur": int(job["wall"] * 1e6), "args": {"queue_wait": job["queue_wait"]}})
+            for invocation in self.invocations:
+                if domain and invocation["target"] not in (domain, None):
+                    continue
+                events.append({"name": invocation["tool"], "cat": invocation["stage"], "ph": "X", "pid": pid, "tid": invocation["thread"],
+                               "ts": int((invocation["start"] - self.started) * 1e6), "dur": int(invocation["wall"] * 1e6),
+                               "args": {key: invocation[key] for key in ("host", "cpu_user", "cpu_system", "peak_rss", "bytes_written", "returncode")}})
+        return events
+
+    def write(self, domain_folder, domain):
+        with open(os.path.join(domain_folder, "telemetry.json"), "w") as f:
+            json.dump(self.summary(domain), f, indent=2)
+        with open(os.path.join(domain_folder, "trace.json"), "w") as f:
+            json.dump({"traceEvents": self.trace_events(domain), "displayTimeUnit": "ms"}, f)
+
+    def write_prometheus(self, path, domains):
+        """One textfile covering every target of this process"""
+        summaries = [self.summary(domain) for domain in domains]
+        metrics = {
+            "wall": ("secos_recon_stage_wall_seconds_total", "counter", "Wall time spent in tool processes"),
+            "cpu": ("secos_recon_stage_cpu_seconds_total", "counter", "User and system CPU time of tool processes"),
+            "peak_rss": ("secos_recon_stage_peak_rss_bytes", "gauge", "Largest peak RSS of a tool process"),
+            "bytes_written": ("secos_recon_stage_bytes_written_total", "counter", "Bytes written by tool processes"),
+            "invocations": ("secos_recon_stage_invocations_total", "counter", "Tool processes started"),
+            "failures": ("secos_recon_stage_failures_total", "counter", "Tool processes that exited non-zero"),
+            "queue_wait": ("secos_recon_stage_queue_wait_seconds_total", "counter", "Time jobs waited in the scheduler queue"),
+        }
+        lines = []
+        for key, (name, kind, help_text) in metrics.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for summary in summaries:
+                for stage, values in sorted(summary["stages"].items()):
+                    lines.append(f'{name}{{domain="{summary["domain"]}",stage="{stage}"}} {values.get(key, 0)}')
+        lines += ["# HELP secos_recon_run_duration_seconds Duration of the recon run", "# TYPE secos_recon_run_duration_seconds gauge"]
+        lines += [f'secos_recon_run_duration_seconds{{domain="{summary["domain"]}"}} {summary["duration"]:.3f}' for summary in summaries]
+        # Written atomically so the node exporter never scrapes a partial file
+        write_file_atomic(path, "\n".join(lines) + "\n")
+
+telemetry = Telemetry()
+
+# SQLite history of normalized per-host results from every completed run
+class ScanStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            domain TEXT NOT NULL,
+            started REAL NOT NULL,
+            finished REAL NOT NULL,
+            incremental INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS hosts (
+            run_id INTEGER NOT NULL REFERENCES runs (id),
+            domain TEXT NOT NULL,
+            host TEXT NOT NULL,
+            ips TEXT NOT NULL,
+            http TEXT,
+            fingerprint TEXT,
+            timestamp REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS results (
+            run_id INTEGER NOT NULL REFERENCES runs (id),
+            domain TEXT NOT NULL,
+            host TEXT,
+            tool TEXT NOT NULL,
+            data TEXT NOT NULL,
+            timestamp REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS baselines (
+            host TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            signatures TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            PRIMARY KEY (host, fingerprint)
+        );
+        CREATE TABLE IF NOT EXISTS endpoints (
+            tool TEXT NOT NULL,
+            url TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            data TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            PRIMARY KEY (tool, url, fingerprint)
+        );
+        CREATE INDEX IF NOT EXISTS runs_domain ON runs (domain, finished);
+        CREATE INDEX IF NOT EXISTS hosts_domain_host ON hosts (domain, host, run_id);
+        CREATE INDEX IF NOT EXISTS hosts_timestamp ON hosts (timestamp);
+        CREATE INDEX IF NOT EXISTS results_domain_tool_host ON results (domain, tool, host, run_id);
+        CREATE INDEX IF NOT EXISTS results_host ON results (host);
+        CREATE INDEX IF NOT EXISTS results_timestamp ON results (timestamp);
+    """
+
+    def __init__(self, path=SCAN_DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(self.SCHEMA)
+
+    def last_run(self, domain):
+        """Return {"id", "started", "finished"} of the newest completed run for domain, or None"""
+        with self.lock:
+            row = self.connection.execute("SELECT id, started, finished FROM runs WHERE domain = ? ORDER BY id DESC LIMIT 1", (domain,)).fetchone()
+        return dict(zip(("id", "started", "finished"), row)) if row else None
+
+    def latest_hosts(self, domain):
+        """Return {host: {"ips", "http", "fingerprint", "run_id"}} as last recorded for every host ever seen"""
+        with self.lock:
+            # SQLite takes the bare columns from the row that holds MAX(run_id)
+            rows = self.connection.execute("SELECT host, ips, http, fingerprint, MAX(run_id) FROM hosts WHERE domain = ? GROUP BY host",
+                                           (domain,)).fetchall()
+        return {host: {"ips": json.loads(ips), "http": json.loads(http) if http else None, "fingerprint": fingerprint, "run_id": run_id}
+                for host, ips, http, fingerprint, run_id in rows}
+
+    def latest_results(self, domain):
+        """Return {tool: {host: data}} holding the newest stored result of each tool for each host"""
+        with self.lock:
+            rows = self.connection.execute("SELECT tool, host, data, MAX(run_id) FROM results WHERE domain = ? GROUP BY tool, host",
+                                           (domain,)).fetchall()
+        results = {}
+        for tool, host, data, _ in rows:
+            results.setdefault(tool, {})[host] = json.loads(data)
+        return results
+
+    def record_run(self, domain, started, incremental, hosts, results):
+        """Store one completed run: hosts as (host, ips, http, fingerprint), results as {tool: {host: data}}"""
+        now = time.time()
+        with self.lock, self.connection:
+            run_id = self.connection.execute("INSERT INTO runs (domain, started, finished, incremental) VALUES (?, ?, ?, ?)",
+                                             (domain, started, now, int(incremental))).lastrowid
+            self.connection.executemany("INSERT INTO hosts VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                (run_id, domain, host, json.dumps(ips), json.dumps(http) if http else None, fingerprint, now)
+                for host, ips, http, fingerprint in hosts))
+            self.connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)", (
+                (run_id, domain, host, tool, json.dumps(data), now)
+                for tool, by_host in results.items() for host, data in by_host.items()))
+        return run_id
+
+    def baseline(self, host, fingerprint, max_age=CALIBRATION_TTL):
+        """Return the random-path signatures stored for host while it had this fingerprint, or None"""
+        with self.lock:
+            row = self.connection.execute("SELECT signatures FROM baselines WHERE host = ? AND fingerprint = ? AND timestamp > ?",
+                                          (host, fingerprint, time.time() - max_age)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_baseline(self, host, fingerprint, signatures):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO baselines VALUES (?, ?, ?, ?)", (host, fingerprint, json.dumps(signatures), time.time()))
+
+    def endpoint_result(self, tool, url, fingerprint, max_age=ENDPOINT_CACHE_TTL):
+        """Return (True, result) when tool already ran against url while it answered with this fingerprint"""
+        with self.lock:
+            row = self.connection.execute("SELECT data FROM endpoints WHERE tool = ? AND url = ? AND fingerprint = ? AND timestamp > ?",
+                                          (tool, url, fingerprint, time.time() - max_age)).fetchone()
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def save_endpoint_result(self, tool, url, fingerprint, result):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO endpoints VALUES (?, ?, ?, ?, ?)", (tool, url, fingerprint, json.dumps(result), time.time()))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+# Crash-safe state of one run: metadata, live subdomains and an append-only journal per stage
+class RunCheckpoint:
+    def __init__(self, run_id, folder=RUNS_FOLDER):
+        self.run_id = run_id
+        self.folder = os.path.join(folder, run_id)
+        self.lock = threading.Lock()
+        self.journals = {}
+        self.results = {}
+        self.state = self.read_state(run_id, folder) or {}
+        self.resumed = bool(self.state)
+        os.makedirs(os.path.join(self.folder, "stages"), exist_ok=True)
+        for path in glob.glob(os.path.join(self.folder, "stages", "*.jsonl")):
+            stage = os.path.basename(path)[:-len(".jsonl")]
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line torn by the crash; that job simply runs again
+                    self.results.setdefault(stage, {})[entry["host"]] = entry["result"]
+
+    @staticmethod
+    def new_run_id(domain):
+        return f"{domain}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+    @staticmethod
+    def read_state(run_id, folder=RUNS_FOLDER):
+        try:
+            with open(os.path.join(folder, run_id, "run.json"), "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def update(self, **fields):
+        with self.lock:
+            self.state.update(fields)
+            write_file_atomic(os.path.join(self.folder, "run.json"), json.dumps(self.state, indent=2))
+
+    def subdomains(self):
+        """Live subdomains recorded so far, or None when none were recorded"""
+        try:
+            with open(os.path.join(self.folder, "subdomains.txt"), "r") as f:
+                # Whatever follows the last newline is a torn append
+                return [line.strip() for line in f.read().split("\n")[:-1] if line.strip()]
+        except OSError:
+            return None
+
+    def save_subdomains(self, subdomains):
+        write_file_atomic(os.path.join(self.folder, "subdomains.txt"), "".join(f"{subdomain}\n" for subdomain in subdomains))
+
+    def add_subdomain(self, subdomain):
+        self._append("subdomains.txt", f"{subdomain}\n")
+
+    def completed(self, stage, host):
+        """Return (True, result) when the (stage, host) job finished before the run was interrupted"""
+        stored = self.results.get(stage, {})
+        key = host or ""
+        if key not in stored:
+            return False, None
+        return True, restore_result(stage, stored[key])
+
+    def record(self, stage, host, result):
+        if (host or "") in self.results.get(stage, {}):
+            return  # Restored from this checkpoint, already journaled
+        self._append(os.path.join("stages", f"{stage}.jsonl"), json.dumps({"host": host or "", "result": normalize_result(stage, result)}) + "\n")
+
+    def _append(self, name, line):
+        # One O_APPEND write per record: a crash can only tear the last line, which loading skips
+        with self.lock:
+            fd = self.journals.get(name)
+            if fd is None:
+                fd = self.journals[name] = os.open(os.path.join(self.folder, name), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(fd, line.encode())
+
+    def close(self):
+        with self.lock:
+            for fd in self.journals.values():
+                os.close(fd)
+            self.journals = {}
+
+    def remove(self):
+        self.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+def gospider_rate_flags(rate):
+    """Express a requests/second share as gospider's per-domain concurrency and whole-second delay"""
+    if not rate:
+        return []
+    if rate >= 1:
+        return ["-c", str(max(1, min(5, int(rate))))]
+    return ["-c", "1", "-k", str(math.ceil(1 / rate))]
 
 def is_apex_domain(domain):
     """Check if the domain is an apex domain (not a subdomain)"""
@@ -148,6 +1130,47 @@ def is_apex_domain(domain):
     # If it has more than 3 parts, it's likely a subdomain
     return False
 
+def get_option_value(flag, default, cast=str):
+    """Return the value following flag in sys.argv, or default when the flag is absent"""
+    if flag not in sys.argv:
+        return default
+    index = sys.argv.index(flag)
+    try:
+        return cast(sys.argv[index + 1])
+    except (IndexError, ValueError):
+        print(f"{COLORS['RED']}Error: {flag} expects a {cast.__name__} value{COLORS['NC']}")
+        sys.exit(1)
+
+def load_targets(path):
+    """Read a -targets file: one apex domain per line, optionally followed by its own requests/second cap"""
+    targets = {}
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except OSError as e:
+        print(f"{COLORS['RED']}Error: cannot read targets file {path}: {e.strerror}{COLORS['NC']}")
+        sys.exit(1)
+    for number, line in enumerate(lines, 1):
+        fields = line.split("#", 1)[0].split()
+        if not fields:
+            continue
+        domain = fields[0].lower().rstrip(".")
+        rate = None
+        if len(fields) > 1:
+            try:
+                rate = max(0, int(fields[1]))
+            except ValueError:
+                print(f"{COLORS['RED']}Error: {path}:{number}: rate must be an integer, got {fields[1]}{COLORS['NC']}")
+                sys.exit(1)
+        if not is_apex_domain(domain):
+            print(f"{COLORS['RED']}Error: {path}:{number}: {domain} is not an apex domain{COLORS['NC']}")
+            sys.exit(1)
+        targets.setdefault(domain, rate)
+    if not targets:
+        print(f"{COLORS['RED']}Error: no targets in {path}{COLORS['NC']}")
+        sys.exit(1)
+    return list(targets.items())
+
 def parse_arguments():
     if len(sys.argv) < 2 or sys.argv[1] in ['-h', '--help', '-help']:
         print(f"""
@@ -167,33 +1190,593 @@ A comprehensive reconnaissance tool for domain analysis and security assessment.
   recon example.com -full -aws
     Performs full scan with AWS integration and proxy routing
 
+  recon example.com -dns-concurrency 200 -dns-timeout 2 -dns-retries 3
+    Tunes bulk DNS resolution of discovered subdomains (defaults: {DNS_CONCURRENCY}, {DNS_TIMEOUT:g}s, {DNS_RETRIES})
+
+  recon example.com -resolvers 1.1.1.1,8.8.8.8
+    Resolvers queried for the A, AAAA, CNAME, MX, NS, TXT, SOA and CAA records of every live host
+    (default: {','.join(DNS_RESOLVERS)})
+
+  recon example.com -stream
+    Starts Gospider, FFUF, wafw00f, Arjun and Corsy on each subdomain as soon as BBOT finds it
+
+  recon example.com -ffuf-workers 8 -ffuf-rate 400
+    Runs 8 ffuf processes at once sharing a 400 requests/second budget (defaults: {FFUF_WORKERS}, unlimited)
+
+  recon example.com -gospider-workers 8
+    Crawls 8 hosts with Gospider at once (default: {GOSPIDER_WORKERS})
+
+  recon example.com -cluster-sample 5
+    Hosts with the same addresses, CNAME target and HTTP response form a cluster: Gospider, FFUF and Arjun
+    run on its first host plus 5 sampled members and the rest are listed under it (default: {CLUSTER_SAMPLE};
+    -no-cluster scans every host separately)
+
+  recon example.com -target-rate 20
+    Caps the requests/second all tools together send to each host/IP, backing off on 429/403 spikes; hosts that
+    resolve to the same IP share one budget (default: unlimited)
+
+  recon example.com -nice -cgroup
+    Starts every tool at low CPU/IO priority and in its own cgroup v2 group capped at {CGROUP_CPU_SHARE:.0%} of the CPUs and
+    {CGROUP_MEMORY_MAX:.0%} of RAM, so heavy tools like BBOT and FFUF can share the machine without starving or
+    OOM-killing each other (-cgroup needs root or a delegated cgroup, e.g. systemd-run --user --scope -p Delegate=yes).
+    Concurrency follows load average, free memory, open files and tool RSS unless -no-adaptive is given
+
+  recon example.com -budget 2h
+    Stops the whole run after 2 hours (s, m, h or d; default: no limit): running tools are killed, their partial
+    output is kept and the hosts they were scanning are listed as timed out in the overview note. Single tools
+    and per-host stage jobs also have fixed time limits of their own; FFUF's are those of its config's maxtime,
+    unless -budget is given
+
+  recon example.com -incremental
+    Reruns Gospider, FFUF, Arjun and CloudBrute only for hosts that are new or whose IP/HTTP fingerprint changed,
+    reusing stored results for the rest (every run is kept in ~/.local/share/secos/recon.db
+    and a changes.md note lists what changed since the previous run)
+
+  recon -targets targets.txt -target-workers 4
+    Scans every apex domain listed in targets.txt (one per line, optionally followed by its own
+    requests/second cap, e.g. "example.org 10") through one shared worker pool, taking jobs from
+    the targets in turn and saving each target's vault notes as soon as it finishes (default: {TARGET_WORKERS} targets at once)
+
+  recon -resume example.com-20250101-120000
+    Continues an interrupted run where it stopped, with the options it was started with
+    (the run id is printed when a run is interrupted; its Fireprox gateway is reused if it still exists)
+
+  recon example.com -prom-textfile /var/lib/node_exporter/textfile/recon.prom
+    Also writes run metrics for the node exporter textfile collector
+    (telemetry.json and a Chrome trace.json are always written to the vault folder)
+
 {COLORS['YELLOW']}Note: Only apex domains are accepted (e.g., example.com, not sub.example.com){COLORS['NC']}
 """)
         sys.exit(1)
     
     # Simple argument parsing without argparse
-    domain = sys.argv[1]
+    targets_file = get_option_value('-targets', None)
+    domain = None if targets_file else sys.argv[1]
     full_scan = '-full' in sys.argv
     aws_mode = '-aws' in sys.argv
+    stream_mode = '-stream' in sys.argv
+    incremental = '-incremental' in sys.argv
+    resume = get_option_value('-resume', None)
+    if resume:
+        # A resumed run keeps the target and mode flags it was started with
+        state = RunCheckpoint.read_state(resume)
+        if not state:
+            print(f"{COLORS['RED']}Error: no interrupted run {resume} in {RUNS_FOLDER}{COLORS['NC']}")
+            sys.exit(1)
+        domain = state["domain"]
+        full_scan, aws_mode, stream_mode, incremental = (state[key] for key in ("full", "aws", "stream", "incremental"))
+    dns_concurrency = get_option_value('-dns-concurrency', DNS_CONCURRENCY, int)
+    dns_timeout = get_option_value('-dns-timeout', DNS_TIMEOUT, float)
+    dns_retries = get_option_value('-dns-retries', DNS_RETRIES, int)
+    resolvers = [resolver.strip() for resolver in get_option_value('-resolvers', ','.join(DNS_RESOLVERS)).split(',') if resolver.strip()]
+    ffuf_workers = max(1, get_option_value('-ffuf-workers', FFUF_WORKERS, int))
+    ffuf_rate = max(0, get_option_value('-ffuf-rate', FFUF_RATE, int))
+    gospider_workers = max(1, get_option_value('-gospider-workers', GOSPIDER_WORKERS, int))
+    cluster_hosts = '-no-cluster' not in sys.argv
+    cluster_sample = max(0, get_option_value('-cluster-sample', CLUSTER_SAMPLE, int))
+    target_rate = max(0, get_option_value('-target-rate', TARGET_RATE, int))
+    prometheus_file = get_option_value('-prom-textfile', None)
+    target_workers = max(1, get_option_value('-target-workers', TARGET_WORKERS, int))
+    budget = get_option_value('-budget', SCAN_BUDGET, duration)
+    adaptive = '-no-adaptive' not in sys.argv
+    nice = '-nice' in sys.argv
+    cgroups = '-cgroup' in sys.argv
+    targets = load_targets(targets_file) if targets_file and not resume else [(domain, None)]
     
     # Validate that it's an apex domain
-    if not is_apex_domain(domain):
+    if domain and not is_apex_domain(domain):
         print(f"{COLORS['RED']}Error: Subdomains are not valid targets, use an apex domain (e.g., example.com){COLORS['NC']}")
         sys.exit(1)
     
     return type('Args', (), {
         'domain': domain,
+        'targets': targets,
+        'target_workers': target_workers,
         'full': full_scan,
-        'aws': aws_mode
+        'aws': aws_mode,
+        'stream': stream_mode,
+        'incremental': incremental,
+        'resume': resume,
+        'dns_concurrency': dns_concurrency,
+        'dns_timeout': dns_timeout,
+        'dns_retries': dns_retries,
+        'resolvers': resolvers,
+        'ffuf_workers': ffuf_workers,
+        'ffuf_rate': ffuf_rate,
+        'gospider_workers': gospider_workers,
+        'cluster_hosts': cluster_hosts,
+        'cluster_sample': cluster_sample,
+        'target_rate': target_rate,
+        'budget': budget,
+        'adaptive': adaptive,
+        'nice': nice,
+        'cgroups': cgroups,
+        'prometheus_file': prometheus_file
     })()
 
-def run_command(command, output_file=None, capture_output=False):
+def duration(text):
+    """Seconds in a -budget value such as 90, 45m, 2h or 1d"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    text = text.strip().lower()
+    seconds = float(text[:-1]) * units[text[-1]] if text[-1:] in units else float(text)
+    if seconds < 0:
+        raise ValueError(text)
+    return seconds
+
+def kill_process_group(process, sig=signal.SIGKILL):
+    """Signal a tool and everything it spawned; tools run in their own process group"""
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+class Deadlines:
+    """Kills the process groups of tools whose own, stage job or run-wide deadline has passed.
+    Each process gets the earliest of the three when it starts; a watcher thread enforces them"""
+    def __init__(self):
+        self.budget_deadline = None
+        self.processes = {}
+        self.context = threading.local()
+        self.lock = threading.Lock()
+        self.watcher = None
+
+    def start_budget(self, seconds):
+        self.budget_deadline = time.monotonic() + seconds if seconds else None
+
+    def budget_expired(self):
+        return self.budget_deadline is not None and time.monotonic() >= self.budget_deadline
+
+    @contextlib.contextmanager
+    def job(self, timeout, owner=None, tool_timeouts=None):
+        """Give the processes this thread starts a shared stage deadline, owner and per-tool limits; the yielded
+        state's "timed_out" names the deadline (tool, stage or budget) that killed one of them"""
+        state = {"deadline": time.monotonic() + timeout if timeout else None, "timed_out": None, "owner": owner,
+                 "tool_timeouts": TOOL_TIMEOUTS if tool_timeouts is None else tool_timeouts}
+        previous = getattr(self.context, "job", None)
+        self.context.job = state
+        try:
+            yield state
+        finally:
+            self.context.job = previous
+
+    def register(self, process, tool):
+        now = time.monotonic()
+        job = getattr(self.context, "job", None)
+        timeout = (job["tool_timeouts"] if job else TOOL_TIMEOUTS).get(tool, TOOL_TIMEOUT)
+        limits = [(deadline, reason) for deadline, reason in ((now + timeout if timeout else None, "tool"),
+                                                             (job["deadline"] if job else None, "stage"),
+                                                             (self.budget_deadline, "budget")) if deadline]
+        process.deadline = min(limits) if limits else None
+        process.timed_out = None
+        process.owner = job["owner"] if job else None
+        with self.lock:
+            self.processes[process.pid] = process
+            # A job of a target dropped from a shared scheduler may still be starting its tool
+            if getattr(process.owner, "cancelled", False):
+                kill_process_group(process)
+            if self.watcher is None:
+                self.watcher = threading.Thread(target=self._watch, daemon=True)
+                self.watcher.start()
+
+    def release(self, process):
+        """Forget a process that has exited; its job learns whether a deadline ended it"""
+        with self.lock:
+            self.processes.pop(process.pid, None)
+        job = getattr(self.context, "job", None)
+        if process.timed_out and job is not None:
+            job["timed_out"] = job["timed_out"] or process.timed_out
+
+    def kill_all(self, owner=None):
+        """Kill every running tool after an interruption, or only those started for owner; their own
+        process groups do not see the terminal's SIGINT"""
+        with self.lock:
+            for process in self.processes.values():
+                if owner is None or process.owner is owner:
+                    kill_process_group(process)
+
+    def _watch(self):
+        while True:
+            time.sleep(DEADLINE_POLL_INTERVAL)
+            now = time.monotonic()
+            with self.lock:
+                for process in self.processes.values():
+                    if process.timed_out is None and process.deadline and now >= process.deadline[0]:
+                        process.timed_out = process.deadline[1]
+                        process.killed_at = now
+                        kill_process_group(process, signal.SIGTERM)
+                    elif process.timed_out and now - process.killed_at >= KILL_GRACE:
+                        kill_process_group(process)
+
+deadlines = Deadlines()
+
+def read_meminfo():
+    """MemTotal and MemAvailable in bytes"""
+    meminfo = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("MemTotal", "MemAvailable"):
+                    meminfo[key] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        pass
+    return meminfo
+
+class ToolCgroups:
+    """One cgroup v2 group per tool with CPU and memory caps, so a heavy tool is throttled or OOM-killed on its own
+    instead of taking the other tools down with it. The run moves itself into a leaf group first, since cgroup v2
+    only lets a group without processes of its own hand controllers to its children"""
+    def __init__(self):
+        self.parent = None
+        self.base = None
+        self.parent_enabled = False
+        self.groups = {}
+        self.lock = threading.Lock()
+
+    def setup(self):
+        """Create this run's group under the current one; False when cgroup v2 is missing or not delegated to us"""
+        try:
+            if not os.path.isfile(os.path.join(CGROUP_ROOT, "cgroup.controllers")):
+                raise OSError(f"{CGROUP_ROOT} is not a cgroup v2 mount")
+            with open("/proc/self/cgroup") as f:
+                current = next(line.split("::", 1)[1].strip() for line in f if line.startswith("0::"))
+            self.parent = os.path.normpath(os.path.join(CGROUP_ROOT, current.lstrip("/")))
+            self._check_delegation()
+        except (OSError, StopIteration) as e:
+            print(f"{COLORS['YELLOW']}Warning: cgroup v2 limits unavailable ({e}); tools run without them{COLORS['NC']}")
+            return False
+        self.base = os.path.join(self.parent, f"secos-{os.getpid()}")
+        try:
+            os.makedirs(os.path.join(self.base, "recon"), exist_ok=True)
+            self._write(os.path.join(self.base, "recon", "cgroup.procs"), str(os.getpid()))
+            if not self._controllers(self.parent, "cgroup.subtree_control") >= {"cpu", "memory"}:
+                self._write(os.path.join(self.parent, "cgroup.subtree_control"), "+cpu +memory")
+                self.parent_enabled = True
+            self._write(os.path.join(self.base, "cgroup.subtree_control"), "+cpu +memory")
+        except OSError as e:
+            print(f"{COLORS['YELLOW']}Warning: cgroup v2 limits unavailable ({e}); tools run without them{COLORS['NC']}")
+            self.remove()
+            return False
+        return True
+
+    def _controllers(self, group, name):
+        with open(os.path.join(group, name)) as f:
+            return set(f.read().split())
+
+    def _check_delegation(self):
+        """Raise OSError unless this process may create groups here and hand them the cpu and memory controllers"""
+        if not self._controllers(self.parent, "cgroup.controllers") >= {"cpu", "memory"}:
+            raise OSError(f"cpu and memory controllers are not available in {self.parent}")
+        for name in ("cgroup.procs", "cgroup.subtree_control"):
+            if not os.access(os.path.join(self.parent, name), os.W_OK):
+                raise OSError(f"{self.parent} is not delegated to this user")
+        # cgroup v2 lets only the root group or a group without processes enable controllers for its children
+        with open(os.path.join(self.parent, "cgroup.procs")) as f:
+            others = [pid for pid in f.read().split() if int(pid) != os.getpid()]
+        if others and self.parent != os.path.normpath(CGROUP_ROOT) and not self._controllers(self.parent, "cgroup.subtree_control") >= {"cpu", "memory"}:
+            raise OSError(f"{self.parent} holds other processes; run inside a delegated scope, e.g. systemd-run --scope -p Delegate=yes")
+
+    def _write(self, path, value):
+        with open(path, "w") as f:
+            f.write(value)
+
+    def _group(self, tool):
+        with self.lock:
+            if tool not in self.groups:
+                path = os.path.join(self.base, re.sub(r"[^\w.-]", "_", tool))
+                os.makedirs(path, exist_ok=True)
+                total = read_meminfo().get("MemTotal", 0)
+                self._write(os.path.join(path, "cpu.max"), f"{int(CGROUP_CPU_SHARE * (os.cpu_count() or 1) * 100000)} 100000")
+                if total:
+                    self._write(os.path.join(path, "memory.high"), str(int(CGROUP_MEMORY_HIGH * total)))
+                    self._write(os.path.join(path, "memory.max"), str(int(CGROUP_MEMORY_MAX * total)))
+                self.groups[tool] = path
+            return self.groups[tool]
+
+    def procs_file(self, tool):
+        """cgroup.procs of the tool's group, for the tool's exec wrapper to write itself into; None if it cannot be made"""
+        try:
+            return os.path.join(self._group(tool), "cgroup.procs")
+        except OSError:
+            return None
+
+    def remove(self):
+        """Drop the per-tool groups once their tools have exited, move this process back and drop the run's group"""
+        for path in self.groups.values():
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+        self.groups = {}
+        if not self.base:
+            return
+        try:
+            self._write(os.path.join(self.base, "cgroup.subtree_control"), "-cpu -memory")
+        except OSError:
+            pass
+        if self.parent_enabled:
+            # A group with controllers enabled for its children cannot take this process back
+            try:
+                self._write(os.path.join(self.parent, "cgroup.subtree_control"), "-cpu -memory")
+                self.parent_enabled = False
+            except OSError:
+                pass
+        try:
+            self._write(os.path.join(self.parent, "cgroup.procs"), str(os.getpid()))
+        except OSError:
+            pass
+        for path in (os.path.join(self.base, "recon"), self.base):
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+        self.base = None
+
+class LoadGovernor:
+    """Watches load average, free memory, open file descriptors and the RSS of running tools, and moves the
+    per-resource-class limits of every scheduler, and the cpu class JSCache runs jsluice under, accordingly.
+    Also starts tools niced or inside their cgroup"""
+    def __init__(self):
+        self.enabled = False
+        self.nice = False
+        self.cgroups = None
+        self.limits = dict(SCAN_RESOURCE_LIMITS, cpu=CPU_SLOTS)
+        self.changed = {}
+        self.schedulers = []
+        self.lock = threading.Lock()
+        self.watcher = None
+
+    def configure(self, adaptive, nice=False, cgroups=False):
+        self.enabled = adaptive
+        self.nice = nice
+        self.limits = dict(SCAN_RESOURCE_LIMITS, cpu=CPU_SLOTS)
+        if cgroups:
+            tool_cgroups = ToolCgroups()
+            self.cgroups = tool_cgroups if tool_cgroups.setup() else None
+
+    def ceiling(self, resource_class, limit):
+        """Most slots a scheduler's class may get, so its thread pool can be sized up front"""
+        return max(limit, GOVERNOR_CEILINGS.get(resource_class, limit)) if self.enabled else limit
+
+    def attach(self, scheduler):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.schedulers.append(scheduler)
+            if self.watcher is None:
+                self.watcher = threading.Thread(target=self._watch, daemon=True)
+                self.watcher.start()
+        scheduler.set_resource_limits(self.limits)
+
+    def detach(self, scheduler):
+        with self.lock:
+            if scheduler in self.schedulers:
+                self.schedulers.remove(scheduler)
+
+    def wrap(self, command, tool):
+        """Prefix command so the tool execs niced, at idle-ish I/O priority and inside its cgroup. The prefixes are
+        small programs that exec the next one, so the tool and anything it spawns never run outside its limits"""
+        prefix = []
+        procs_file = self.cgroups.procs_file(tool) if self.cgroups else None
+        if procs_file:
+            # A failed write leaves the tool running outside its group rather than not running at all
+            prefix += ["sh", "-c", '{ echo 0 > "$1"; } 2>/dev/null; shift; exec "$@"', "sh", procs_file]
+        if self.nice:
+            prefix += ["nice", "-n", str(CHILD_NICE)]
+            if shutil.which("ionice"):
+                prefix += ["ionice", "-c", "2", "-n", str(CHILD_IONICE_LEVEL)]
+        return prefix + list(command)
+
+    def child_rss(self):
+        """Resident memory of every process in the running tools' process groups, their descendants included"""
+        with deadlines.lock:
+            groups = set(deadlines.processes)
+        if not groups:
+            return 0
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        total = 0
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    # Fields after the parenthesised command name: state, ppid, pgrp, ...
+                    if int(f.read().rsplit(")", 1)[1].split()[2]) not in groups:
+                        continue
+                with open(f"/proc/{pid}/statm") as f:
+                    total += int(f.read().split()[1]) * page_size
+            except (OSError, ValueError, IndexError):
+                continue
+        return total
+
+    def sample(self):
+        meminfo = read_meminfo()
+        memory = meminfo.get("MemTotal") or 1
+        soft_fds = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        return {
+            "load": os.getloadavg()[0] / (os.cpu_count() or 1),
+            "available_memory": meminfo.get("MemAvailable", memory) / memory,
+            "child_rss": self.child_rss() / memory,
+            "fds": len(os.listdir("/proc/self/fd")) / soft_fds if soft_fds > 0 else 0.0,
+        }
+
+    def adjust(self, sample):
+        """Return the new per-class limits for one sample"""
+        memory = sample["available_memory"] < GOVERNOR_MIN_AVAILABLE_MEMORY or sample["child_rss"] > GOVERNOR_MAX_CHILD_RSS
+        fds = sample["fds"] > GOVERNOR_MAX_FDS
+        busy = sample["load"] > GOVERNOR_LOAD_HIGH
+        # Tools hold the memory and CPU, probes and tools the sockets
+        pressure = {"network": memory or fds or busy, "cpu": memory or busy, "probe": fds}
+        headroom = sample["load"] < GOVERNOR_LOAD_LOW and not memory and not fds
+        now = time.monotonic()
+        limits = dict(self.limits)
+        for resource_class, limit in self.limits.items():
+            # The load average trails reality, so a class that just moved is given time to show the effect
+            if now - self.changed.get(resource_class, 0) < GOVERNOR_COOLDOWN:
+                continue
+            if pressure.get(resource_class) and limit > 1:
+                limits[resource_class] = max(1, limit // 2)
+            elif headroom and limit < GOVERNOR_CEILINGS.get(resource_class, limit):
+                limits[resource_class] = limit + 1
+            else:
+                continue
+            self.changed[resource_class] = now
+        return limits
+
+    def _watch(self):
+        while True:
+            time.sleep(GOVERNOR_INTERVAL)
+            try:
+                sample = self.sample()
+            except OSError:
+                continue
+            limits = self.adjust(sample)
+            if limits == self.limits:
+                continue
+            self.limits = limits
+            telemetry.record_limits(limits, sample)
+            with self.lock:
+                schedulers = list(self.schedulers)
+            for scheduler in schedulers:
+                scheduler.set_resource_limits(limits)
+
+load_governor = LoadGovernor()
+
+def start_process(command, stage=None, host=None, **popen_kwargs):
+    """Popen wrapper that remembers what finish_process needs to measure the child"""
+    # Tools run inside the scratch directory so stray files they drop are cleaned up with it
+    popen_kwargs.setdefault("cwd", work_dir)
+    tool = os.path.basename(strip_proxychains(command)[0])
+    # Its own process group lets a deadline kill the tool together with anything it spawned
+    process = subprocess.Popen(load_governor.wrap(command, tool), start_new_session=True, **popen_kwargs)
+    deadlines.register(process, tool)
+    context_stage, context_host = telemetry.current()
+    process.telemetry = {"command": command, "stage": stage or context_stage, "host": host or context_host,
+                         "start": time.time(), "started": time.monotonic()}
+    return process
+
+def finish_process(process, output_files=(), stdout_bytes=0):
+    """Reap the child with wait4 to capture its CPU time and peak RSS, then record the invocation"""
+    rusage = None
+    try:
+        # Wait without reaping, so the watcher can never signal a recycled process group
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+    except ChildProcessError:
+        pass
+    except BaseException:
+        kill_process_group(process)
+        deadlines.release(process)
+        process.wait()
+        raise
+    deadlines.release(process)
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    except ChildProcessError:
+        process.wait()
+    info = process.telemetry
+    bytes_written = stdout_bytes + sum(os.path.getsize(path) for path in output_files if path and os.path.isfile(path))
+    telemetry.record_process(info["command"], info["stage"], info["host"], info["start"], time.monotonic() - info["started"],
+                             rusage, process.returncode, bytes_written)
+    return process.returncode
+
+def run_process(command, capture_output=False, output_files=(), check=False, stage=None, host=None):
+    """Run a tool to completion under measurement and return (returncode, stdout text or None)"""
+    process = start_process(command, stage, host, stdout=subprocess.PIPE if capture_output else subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, text=True)
+    output = None
+    if capture_output:
+        output = process.stdout.read()
+        process.stdout.close()
+    returncode = finish_process(process, output_files, len(output.encode()) if output else 0)
+    # A tool stopped by a deadline is not a failure: callers go on with whatever output it left
+    if check and returncode != 0 and not process.timed_out:
+        raise subprocess.CalledProcessError(returncode, command, output)
+    return returncode, output
+
+def iter_json_records(lines):
+    """Yield each JSON object in a text stream as soon as it is complete, whether the stream is newline-delimited
+    or one top-level array; only the record being read is held in memory and non-JSON lines are skipped"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    for line in lines:
+        buffer += line
+        while True:
+            buffer = buffer.lstrip(" \t\r\n,[]")
+            if not buffer:
+                break
+            if not buffer.startswith("{"):
+                # Banner or log line between records
+                newline = buffer.find("\n")
+                buffer = buffer[newline + 1:] if newline >= 0 else ""
+                continue
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as e:
+                newline = buffer.find("\n")
+                if newline < 0 or e.pos >= len(buffer.rstrip()):
+                    # The record is only incomplete: wait for the lines that finish it
+                    break
+                # A line that opens like JSON but is not, e.g. a banner or a truncated write
+                buffer = buffer[newline + 1:]
+                continue
+            yield record
+            buffer = buffer[end:]
+
+class ToolStream:
+    """Runs a tool with its JSON output on a stdout pipe; iterating yields the records while the tool is still running.
+    returncode is set once iteration ends, and a tool abandoned mid-stream is killed"""
+    def __init__(self, command, stage=None, host=None):
+        self.command = command
+        self.stage = stage
+        self.host = host
+        self.returncode = None
+        self.stdout_bytes = 0
+
+    def _lines(self, stdout):
+        for line in stdout:
+            self.stdout_bytes += len(line)
+            yield line
+
+    def __iter__(self):
+        process = start_process(self.command, self.stage, self.host, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        finished = False
+        try:
+            yield from iter_json_records(self._lines(process.stdout))
+            finished = True
+        finally:
+            if not finished and process.poll() is None:
+                kill_process_group(process)
+            process.stdout.close()
+            self.returncode = finish_process(process, stdout_bytes=self.stdout_bytes)
+
+def run_command(command, output_file=None, capture_output=False, output_files=()):
     try:
         if output_file:
             command.extend(["-o", output_file])
+        _, output = run_process(command, capture_output, (output_file,) + tuple(output_files), check=True)
         if capture_output:
-            return subprocess.check_output(command, text=True)
-        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return output
         return output_file if output_file else True
     except subprocess.CalledProcessError as e:
         print(f"Error running {command[0]}: {e}")
@@ -201,24 +1784,18 @@ def run_command(command, output_file=None, capture_output=False):
         print(f"An unexpected error occurred while running {command[0]}: {str(e)}")
     return None
 
-def clean_up(*files_to_remove):
+def clean_up(scratch_dir):
+    """Remove one run's scratch directory; nothing outside it is touched"""
     try:
-        for file in files_to_remove + (DNSREAPER_OUTPUT, ARJUN_OUTPUT, f"corsy_{domain}_input.txt", f"corsy_{domain}_output.json"):
-            if file and os.path.exists(file):
-                os.remove(file)
-        if os.path.exists("report"):
-            shutil.rmtree("report")
-        if os.path.exists("bbot_output"):
-            shutil.rmtree("bbot_output")
-        for file in glob.glob("ffuf_*.json"):
-            os.remove(file)
+        if scratch_dir:
+            shutil.rmtree(scratch_dir)
     except Exception as e:
         print(f"Error during cleanup: {str(e)}")
 
 def delete_fireprox_api(api_id):
     delete_command = ["fireprox", "--command", "delete", "--api_id", api_id]
     try:
-        subprocess.run(delete_command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        run_process(delete_command, check=True)
         print(f"{COLORS['GREEN']}Fireprox API Gateway (ID: {api_id}) deleted successfully{COLORS['NC']}")
     except subprocess.CalledProcessError:
         print(f"{COLORS['RED']}Error deleting Fireprox API Gateway (ID: {api_id}){COLORS['NC']}")
@@ -238,16 +1815,16 @@ def configure_aws_and_fireprox(domain):
         return None, None
 
     # Get the current AWS user's ARN
-    aws_user_arn = subprocess.check_output(["aws", "sts", "get-caller-identity", "--query", "Arn", "--output", "text"]).decode().strip()
+    aws_user_arn = run_process(["aws", "sts", "get-caller-identity", "--query", "Arn", "--output", "text"], capture_output=True, check=True)[1].strip()
     
     # Set up Fireprox
     create_command = ["fireprox", "--command", "create", "--url", f"https://{domain}"]
     try:
-        result = subprocess.run(create_command, capture_output=True, text=True, check=True)
+        _, create_output = run_process(create_command, capture_output=True, check=True)
         
         # Use regex to find the URL and API ID in the output
-        url_match = re.search(r'(https://[^\s]+\.amazonaws\.com/fireprox/)', result.stdout)
-        api_id_match = re.search(r'\(([a-z0-9]+)\)', result.stdout)
+        url_match = re.search(r'(https://[^\s]+\.amazonaws\.com/fireprox/)', create_output)
+        api_id_match = re.search(r'\(([a-z0-9]+)\)', create_output)
         
         if not url_match or not api_id_match:
             raise Exception("Failed to create Fireprox proxy")
@@ -277,51 +1854,241 @@ def configure_aws_and_fireprox(domain):
             "--patch-operations",
             f'op=replace,path=/policy,value={json.dumps(json.dumps(policy_document))}'
         ]
-        subprocess.run(update_policy_command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        run_process(update_policy_command, check=True)
         
-        # Clear and update proxychains config with strict chain
-        with open("/etc/proxychains.conf", "w") as f:
-            f.write("strict_chain\n")
-            f.write("dns_server = 1.1.1.1\n")
-            f.write("[ProxyList]\n")
-            f.write(f"http {proxy_url} 443\n")
-
         return proxy_url, api_id
     except subprocess.CalledProcessError as e:
         print(f"Error setting up Fireprox: {e}")
         return None, None
 
-def fetch_txt_records(domain, max_retries=3, retry_delay=5):
-    txt_command = ["dig", "@1.1.1.1", domain, "txt", "+short"]
-    for _ in range(max_retries):
-        txt_output = run_command(txt_command, capture_output=True)
-        if txt_output:
-            return [line.strip().strip('"') for line in txt_output.split("\n") if line.strip() and not line.startswith(";")]
-        time.sleep(retry_delay)
-    print(f"Max retries reached. Skipping TXT record retrieval for {domain}.")
-    return []
-
-def is_subdomain_active(subdomain):
-    try:
-        socket.gethostbyname(subdomain)
-        return True
-    except socket.gaierror:
-        return False
+def write_proxychains_config(proxy_url, config_path):
+    # Strict chain through the target's own gateway; each target gets its own config file
+    with open(config_path, "w") as f:
+        f.write("strict_chain\n")
+        f.write("dns_server = 1.1.1.1\n")
+        f.write("[ProxyList]\n")
+        f.write(f"http {proxy_url} 443\n")
+    return config_path
+
+def proxychains_prefix(proxy_config):
+    return ["proxychains", "-f", proxy_config] if proxy_config else []
+
+class FireproxGateway(requests.auth.AuthBase):
+    """The -aws Fireprox API Gateway for in-process requests. It is not a forward proxy: it serves https://<domain>
+    under its own URL, and its resource policy only admits this AWS identity, so requests are rewritten and SigV4-signed"""
+    def __init__(self, domain, url, credentials=None):
+        self.origin = f"https://{domain}"
+        self.url = url.rstrip("/")
+        self.credentials = credentials
+        region = re.search(r"\.execute-api\.([a-z0-9-]+)\.amazonaws\.com", url)
+        self.region = region.group(1) if region else None
+
+    def route(self, url):
+        """url on the gateway, or None when it belongs to an origin the gateway does not forward to"""
+        rest = url[len(self.origin):] if url.startswith(self.origin) else None
+        if rest is None or rest[:1] not in ("", "/", "?"):
+            return None
+        return self.url + (rest if rest.startswith("/") else f"/{rest}")
+
+    def failed(self, response):
+        """Errors API Gateway answers itself carry x-amzn-ErrorType; they say nothing about the target"""
+        return "x-amzn-ErrorType" in response.headers
+
+    def __call__(self, request):
+        signed = botocore.awsrequest.AWSRequest(method=request.method, url=request.url, data=request.body, headers=dict(request.headers))
+        botocore.auth.SigV4Auth(self.credentials, "execute-api", self.region).add_auth(signed)
+        request.headers.update(signed.headers.items())
+        return request
+
+def fireprox_gateway(proxy_config, domain):
+    """The gateway a proxychains config chains through, or None without -aws"""
+    if not proxy_config:
+        return None
+    with open(proxy_config) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 3 and fields[0] == "http":
+                return FireproxGateway(domain, fields[1], boto3.Session().get_credentials())
+    return None
+
+def route_request(url, gateway):
+    """(url, auth) to request url with: onto the gateway and signed when it forwards url's origin, else direct"""
+    routed = gateway.route(url) if gateway else None
+    return (routed, gateway) if routed else (url, None)
+
+def strip_proxychains(command):
+    if command[0] != "proxychains":
+        return command
+    return command[3:] if command[1:2] == ["-f"] else command[1:]
+
+def reuse_fireprox_api(proxy_url, api_id):
+    """Return an interrupted run's Fireprox gateway if it still exists, else (None, None)"""
+    if not proxy_url or not api_id:
+        return None, None
+    returncode, _ = run_process(["aws", "apigateway", "get-rest-api", "--rest-api-id", api_id])
+    if returncode != 0:
+        return None, None
+    return proxy_url, api_id
+
+def fetch_txt_records(domain):
+    return dns_client.records(domain, ("TXT",))["TXT"]
+
+def fetch_txt_records_once(domain, checkpoint):
+    """TXT records saved by the interrupted run, or freshly fetched and checkpointed"""
+    if "txt_records" not in checkpoint.state:
+        checkpoint.update(txt_records=fetch_txt_records(domain))
+    return checkpoint.state["txt_records"]
+
+def der_length(data, offset):
+    """Decode the DER length at offset; returns (length, offset of the contents)"""
+    length = data[offset]
+    offset += 1
+    if length & 0x80:
+        count = length & 0x7f
+        length = int.from_bytes(data[offset:offset + count], "big")
+        offset += count
+    return length, offset
+
+def certificate_sans(der):
+    """DNS names of the subjectAltName extension in a DER certificate"""
+    names = []
+    try:
+        # OID 2.5.29.17, an optional critical flag, then an OCTET STRING wrapping the GeneralNames sequence
+        offset = der.find(b"\x06\x03\x55\x1d\x11")
+        if offset < 0:
+            return names
+        offset += 5
+        if der[offset] == 0x01:
+            offset += 3
+        if der[offset] != 0x04:
+            return names
+        _, offset = der_length(der, offset + 1)
+        if der[offset] != 0x30:
+            return names
+        length, offset = der_length(der, offset + 1)
+        end = offset + length
+        while offset < end:
+            tag = der[offset]
+            length, offset = der_length(der, offset + 1)
+            if tag == 0x82:
+                names.append(der[offset:offset + length].decode("ascii", errors="replace"))
+            offset += length
+    except IndexError:
+        pass
+    return names
+
+class HTTPProber:
+    """Probes http:// and https:// of a host at once over one shared keep-alive pool, with short timeouts"""
+    def __init__(self, workers=HTTP_PROBE_WORKERS, timeout=HTTP_PROBE_TIMEOUT):
+        self.timeout = timeout
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # The https request and the certificate handshake run here while the caller's thread does http
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers * 2)
+
+    def _request(self, host, scheme, path="/", gateway=None):
+        """Return ([status, title, server, redirect, SANs], [status, body hash, length, title]) or (None, None)"""
+        url, auth = route_request(f"{scheme}://{host}{path}", gateway)
+        rate_governor.acquire(host)
+        try:
+            with self.session.get(url, timeout=self.timeout, verify=False, allow_redirects=False, stream=True, auth=auth) as response:
+                if auth is not None and auth.failed(response):
+                    return None, None
+                # iter_content also covers redirects, whose body requests has already read
+                body = b""
+                for chunk in response.iter_content(chunk_size=8192):
+                    body += chunk
+                    if len(body) >= HTTP_PROBE_MAX_BYTES:
+                        break
+        except (requests.RequestException, urllib3.exceptions.HTTPError, OSError):
+            return None, None
+        title = re.search(rb"<title[^>]*>(.*?)</title>", body, re.IGNORECASE | re.DOTALL)
+        title = " ".join(title.group(1).decode(errors="replace").split())[:200] if title else ""
+        redirect = response.headers.get("Location", "") if response.is_redirect else ""
+        # Catch-all apps echo the requested name, so it is blanked out before hashing
+        body = body.replace(host.encode(), b"")
+        response_fingerprint = [response.status_code, hashlib.sha1(body).hexdigest(), len(body), title.replace(host, "")]
+        return [response.status_code, title, response.headers.get("Server", ""), redirect, []], response_fingerprint
+
+    def _certificate_sans(self, host):
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        try:
+            with socket.create_connection((host, 443), timeout=self.timeout) as sock:
+                with context.wrap_socket(sock, server_hostname=host) as tls:
+                    return certificate_sans(tls.getpeercert(binary_form=True) or b"")
+        except (OSError, ValueError):
+            return []
+
+    def url_fingerprint(self, url, gateway=None):
+        """Hash of one URL's response, so per-endpoint results can be reused while it is unchanged; None if unreachable"""
+        scheme, _, rest = url.partition("://")
+        host, slash, path = rest.partition("/")
+        _, response_fingerprint = self._request(host, scheme, slash + path, gateway)
+        return hashlib.sha1(json.dumps(response_fingerprint).encode()).hexdigest() if response_fingerprint else None
+
+    def url_fingerprints(self, urls, gateway=None):
+        """url_fingerprint of several URLs at once; each request still waits for a token from its host's rate budget"""
+        return dict(zip(urls, self.executor.map(lambda url: self.url_fingerprint(url, gateway), urls)))
+
+    def path_signatures(self, host, count=CALIBRATION_PROBES, gateway=None):
+        """Request count random paths of different lengths on https://host and return their ffuf-style
+        [status, size, words, lines] signatures; a path that is unreachable, or that the gateway failed on, is left out"""
+        signatures = []
+        for index in range(count):
+            url, auth = route_request(f"https://{host}/{secrets.token_hex(4 + 4 * index)}", gateway)
+            rate_governor.acquire(host)
+            try:
+                response = self.session.get(url, timeout=self.timeout, verify=False, auth=auth)
+            except (requests.RequestException, urllib3.exceptions.HTTPError, OSError):
+                continue
+            if auth is not None and auth.failed(response):
+                continue
+            body = response.content
+            # Counted the way ffuf counts them, so the numbers can be used as ffuf filters
+            signatures.append([response.status_code, len(body), len(body.split(b" ")), len(body.split(b"\n"))])
+        return signatures
+
+    def probe(self, host, gateway=None):
+        """Return ({"http": ..., "https": ...}, response fingerprint). Each scheme is [status, title, server, redirect, TLS SANs]
+        or None when it did not answer; the fingerprint is that of https when it answered, else of http, else None.
+        Through the -aws gateway the certificate is not fetched, since that takes a direct TLS connection to host,
+        and (None, None) means the gateway did not carry the request rather than that host is down"""
+        via_gateway = gateway is not None and gateway.route(f"https://{host}/") is not None
+        https = self.executor.submit(self._request, host, "https", gateway=gateway)
+        sans = self.executor.submit(self._certificate_sans, host) if not via_gateway else None
+        http, http_fingerprint = self._request(host, "http", gateway=gateway)
+        https, https_fingerprint = https.result()
+        if https is None and via_gateway:
+            return None, None
+        if https is not None and sans is not None:
+            https[4] = sans.result()
+        return {"http": http, "https": https}, https_fingerprint or http_fingerprint
+
+http_prober = HTTPProber()
+
+def bbot_output_dir(domain):
+    return work_path("bbot_output", domain)
 
 def run_bbot_scan(domain):
-   output_dir = "bbot_output"
+   """Run BBOT and keep the subdomains that resolve on their own; returns the subdomains file and {subdomain: addresses}"""
+   output_dir = bbot_output_dir(domain)
    name = "secos"
    
    shutil.rmtree(output_dir, ignore_errors=True)
    
-   subprocess.run([
+   run_process([
        "bbot",
        "-t", domain,
        "-f", "subdomain-enum", 
        "-n", name,
        "-o", output_dir,
        "--silent"
-   ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+   ], check=True, stage="bbot")
    
    subdomains_file = os.path.join(output_dir, name, "subdomains.txt")
    
@@ -329,156 +2096,1287 @@ def run_bbot_scan(domain):
        raise FileNotFoundError(f"Subdomains file not found at {subdomains_file}")
    
    with open(subdomains_file, 'r') as infile:
-       active = []
-       for subdomain in infile:
-           subdomain = subdomain.strip()
-           if subdomain and is_subdomain_active(subdomain):
-               active.append(subdomain)
+       subdomains = [subdomain.strip() for subdomain in infile if subdomain.strip()]
+   
+   # Resolve everything concurrently; answers stay cached in dns_client for scan_data
+   resolved = dns_resolver.resolve_many(subdomains)
+   active = [subdomain for subdomain in subdomains if resolved.get(subdomain)]
+   # Names that only resolve through a wildcard record never reach the scanners
+   active = wildcard_filter.prune(domain, active, resolved)
    
    with open(subdomains_file, 'w') as outfile:
        outfile.write('\n'.join(active))
    
-   return subdomains_file
+   return subdomains_file, {subdomain: resolved[subdomain] for subdomain in active}
         
    
 
-def run_parallel_scans(domain, subdomains_file, scan_data, use_proxy=False):
-    scan_functions = {
-        'gospider': (1, lambda: run_gospider_and_jsluice(domain, VAULT_FOLDER, scan_data, use_proxy)),
-        'dnsreaper': (2, lambda: run_dnsreaper_scan(subdomains_file)),
-        'wafw00f': (3, lambda: run_wafw00f_scan(domain, subdomains_file)),
-        'cloudbrute': (4, lambda: run_cloudbrute_scan(domain, VAULT_FOLDER)),
-        'ffuf': (5, lambda: run_ffuf_scan(domain, scan_data, FFUF_FULL_CONFIG if run_full else FFUF_DEFAULT_CONFIG, use_proxy)),
-        'arjun': (6, lambda: run_arjun_scan(domain, scan_data)),
-        'corsy': (7, lambda: run_corsy_scan(domain, [item["domain"] for item in scan_data[1:]]))
-    }
-
-    results = {}
-    futures = {}
+def stream_bbot_subdomains(domain):
+    """Yield in-scope subdomains from BBOT's NDJSON event stream as they are discovered"""
+    output_dir = bbot_output_dir(domain)
+    name = "secos"
+    
+    shutil.rmtree(output_dir, ignore_errors=True)
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=len(scan_functions)) as executor:
-        # Submit all tasks
-        for name, (step, func) in scan_functions.items():
-            task_tracker.start_task(step)
-            futures[name] = executor.submit(func)
+    process = start_process([
+        "bbot",
+        "-t", domain,
+        "-f", "subdomain-enum",
+        "-n", name,
+        "-o", output_dir,
+        "--silent",
+        "--json"
+    ], stage="bbot", stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    
+    seen = set()
+    try:
+        for line in process.stdout:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(event, dict) or event.get("type") != "DNS_NAME":
+                continue
+            subdomain = str(event.get("data", "")).strip().lower().rstrip(".")
+            if subdomain in seen or not (subdomain == domain or subdomain.endswith(f".{domain}")):
+                continue
+            seen.add(subdomain)
+            yield subdomain
+    except BaseException:
+        kill_process_group(process)
+        raise
+    finally:
+        process.stdout.close()
+        finish_process(process)
+    
+    if process.returncode != 0 and not process.timed_out:
+        raise subprocess.CalledProcessError(process.returncode, "bbot")
+
+class HostRecord:
+    """One scanned host: its addresses plus the probe, DNS and cluster results attached after the scan"""
+    __slots__ = ("domain", "ip", "http", "https", "dns", "cluster", "timeouts")
+
+    def __init__(self, domain, ip=None):
+        self.domain = domain
+        self.ip = ip
+        self.http = self.https = self.dns = self.cluster = self.timeouts = None
+
+class HostTable:
+    """The apex and its subdomains as compact records with interned names, indexed by hostname. It is the one host
+    list of a target: records are created once, in the order hosts are found, and results are attached in place"""
+    def __init__(self, domain, txt_records=None):
+        self.root = HostRecord(sys.intern(domain))
+        self.txt_records = txt_records
+        self.wildcards = None
+        self.records = [self.root]
+        self.by_name = {self.root.domain: self.root}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __contains__(self, host):
+        return host in self.by_name
+
+    def get(self, host):
+        return self.by_name.get(host)
+
+    def add(self, domain, ip=None):
+        """Record a subdomain once; a name seen before (the apex included) keeps its first record"""
+        if not domain:
+            return None
+        domain = sys.intern(domain)
+        with self.lock:
+            record = self.by_name.get(domain)
+            if record is None:
+                record = self.by_name[domain] = HostRecord(domain, ip)
+                self.records.append(record)
+            return record
+
+    def subdomains(self):
+        """Every record after the apex, in the order the hosts were found"""
+        return itertools.islice(self.records, 1, None)
+
+    def hostnames(self):
+        return (record.domain for record in self.records)
+
+    def attach(self, host, http=None, https=None, dns=None, cluster=None, timeouts=None):
+        """Store results on host's record"""
+        record = self.by_name.get(host)
+        if record is None:
+            return
+        with self.lock:
+            for scheme, answer in (("http", http), ("https", https)):
+                if answer:
+                    setattr(record, scheme, answer)
+            if dns:
+                record.dns = dns
+            if cluster:
+                record.cluster = cluster
+            if timeouts:
+                record.timeouts = timeouts
+
+class Stage:
+    """One tool in the scan DAG: what it consumes, how wide it may run and which resource it loads"""
+    def __init__(self, name, step, run, inputs=(), scope="host", concurrency=1, resource="network", after_all_hosts=False):
+        self.name = name
+        self.step = step
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.scope = scope
+        self.concurrency = concurrency
+        self.resource = resource
+        self.after_all_hosts = after_all_hosts
+
+class ReconTarget:
+    """Per-domain scan state shared by every stage"""
+    def __init__(self, domain, scan_data, config_file, proxy_config=None, store=None, incremental=False, checkpoint=None,
+                 cluster_hosts=CLUSTER_HOSTS, cluster_sample=CLUSTER_SAMPLE, ffuf_workers=FFUF_WORKERS, ffuf_rate=FFUF_RATE,
+                 gospider_workers=GOSPIDER_WORKERS):
+        self.domain = domain
+        self.scan_data = scan_data
+        self.config_file = config_file
+        self.proxy_config = proxy_config
+        self.gateway = fireprox_gateway(proxy_config, domain)
+        self.cluster_hosts = cluster_hosts
+        self.cluster_sample = cluster_sample
+        self.ffuf_rate = ffuf_rate
+        # Stage slots set on the command line, in place of the stage's default concurrency
+        self.stage_workers = {"ffuf": ffuf_workers, "gospider": gospider_workers}
+        self.subdomains_file = None
+        self.results = {}
+        self.hosts_closed = False
+        self.cancelled = False
+        self.outstanding = 0
+        # cluster key -> [representative, sampled members...] and host -> representative for the rest
+        self.clusters = {}
+        self.cluster_members = {}
+        self.cluster_lock = threading.Lock()
+        # Arjun and Corsy findings merged per host as each one finishes
+        self.findings = {"arjun": {}, "corsy": {}}
+        self.findings_lock = threading.Lock()
+        # host (None for target-wide stages) -> {stage: deadline that cut it short}
+        self.timeouts = collections.defaultdict(dict)
+
+        # What the store knew before this run, for reuse and for the changes note
+        self.store = store
+        self.incremental = incremental and store is not None
+        self.previous_run = store.last_run(domain) if store else None
+        self.previous_hosts = store.latest_hosts(domain) if store else {}
+        self.previous_results = store.latest_results(domain) if store else {}
+        self.checkpoint = checkpoint
+
+        self.gospider_output_folder = os.path.join(VAULT_FOLDER, domain, "Gospider")
+        self.jsluice_folder = os.path.join(VAULT_FOLDER, domain, "JSluice")
+        self.ffuf_dir = os.path.join(VAULT_FOLDER, domain, "FFUF")
+        self.arjun_dir = os.path.join(VAULT_FOLDER, domain, "Arjun")
+        if not self.incremental and not (checkpoint and checkpoint.resumed):
+            # Unchanged and already crawled hosts keep their notes
+            shutil.rmtree(self.gospider_output_folder, ignore_errors=True)
+        for folder in (self.jsluice_folder, self.ffuf_dir, self.arjun_dir):
+            os.makedirs(folder, exist_ok=True)
+        self.run_ffuf = os.path.exists(config_file)
+        self.tool_timeouts, self.stage_timeouts = scan_timeouts(config_file)
+        if not self.run_ffuf:
+            print(f"Error: {config_file} file not found.")
+        self.deduper = URLDeduper()
+        self.js_cache = js_cache
+
+    def cluster_representative(self, host):
+        """Return the host whose heavy-tool results stand in for host, or None when host is scanned itself.
+        Hosts join their cluster in the order their first heavy stage starts"""
+        probe = self.results["fingerprint"].get(host)
+        if not self.cluster_hosts or host == self.domain or not probe or not probe.get("cluster"):
+            return None
+        with self.cluster_lock:
+            if host in self.cluster_members:
+                return self.cluster_members[host]
+            scanned = self.clusters.setdefault(probe["cluster"], [])
+            if host in scanned:
+                return None
+            if len(scanned) <= self.cluster_sample:
+                scanned.append(host)
+                return None
+            self.cluster_members[host] = scanned[0]
+            return scanned[0]
+
+    def mark_timed_out(self, stage, host, reason):
+        with self.findings_lock:
+            self.timeouts[host][stage] = reason
+
+    def merge_findings(self, tool, results):
+        """Fold one host's findings into the run-wide output file right away, so a slow host holds nothing up"""
+        if not results:
+            return
+        with self.findings_lock:
+            self.findings[tool].update(results)
+            write_file_atomic(work_path(f"{self.domain}_{ARJUN_OUTPUT if tool == 'arjun' else CORSY_OUTPUT}"),
+                              json.dumps(self.findings[tool], indent=2))
+
+    def endpoint_result(self, tool, url, fingerprint):
+        """Return (True, result) when -incremental can reuse tool's stored result for url"""
+        if not self.incremental or not fingerprint:
+            return False, None
+        return self.store.endpoint_result(tool, url, fingerprint)
+
+    def save_endpoint_result(self, tool, url, fingerprint, result):
+        if self.store and fingerprint:
+            self.store.save_endpoint_result(tool, url, fingerprint, result)
+
+    def stored_result(self, stage, host):
+        """Return (True, result) when stage already ran for host before an interruption,
+        or when incremental mode can reuse the last run's result"""
+        if self.checkpoint:
+            done, result = self.checkpoint.completed(stage.name, host)
+            if done:
+                return True, result
+        if not self.incremental or stage.name not in INCREMENTAL_STAGES:
+            return False, None
+        stored = self.previous_results.get(stage.name, {})
+        if host not in stored:
+            return False, None
+        if stored[host] is None and stage.name in CLUSTER_STAGES:
+            # Skipped last time, possibly as a cluster member this run no longer treats as one
+            return False, None
+        if host is not None:
+            previous = self.previous_hosts.get(host)
+            current = self.results["fingerprint"].get(host)
+            if not previous or not current or previous["fingerprint"] != current["fingerprint"]:
+                return False, None
+        return True, restore_result(stage.name, stored[host])
+
+class DAGScheduler:
+    """Runs (target, stage, host) jobs as soon as their inputs exist, bounded per stage and per resource class.
+    Several targets can share one scheduler; ready jobs are taken from them in turn"""
+    def __init__(self, stages, resource_limits=None, shared=False):
+        self.stages = list(stages)
+        self.resource_limits = dict(resource_limits or SCAN_RESOURCE_LIMITS)
+        self.running_stage = {stage.name: 0 for stage in self.stages}
+        self.running_resource = dict.fromkeys(self.resource_limits, 0)
+        self.ready = {}
+        self.rotation = collections.deque()
+        self.sequence = 0
+        self.ready_since = {}
+        self.blocked = {}
+        self.targets = []
+        self.accepting_targets = shared
+        self.outstanding = 0
+        self.step_pending = collections.Counter()
+        self.steps_started = set()
+        self.steps_completed = set()
+        self.cancelled = False
+        self.condition = threading.Condition()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=sum(load_governor.ceiling(name, limit) for name, limit in self.resource_limits.items()))
+        load_governor.attach(self)
+
+    def set_resource_limits(self, limits):
+        """Move the per-class slot counts; jobs above a lowered limit finish, they are only not replaced"""
+        with self.condition:
+            for name, limit in limits.items():
+                if name in self.resource_limits:
+                    self.resource_limits[name] = limit
+            self._dispatch()
+
+    def add_target(self, target):
+        with self.condition:
+            self.targets.append(target)
+            self.ready[id(target)] = {stage.name: collections.deque() for stage in self.stages}
+            self.rotation.append(target)
+            for stage in self.stages:
+                target.results[stage.name] = {}
+                if stage.scope == "target" and not stage.after_all_hosts:
+                    self._enqueue(target, stage, None)
+            self._dispatch()
+
+    def close_targets(self):
+        """No more targets will join a shared scheduler, so steps may be marked done"""
+        with self.condition:
+            self.accepting_targets = False
+            self._update_steps()
+
+    def add_host(self, target, host):
+        """Queue host's stages; callers add each host once, as it joins the target's host table"""
+        with self.condition:
+            if target.hosts_closed:
+                return
+            # Stages are queued per host so each host flows through the pipeline as a unit
+            for stage in self.stages:
+                if stage.scope == "host":
+                    self._enqueue(target, stage, host)
+            self._dispatch()
+
+    def close_hosts(self, target):
+        """No more hosts will arrive for target: release the stages that need the full host list"""
+        with self.condition:
+            if target.cancelled:
+                return
+            target.hosts_closed = True
+            for stage in self.stages:
+                if stage.scope == "target" and stage.after_all_hosts:
+                    self._enqueue(target, stage, None)
+            self._update_steps()
+            self._dispatch()
+            self.condition.notify_all()
+
+    def wait(self, target=None):
+        """Block until target (or every target) has no jobs left; raises KeyboardInterrupt if the run was cancelled"""
+        targets = [target] if target else self.targets
+        with self.condition:
+            while not self.cancelled and any((t.outstanding or not t.hosts_closed) and not t.cancelled for t in targets):
+                self.condition.wait()
+            if self.cancelled or any(t.cancelled for t in targets):
+                raise KeyboardInterrupt
+
+    def shutdown(self):
+        load_governor.detach(self)
+        self.executor.shutdown(wait=True)
+
+    def cancel(self):
+        """Stop dispatching after an interruption and kill the tools of the jobs still running"""
+        with self.condition:
+            self.cancelled = True
+            for queues in self.ready.values():
+                for ready_queue in queues.values():
+                    ready_queue.clear()
+            self.condition.notify_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        load_governor.detach(self)
+        deadlines.kill_all()
+
+    def cancel_target(self, target):
+        """Drop one target of a shared scheduler after it failed: its queued jobs are discarded and the tools
+        of its running jobs killed, while the other targets carry on"""
+        with self.condition:
+            target.cancelled = True
+            target.hosts_closed = True
+            dropped = [job for ready_queue in self.ready.get(id(target), {}).values() for job in ready_queue]
+            for job in dropped:
+                self.ready_since.pop(job, None)
+            for key in [key for key in self.blocked if key[0] == id(target)]:
+                dropped.extend(self.blocked.pop(key))
+            for _, stage, _ in dropped:
+                self.outstanding -= 1
+                target.outstanding -= 1
+                self.step_pending[stage.step] -= 1
+                task_tracker.add_progress(stage.step, done=1)
+            if id(target) in self.ready:
+                for ready_queue in self.ready[id(target)].values():
+                    ready_queue.clear()
+                if not target.outstanding:
+                    self.rotation.remove(target)
+                    del self.ready[id(target)]
+            self._update_steps()
+            self._dispatch()
+            self.condition.notify_all()
+        deadlines.kill_all(owner=target)
+
+    def _inputs_ready(self, target, stage, host):
+        return all(host in target.results[name] for name in stage.inputs)
+
+    def _enqueue(self, target, stage, host):
+        self.outstanding += 1
+        target.outstanding += 1
+        self.step_pending[stage.step] += 1
+        task_tracker.add_progress(stage.step, total=1)
+        if self._inputs_ready(target, stage, host):
+            self._make_ready((target, stage, host))
+        else:
+            self.blocked.setdefault((id(target), host), []).append((target, stage, host))
+
+    def _make_ready(self, job):
+        target, stage, _ = job
+        self.sequence += 1
+        self.ready_since[job] = (time.monotonic(), self.sequence)
+        self.ready[id(target)][stage.name].append(job)
+
+    def _can_start(self, target, stage):
+        return (self.running_stage[stage.name] < target.stage_workers.get(stage.name, stage.concurrency)
+                and self.running_resource[stage.resource] < self.resource_limits[stage.resource])
+
+    def _next_job(self, target):
+        # Within a target, the oldest ready job among the stages that have a free slot
+        best = None
+        for stage in self.stages:
+            ready_queue = self.ready[id(target)][stage.name]
+            if ready_queue and self._can_start(target, stage) and (best is None or self.ready_since[ready_queue[0]][1] < self.ready_since[best[0]][1]):
+                best = ready_queue
+        return best.popleft() if best else None
+
+    def _dispatch(self):
+        if self.cancelled:
+            return
+        # Round-robin over targets, one job per target per turn
+        idle_turns = 0
+        while self.rotation and idle_turns < len(self.rotation):
+            target = self.rotation[0]
+            self.rotation.rotate(-1)
+            job = self._next_job(target)
+            if job is None:
+                idle_turns += 1
+                continue
+            idle_turns = 0
+            _, stage, _ = job
+            self.running_stage[stage.name] += 1
+            self.running_resource[stage.resource] += 1
+            if stage.step not in self.steps_started:
+                self.steps_started.add(stage.step)
+                task_tracker.start_task(stage.step)
+            self.executor.submit(self._run, job, time.monotonic() - self.ready_since.pop(job)[0])
+
+    def _run(self, job, queue_wait):
+        target, stage, host = job
+        try:
+            reused, result = target.stored_result(stage, host)
+            interrupted = False
+            if not reused and deadlines.budget_expired():
+                # Out of run budget: the job is recorded as timed out instead of started
+                result, interrupted = None, True
+                target.mark_timed_out(stage.name, host, "budget")
+            elif not reused:
+                with telemetry.job(stage.name, host, queue_wait, target.domain) as job_record, \
+                        deadlines.job(target.stage_timeouts.get(stage.name), target, target.tool_timeouts) as deadline:
+                    if stage.scope == "host":
+                        inputs = {name: target.results[name].get(host) for name in stage.inputs}
+                        result = stage.run(target, host, inputs)
+                    else:
+                        result = stage.run(target)
+                if deadline["timed_out"]:
+                    target.mark_timed_out(stage.name, host, deadline["timed_out"])
+                interrupted = job_record["signalled"] > 0 or self.cancelled or target.cancelled or deadline["timed_out"] is not None
+            # Failed and interrupted jobs are not checkpointed so a resumed run retries them
+            if target.checkpoint and not interrupted:
+                target.checkpoint.record(stage.name, host, result)
+        except Exception as e:
+            print(f"Error in {stage.name}{f' for {host}' if host else ''}: {str(e)}")
+            result = None
+        
+        with self.condition:
+            target.results[stage.name][host] = result
+            self.running_stage[stage.name] -= 1
+            self.running_resource[stage.resource] -= 1
+            self.outstanding -= 1
+            target.outstanding -= 1
+            self.step_pending[stage.step] -= 1
+            task_tracker.add_progress(stage.step, done=1)
             
-            # Set up completion callback for each task
-            def make_callback(task_name, task_step):
-                def callback(future):
-                    try:
-                        results[task_name] = future.result()
-                        task_tracker.complete_task(task_step)
-                    except Exception as e:
-                        print(f"Error in {task_name}: {str(e)}")
-                        results[task_name] = None
-                        task_tracker.complete_task(task_step)
-                return callback
+            blocked = self.blocked.pop((id(target), host), [])
+            for blocked_job in blocked:
+                if self._inputs_ready(*blocked_job):
+                    self._make_ready(blocked_job)
+                else:
+                    self.blocked.setdefault((id(target), host), []).append(blocked_job)
             
-            futures[name].add_done_callback(make_callback(name, scan_functions[name][0]))
-        
-        # Wait for all futures to complete
-        concurrent.futures.wait(futures.values())
+            if not target.outstanding and target.hosts_closed and id(target) in self.ready:
+                # A finished target leaves the rotation
+                self.rotation.remove(target)
+                del self.ready[id(target)]
+            self._update_steps()
+            self._dispatch()
+            self.condition.notify_all()
+
+    def _update_steps(self):
+        if self.accepting_targets or not all(target.hosts_closed for target in self.targets):
+            return
+        for step, pending in self.step_pending.items():
+            if pending == 0 and step not in self.steps_completed:
+                self.steps_completed.add(step)
+                task_tracker.complete_task(step)
+
+def fingerprint_stage(target, host, inputs):
+    """Addresses plus an HTTP/HTTPS probe, hashed so the next incremental run can tell whether host changed"""
+    ips = dns_resolver.resolve(host)
+    http, response = http_prober.probe(host, target.gateway)
+    if http is None:
+        # The gateway failing is not the host failing, so the host is scanned as if it had not been probed
+        return None
+    cluster = hashlib.sha1(json.dumps([ips, dns_client.cname_chain(host)[-1:], response]).encode()).hexdigest() if response else None
+    return {"ips": ips, "http": http, "fingerprint": hashlib.sha1(json.dumps([ips, http]).encode()).hexdigest(), "cluster": cluster}
+
+def dns_stage(target, host, inputs):
+    return dns_client.records(host)
+
+def is_live(target, host):
+    # Hosts whose probe failed outright are still scanned; only a probe with no answer on either scheme rules a host out
+    probe = target.results["fingerprint"].get(host)
+    return probe is None or any(probe["http"].values())
+
+def gospider_stage(target, host, inputs):
+    if not is_live(target, host) or (host != target.domain and "www." in host) or target.cluster_representative(host):
+        return None
+    with rate_governor.lease(host) as rate:
+        file_path = run_gospider_for_host(host, target.gospider_output_folder, target.proxy_config, rate)
+    if not os.path.isfile(file_path):
+        return {"js_urls": [], "endpoints": []}
+    js_urls, endpoints, statuses = process_gospider_output(file_path, target.deduper)
+    rate_governor.report(host, statuses)
+    return {"js_urls": js_urls, "endpoints": endpoints}
+
+def jsluice_stage(target, host, inputs):
+    crawl = inputs.get("gospider")
+    if crawl and crawl["js_urls"]:
+        return run_jsluice_analysis(crawl["js_urls"], target.jsluice_folder, target.js_cache, target.gateway)
+    return {}
+
+def ffuf_wanted(target, host):
+    return target.run_ffuf and is_live(target, host) and not (host != target.domain and host.startswith("www.")) and not target.cluster_representative(host)
+
+def catch_all_verdict(signatures, match_codes):
+    """Decide how ffuf treats a host from its random-path signatures: ("scan", []) when unknown paths are not matched,
+    ("filter", ffuf args) when they all match with a stable word or line count, ("skip", []) when they match but vary"""
+    if len(signatures) < 2 or len({signature[0] for signature in signatures}) > 1 or not {str(signatures[0][0]), "all"} & set(match_codes):
+        return "scan", []
+    for flag, column in (("-fw", 2), ("-fl", 3)):
+        if len({signature[column] for signature in signatures}) == 1:
+            return "filter", [flag, str(signatures[0][column])]
+    return "skip", []
+
+def calibrate_stage(target, host, inputs):
+    """Random-path baseline of the hosts ffuf will brute-force, reused from the store while the host's fingerprint holds"""
+    if not ffuf_wanted(target, host):
+        return None
+    fingerprint = (target.results["fingerprint"].get(host) or {}).get("fingerprint")
+    signatures = target.store.baseline(host, fingerprint) if target.store and fingerprint else None
+    if signatures is None:
+        signatures = http_prober.path_signatures(host, gateway=target.gateway)
+        # A baseline missing probes is only good for this run
+        if target.store and fingerprint and len(signatures) == CALIBRATION_PROBES:
+            target.store.save_baseline(host, fingerprint, signatures)
+    return signatures
+
+def ffuf_stage(target, host, inputs):
+    if not ffuf_wanted(target, host):
+        return None
+    match_codes = [code for code in ffuf_matcher_status(target.config_file).split(",") if code != "429"]
+    verdict, filters = catch_all_verdict(inputs.get("calibrate") or [], match_codes)
+    if verdict == "skip":
+        # A catch-all whose responses vary cannot be filtered; the wordlist budget goes to hosts that route paths
+        ffuf_results_file = os.path.join(target.ffuf_dir, f"{host}_ffuf.md")
+        with open(ffuf_results_file, "w") as file:
+            file.write(f"Skipped: every path answers {inputs['calibrate'][0][0]} with varying content (catch-all host)\n")
+        return ffuf_results_file, []
+    with rate_governor.lease(host) as share:
+        rates = [rate for rate in (ffuf_worker_rate(target.ffuf_rate, target.stage_workers["ffuf"]), max(1, int(share)) if share else 0) if rate]
+        output_file, urls, statuses = run_ffuf_for_url(f"https://{host}", target.ffuf_dir, target.config_file, target.proxy_config,
+                                                       min(rates, default=0), filters)
+    rate_governor.report(host, statuses)
+    return output_file, urls
+
+def wafw00f_stage(target, host, inputs):
+    if not is_live(target, host):
+        return None
+    ips = (target.results["fingerprint"].get(host) or {}).get("ips") or dns_resolver.resolve(host)
+    return waf_verdicts.detect(host, ips)
+
+def corsy_stage(target, host, inputs):
+    if not is_live(target, host):
+        return None
+    url = f"https://{host}"
+    fingerprint = (target.results["fingerprint"].get(host) or {}).get("fingerprint")
+    cached, result = target.endpoint_result("corsy", url, fingerprint)
+    if not cached:
+        with rate_governor.lease(host) as rate:
+            result = run_corsy([url], work_path(f"corsy_{host}_input.txt"), work_path(f"corsy_{host}_output.json"), rate)
+        target.save_endpoint_result("corsy", url, fingerprint, result)
+    target.merge_findings("corsy", result)
+    return result
+
+def arjun_stage(target, host, inputs):
+    """Mine parameters on API-looking hosts and on the API endpoints Gospider and FFUF turned up"""
+    if not is_live(target, host) or (host != target.domain and host.startswith("www.")) or target.cluster_representative(host):
+        return None
+    url = f"https://{host}"
+    candidates = [url] if is_api_endpoint(url) else []
+    crawl = inputs.get("gospider")
+    if crawl:
+        candidates.extend(crawl["endpoints"])
+    ffuf = inputs.get("ffuf")
+    if ffuf:
+        candidates.extend(found for found in ffuf[1] if is_api_endpoint(found.split("://", 1)[-1].partition("/")[2]))
+    
+    results = {}
+    pending = []
+    candidates = list(dict.fromkeys(candidates))[:ARJUN_MAX_URLS_PER_HOST]
+    # Only -incremental runs pay a request per endpoint to see whether it changed, and those go out together
+    fingerprints = http_prober.url_fingerprints(candidates, target.gateway) if target.incremental else {}
+    for candidate in candidates:
+        fingerprint = fingerprints.get(candidate)
+        cached, result = target.endpoint_result("arjun", candidate, fingerprint)
+        if cached:
+            results[candidate] = result
+        else:
+            pending.append((candidate, fingerprint))
+    
+    # A few endpoints are mined at once, each process holding its own share of the host's rate
+    for i in range(0, len(pending), ARJUN_URL_WORKERS):
+        batch = pending[i:i + ARJUN_URL_WORKERS]
+        with rate_governor.lease(host, len(batch)) as rate:
+            running = [start_arjun_for_url(candidate, target.arjun_dir, rate) for candidate, _ in batch]
+            for (candidate, fingerprint), (process, output_file) in zip(batch, running):
+                finish_process(process, (output_file,))
+                results[candidate] = read_arjun_output(candidate, output_file)
+                target.save_endpoint_result("arjun", candidate, fingerprint, results[candidate])
+    
+    results = {candidate: result for candidate, result in results.items() if result}  # Only URLs with actual findings
+    target.merge_findings("arjun", results)
+    return results
+
+def cloudbrute_stage(target):
+    return run_cloudbrute_scan(target.domain, VAULT_FOLDER)
+
+def dnsreaper_stage(target):
+    return run_dnsreaper_scan(target.subdomains_file)
+
+def build_scan_stages():
+    # Every HTTP tool waits for the probe: dead hosts are skipped and incremental runs compare its fingerprint
+    gate = ("fingerprint",)
+    # Light stages come first so each host clears them quickly and frees slots for the heavy ones
+    return [
+        Stage("dns", None, dns_stage, concurrency=DNS_RECORD_WORKERS, resource="probe"),
+        Stage("fingerprint", None, fingerprint_stage, concurrency=HTTP_PROBE_WORKERS, resource="probe"),
+        Stage("wafw00f", 3, wafw00f_stage, inputs=gate, concurrency=WAFW00F_WORKERS),
+        Stage("corsy", 7, corsy_stage, inputs=gate, concurrency=CORSY_WORKERS),
+        Stage("gospider", 1, gospider_stage, inputs=gate, concurrency=GOSPIDER_WORKERS),
+        Stage("calibrate", None, calibrate_stage, inputs=gate, concurrency=HTTP_PROBE_WORKERS, resource="probe"),
+        Stage("ffuf", 5, ffuf_stage, inputs=gate + ("calibrate",), concurrency=FFUF_WORKERS),
+        Stage("jsluice", 1, jsluice_stage, inputs=("gospider",), concurrency=JSLUICE_HOSTS, resource="probe"),
+        Stage("arjun", 6, arjun_stage, inputs=("gospider", "ffuf") + gate, concurrency=ARJUN_WORKERS),
+        Stage("cloudbrute", 4, cloudbrute_stage, scope="target"),
+        Stage("dnsreaper", 2, dnsreaper_stage, scope="target", after_all_hosts=True),
+    ]
+
+def collect_scan_results(target):
+    """Merge the per-host stage results into the tuple the vault writer expects"""
+    results = target.results
+    hosts = list(target.scan_data.hostnames())
+    # Probe answers fill the HTTP/HTTPS/Server columns of the subdomain table
+    for host in hosts:
+        probe = results["fingerprint"].get(host)
+        target.scan_data.attach(host, dns=results["dns"].get(host), cluster=target.cluster_members.get(host),
+                                **(probe["http"] if probe else {}))
+    target.scan_data.wildcards = wildcard_filter.summary(target.domain)
+    write_cluster_member_notes(target)
+    # Target-wide stages that ran out of time are listed under the apex
+    for host, stages in target.timeouts.items():
+        target.scan_data.attach(host or target.domain, timeouts=stages)
+    
+    waf_data = [entry for host in hosts for entry in (results["wafw00f"].get(host) or [])]
+    root_waf, different_wafs = summarize_wafw00f(target.domain, waf_data)
+    
+    ffuf_output_files = [ffuf[0] for ffuf in results["ffuf"].values() if ffuf and ffuf[0]]
+    
+    arjun_results = {}
+    for host in hosts:
+        arjun_results.update(results["arjun"].get(host) or {})
+    
+    corsy_results = {}
+    for host in hosts:
+        corsy_results.update(results["corsy"].get(host) or {})
+    # Results restored from a checkpoint or the store never went through the stages, so the files are completed here
+    target.merge_findings("arjun", arjun_results)
+    target.merge_findings("corsy", corsy_results)
     
-    # Return results in the expected order
     return (
-        results.get('gospider'),
-        results.get('dnsreaper'),
-        *results.get('wafw00f', (None, None)),
-        results['cloudbrute'],
-        results['ffuf'],
-        results['arjun'],
-        results['corsy']
+        None,
+        results["dnsreaper"].get(None),
+        root_waf,
+        different_wafs,
+        results["cloudbrute"].get(None),
+        ffuf_output_files,
+        arjun_results,
+        corsy_results or None
     )
 
-def run_gospider_and_jsluice(domain, vault_folder, scan_data, use_proxy=False):
-    gospider_output_folder = os.path.join(vault_folder, domain, "Gospider")
-    jsluice_folder = os.path.join(vault_folder, domain, "JSluice")
-    shutil.rmtree(gospider_output_folder, ignore_errors=True)
-    os.makedirs(jsluice_folder, exist_ok=True)
-    
-    urls_to_scan = [domain] + [item["domain"] for item in scan_data[1:] if item["domain"] != domain and "www." not in item["domain"]]
-    for url in urls_to_scan:
-        command = ["gospider", "-s", f"https://{url}/", "-o", gospider_output_folder]
-        if use_proxy:
-            command = ["proxychains"] + command
-        run_command(command)
-    
-    prefix_order = ["[url]", "[javascript]", "[linkfinder]", "[href]"]
-    js_files_found = False
-    
-    for file_path in glob.glob(os.path.join(gospider_output_folder, "*")):
-        if os.path.isfile(file_path):
-            with open(file_path, "r") as file:
-                lines = sorted(file.readlines(), key=lambda line: next((i for i, prefix in enumerate(prefix_order) if line.startswith(prefix)), len(prefix_order)))
-            
-            new_file_path = f"{file_path}.md"
-            with open(new_file_path, "w") as file:
-                file.writelines(lines)
-            os.remove(file_path)
-            
-            if os.path.getsize(new_file_path) == 0:
-                os.remove(new_file_path)
-            
-            for line in lines:
-                if line.startswith("[javascript] - "):
-                    js_url = line.strip().split(" - ")[1]
-                    if not js_files_found:
-                        js_files_found = True
-                    jsluice_output = subprocess.run(["jsluice", "secrets", js_url], capture_output=True, text=True).stdout
-                    if jsluice_output.strip():
-                        js_file_name = js_url.split("/")[-1]
-                        jsluice_findings_file = os.path.join(jsluice_folder, f"{js_file_name}_findings.md")
-                        with open(jsluice_findings_file, "w") as f:
-                            f.write(jsluice_output)
+def write_cluster_member_notes(target):
+    """Give every cluster member Gospider and FFUF notes that embed its representative's, and an Arjun note with the
+    representative's parameters, so a member's results are found under its own name in the vault"""
+    for member, representative in target.cluster_members.items():
+        header = f"Not scanned separately: same addresses, CNAME target and response as {representative}\n\n"
+        for rep_note, member_note in ((f"{gospider_output_path(target.gospider_output_folder, representative)}.md",
+                                       f"{gospider_output_path(target.gospider_output_folder, member)}.md"),
+                                      (os.path.join(target.ffuf_dir, f"{representative}_ffuf.md"),
+                                       os.path.join(target.ffuf_dir, f"{member}_ffuf.md"))):
+            if os.path.isfile(rep_note):
+                with open(member_note, "w") as f:
+                    f.write(f"{header}![[{os.path.splitext(os.path.basename(rep_note))[0]}]]\n")
+        # Reused Arjun results have no output file of their own, so the findings are copied
+        arjun = target.results["arjun"].get(representative)
+        if arjun:
+            with open(os.path.join(target.arjun_dir, f"arjun_{member}.md"), "w") as f:
+                f.write(header)
+                for url, found in arjun.items():
+                    params = found.get("params", []) if isinstance(found, dict) else found
+                    f.write(f"- {url}: {', '.join(map(str, params)) if isinstance(params, list) else params}\n")
 
-def run_dnsreaper_scan(subdomains_file):
-    subprocess.run(["dnsreaper", "file", "--filename", subdomains_file, "--out", DNSREAPER_OUTPUT, "--out-format", "json"], 
-                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-    with open(DNSREAPER_OUTPUT, "r") as file:
-        result = json.loads(file.read().strip() or "[]")
+def normalize_result(tool, result):
+    """Turn a stage result into the JSON-ready form checkpoints and the store keep"""
+    if tool == "ffuf":
+        return {"urls": result[1]} if result else None
     return result
 
-def run_ffuf_scan(domain, scan_data, config_file, use_proxy=False):
-    ffuf_dir = os.path.join(VAULT_FOLDER, domain, "FFUF")
-    os.makedirs(ffuf_dir, exist_ok=True)
-    if not os.path.exists(config_file):
-        print(f"Error: {config_file} file not found.")
-        return []
+def restore_result(tool, data):
+    """Turn a stored result back into what the stage itself returns"""
+    if tool == "ffuf":
+        return (None, data["urls"]) if data else None
+    return data
+
+def normalize_results(target):
+    """Per-tool, per-host JSON-ready results of a finished target, in the form the store keeps them"""
+    normalized = {}
+    for tool, by_host in target.results.items():
+        if tool == "fingerprint":
+            continue
+        stored = normalized.setdefault(tool, {})
+        for host, result in by_host.items():
+            if tool in target.timeouts.get(host, ()):
+                # Partial results are not stored, so the next -incremental run scans the host again
+                continue
+            if tool == "dnsreaper":
+                # Target-wide report, split into one row per host so fixed takeovers are recorded too
+                stored.update(dict.fromkeys(target.scan_data.hostnames()))
+                for item in result or []:
+                    stored[item.get("domain")] = item
+            else:
+                stored[host] = normalize_result(tool, result)
+    return normalized
+
+def stored_findings(tool, data):
+    """Flatten one stored result into comparable lines for the changes note"""
+    if not data:
+        return set()
+    if tool == "ffuf":
+        return set(data["urls"])
+    if tool == "gospider":
+        return set(data["endpoints"]) | set(data["js_urls"])
+    if tool == "jsluice":
+        return {f"{url}: {record.get('kind', 'secret')}" for url, records in data.items() for record in records}
+    if tool == "arjun":
+        return {f"{url}: {', '.join(found.get('params', [])) if isinstance(found, dict) else found}" for url, found in data.items()}
+    if tool == "corsy":
+        return {f"{host}: {found.get('class') if isinstance(found, dict) else found}" for host, found in data.items()}
+    if tool == "wafw00f":
+        return {f"{entry['url']}: {entry['firewall'] if entry['detected'] else 'No WAF detected'}" for entry in data}
+    if tool == "dnsreaper":
+        return {data.get("domain", "")}
+    if tool == "cloudbrute":
+        return {line.strip() for line in data if line.strip()}
+    return {json.dumps(data, sort_keys=True)}
+
+def scan_changes(target, hosts, results):
+    """Compare this run with what the store held before it"""
+    previous_hosts = target.previous_hosts
+    last_run_id = target.previous_run["id"]
+    changes = {
+        "new_hosts": [host for host, _, _, _ in hosts if host not in previous_hosts],
+        "removed_hosts": sorted(host for host, previous in previous_hosts.items() if previous["run_id"] == last_run_id and host not in target.scan_data),
+        "changed_hosts": [],
+        "findings": {},
+    }
+    for host, ips, http, fingerprint in hosts:
+        previous = previous_hosts.get(host)
+        if previous and fingerprint and previous["fingerprint"] != fingerprint:
+            changes["changed_hosts"].append((host, previous["ips"], previous["http"], ips, http))
+    for tool, by_host in results.items():
+        stored = target.previous_results.get(tool, {})
+        added, removed = set(), set()
+        for host in by_host:
+            current = stored_findings(tool, by_host.get(host))
+            before = stored_findings(tool, stored.get(host))
+            added |= current - before
+            removed |= before - current
+        if added or removed:
+            changes["findings"][tool] = (sorted(added), sorted(removed))
+    return changes
+
+def describe_http(http):
+    if isinstance(http, list):
+        # Rows stored before the prober recorded both schemes
+        return " ".join(str(part) for part in http if part)
+    if not http or not any(http.values()):
+        return "no response"
+    parts = []
+    for scheme in ("https", "http"):
+        if http.get(scheme):
+            status, title, server, redirect, _ = http[scheme]
+            parts.append(" ".join(part for part in (scheme, str(status), server, f'"{title}"' if title else "", f"-> {redirect}" if redirect else "") if part))
+    return ", ".join(parts)
+
+def write_changes_note(domain_folder, domain, previous_run, changes):
+    changes_note_path = os.path.join(domain_folder, "changes.md")
+    with open(changes_note_path, "w") as file:
+        file.write(f"# <span class=\"custom-title\">{domain} changes</span>\n")
+        file.write(f"Since the run of {datetime.fromtimestamp(previous_run['started']).strftime('%Y-%m-%d %H:%M')}\n")
+        file.write("---\n")
+        
+        for title, hosts in (("New hosts", changes["new_hosts"]), ("Removed hosts", changes["removed_hosts"])):
+            file.write(f"> [!note]+ {title} ({len(hosts)})\n")
+            for host in hosts:
+                file.write(f"> - {host}\n")
+            file.write("\n")
+        
+        file.write(f"> [!note]+ Changed hosts ({len(changes['changed_hosts'])})\n")
+        for host, old_ips, old_http, new_ips, new_http in changes["changed_hosts"]:
+            file.write(f"> - {host}\n")
+            if old_ips != new_ips:
+                file.write(f">   - IP: {', '.join(old_ips) or 'N/A'} → {', '.join(new_ips) or 'N/A'}\n")
+            if old_http != new_http:
+                file.write(f">   - HTTP: {describe_http(old_http)} → {describe_http(new_http)}\n")
+        file.write("\n")
+        
+        for tool, (added, removed) in sorted(changes["findings"].items()):
+            file.write(f"> [!note]+ {tool} (+{len(added)} / -{len(removed)})\n")
+            for line in added:
+                file.write(f"> + {line}\n")
+            for line in removed:
+                file.write(f"> - {line}\n")
+            file.write("\n")
+    return changes_note_path
+
+def record_scan(target):
+    """Store the finished target and note what changed since the previous run"""
+    hosts = []
+    for record in target.scan_data:
+        fingerprint = target.results["fingerprint"].get(record.domain) or {}
+        # Subdomains keep the addresses they were resolved to; only the apex and unprobed hosts may need a lookup
+        ips = fingerprint.get("ips") or record.ip or dns_resolver.resolve(record.domain)
+        hosts.append((record.domain, ips, fingerprint.get("http"), fingerprint.get("fingerprint")))
+    results = normalize_results(target)
+    if target.previous_run:
+        write_changes_note(os.path.join(VAULT_FOLDER, target.domain), target.domain, target.previous_run, scan_changes(target, hosts, results))
+    # A -targets batch starts its targets one after another, not all when the process started
+    started = telemetry.target_started.get(target.domain, telemetry.started)
+    target.store.record_run(target.domain, started, target.incremental, hosts, results)
+
+def start_scans(target, scheduler=None):
+    """Register target with a shared scheduler, or with a private one when none is given"""
+    if scheduler is None:
+        scheduler = DAGScheduler(build_scan_stages())
+        scheduler.owner = target
+    scheduler.add_target(target)
+    return scheduler
+
+def abandon_scans(scheduler, target):
+    """Stop target's scans after a failure: its own scheduler is cancelled outright, a shared one only drops target"""
+    if getattr(scheduler, "owner", None) is target:
+        scheduler.cancel()
+    else:
+        scheduler.cancel_target(target)
+
+def finish_scans(scheduler, target):
+    try:
+        scheduler.close_hosts(target)
+        scheduler.wait(target)
+    except BaseException:
+        abandon_scans(scheduler, target)
+        raise
+    if getattr(scheduler, "owner", None) is target:
+        scheduler.shutdown()
+    scan_results = collect_scan_results(target)
+    if target.store:
+        record_scan(target)
+    return scan_results
+
+def run_scans(domain, subdomains_file, scan_data, config_file, proxy_config=None, store=None, incremental=False, checkpoint=None, scheduler=None,
+              cluster_hosts=CLUSTER_HOSTS, cluster_sample=CLUSTER_SAMPLE, ffuf_workers=FFUF_WORKERS, ffuf_rate=FFUF_RATE,
+              gospider_workers=GOSPIDER_WORKERS):
+    target = ReconTarget(domain, scan_data, config_file, proxy_config, store, incremental, checkpoint, cluster_hosts, cluster_sample,
+                         ffuf_workers, ffuf_rate, gospider_workers)
+    target.subdomains_file = subdomains_file
+    scheduler = start_scans(target, scheduler)
+    for host in scan_data.hostnames():
+        scheduler.add_host(target, host)
+    return finish_scans(scheduler, target)
+
+def run_streaming_scans(domain, scan_data, config_file, proxy_config=None, store=None, incremental=False, checkpoint=None, scheduler=None,
+                        cluster_hosts=CLUSTER_HOSTS, cluster_sample=CLUSTER_SAMPLE, ffuf_workers=FFUF_WORKERS, ffuf_rate=FFUF_RATE,
+                        gospider_workers=GOSPIDER_WORKERS):
+    """Run BBOT and feed each live subdomain into the scheduler as soon as it resolves"""
+    scan_lock = threading.Lock()
+    known = set(checkpoint.subdomains() or []) if checkpoint else set()
+    queued = set()
     
-    def run_ffuf_for_url(url):
-        subdomain_or_root = url.replace("https://", "").split("/")[0]
-        ffuf_output_file = os.path.join(ffuf_dir, f"ffuf_{subdomain_or_root}.json")
-        ffuf_command = f"ffuf -config {config_file} -u '{url}/FUZZ' -o {ffuf_output_file} -of json -s"
-        if use_proxy:
-            ffuf_command = f"proxychains {ffuf_command}"
-        try:
-            # Run FFUF and wait for completion
-            process = subprocess.Popen(ffuf_command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            process.wait()  # Wait for the process to complete
+    target = ReconTarget(domain, scan_data, config_file, proxy_config, store, incremental, checkpoint, cluster_hosts, cluster_sample,
+                         ffuf_workers, ffuf_rate, gospider_workers)
+    scheduler = start_scans(target, scheduler)
+    scheduler.add_host(target, domain)
+    
+    def on_resolved(subdomain, future):
+        addresses = future.result()
+        if not addresses or not wildcard_filter.prune(domain, [subdomain], {subdomain: addresses}):
+            return
+        with scan_lock:
+            # BBOT reports the apex too, which is queued already
+            if subdomain in scan_data:
+                return
+            scan_data.add(subdomain, addresses)
+            if checkpoint and subdomain not in known:
+                checkpoint.add_subdomain(subdomain)
+        scheduler.add_host(target, subdomain)
+    
+    # Resolve off the reader thread so BBOT's stdout pipe never backs up
+    task_tracker.start_task(0)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=dns_resolver.concurrency) as resolver_pool:
+            def submit(subdomain):
+                if subdomain not in queued:
+                    queued.add(subdomain)
+                    future = resolver_pool.submit(dns_resolver.resolve, subdomain)
+                    future.add_done_callback(lambda f: on_resolved(subdomain, f))
             
-            if process.returncode == 0 and os.path.exists(ffuf_output_file):
-                with open(ffuf_output_file, "r") as file:
-                    ffuf_data = json.load(file)
-                ffuf_results_file = os.path.join(ffuf_dir, f"{subdomain_or_root}_ffuf.md")
-                with open(ffuf_results_file, "w") as file:
-                    for result in ffuf_data.get("results", []):
-                        file.write(f"{result.get('status', 'N/A')} - {result.get('url', 'N/A')}\n")
-                    file.write("\n")
-                return ffuf_output_file
-        except Exception as e:
-            print(f"Error during FFUF scan for {url}: {e}")
-        return None
+            # Hosts found before an interruption go straight back in; BBOT reruns unless it had finished
+            for subdomain in sorted(known):
+                submit(subdomain)
+            if not (checkpoint and checkpoint.state.get("bbot_complete")):
+                with bbot_slots:
+                    if scheduler.cancelled:
+                        raise KeyboardInterrupt
+                    for subdomain in stream_bbot_subdomains(domain):
+                        submit(subdomain)
+                if checkpoint:
+                    checkpoint.update(bbot_complete=True)
+    except BaseException:
+        abandon_scans(scheduler, target)
+        raise
+    task_tracker.advance(0)
+    
+    subdomains_file = os.path.join(bbot_output_dir(domain), "secos", "subdomains.txt")
+    os.makedirs(os.path.dirname(subdomains_file), exist_ok=True)
+    with open(subdomains_file, 'w') as outfile:
+        outfile.write('\n'.join(record.domain for record in scan_data.subdomains()))
+    target.subdomains_file = subdomains_file
+    
+    return subdomains_file, finish_scans(scheduler, target)
 
-    urls_to_scan = [f"https://{domain}"] + [f"https://{item['domain']}" for item in scan_data[1:] if not item['domain'].startswith("www.")]
-    ffuf_output_files = []
+GOSPIDER_PREFIX_ORDER = ["[url]", "[javascript]", "[linkfinder]", "[href]"]
+GOSPIDER_PREFIX_INDEX = {prefix: i for i, prefix in enumerate(GOSPIDER_PREFIX_ORDER)}
+
+class URLDeduper:
+    """Thread-safe record of crawl lines already written for any host, kept as 64-bit digests"""
+    def __init__(self):
+        self.seen = set()
+        self.lock = threading.Lock()
+
+    def add(self, key):
+        """Return True the first time key is seen"""
+        digest = int.from_bytes(hashlib.blake2b(key.encode(errors="replace"), digest_size=8).digest(), "big")
+        with self.lock:
+            if digest in self.seen:
+                return False
+            self.seen.add(digest)
+            return True
+
+def gospider_output_path(gospider_output_folder, url):
+    # Gospider names its per-site output file after the hostname with dots replaced
+    return os.path.join(gospider_output_folder, url.replace(".", "_"))
+
+def run_gospider_for_host(url, gospider_output_folder, proxy_config=None, rate=0):
+    command = proxychains_prefix(proxy_config) + ["gospider", "-s", f"https://{url}/", "-o", gospider_output_folder] + gospider_rate_flags(rate)
+    run_command(command, output_files=(gospider_output_path(gospider_output_folder, url),))
+    return gospider_output_path(gospider_output_folder, url)
+
+def process_gospider_output(file_path, deduper=None):
+    """Group a crawl file by prefix in a single streaming pass, dropping lines already seen on any host"""
+    if deduper is None:
+        deduper = URLDeduper()
+    new_file_path = f"{file_path}.md"
+    js_urls = []
+    endpoints = []
+    statuses = collections.Counter()
     
-    # Run FFUF scans sequentially to ensure proper completion
-    for url in urls_to_scan:
-        output_file = run_ffuf_for_url(url)
-        if output_file:
-            ffuf_output_files.append(output_file)
+    # One spill file per prefix keeps memory flat regardless of the crawl size
+    buckets = [tempfile.TemporaryFile(mode="w+", dir=os.path.dirname(file_path)) for _ in range(len(GOSPIDER_PREFIX_ORDER) + 1)]
+    try:
+        with open(file_path, "r", errors="replace") as file:
+            for line in file:
+                line = line.rstrip("\n")
+                if line.startswith("[url] - [code-") and line[14:17].isdigit():
+                    statuses[int(line[14:17])] += 1
+                if not line.strip() or not deduper.add(line):
+                    continue
+                buckets[GOSPIDER_PREFIX_INDEX.get(line.split(" ", 1)[0], len(GOSPIDER_PREFIX_ORDER))].write(f"{line}\n")
+                if line.startswith("[javascript] - "):
+                    js_urls.append(line.strip().split(" - ")[1])
+                elif line.startswith("[url] - [code-2") and len(endpoints) < ARJUN_MAX_URLS_PER_HOST:
+                    endpoint = line.strip().split(" - ")[-1]
+                    if is_api_endpoint(endpoint.split("://", 1)[-1].partition("/")[2]):
+                        endpoints.append(endpoint)
+        
+        with open(new_file_path, "w") as file:
+            for bucket in buckets:
+                bucket.seek(0)
+                shutil.copyfileobj(bucket, file)
+    finally:
+        for bucket in buckets:
+            bucket.close()
+    os.remove(file_path)
     
-    return ffuf_output_files
+    if os.path.getsize(new_file_path) == 0:
+        os.remove(new_file_path)
+    
+    return js_urls, endpoints, statuses
+
+class JSCache:
+    """Downloads each unique JavaScript URL once, stores bodies by SHA-256 and runs jsluice once per body.
+    Bodies still to analyze are pooled across hosts and targets, so one jsluice run covers a full batch"""
+    def __init__(self, cache_folder=JS_CACHE_FOLDER, workers=JS_FETCH_WORKERS):
+        self.cache_folder = cache_folder
+        self.workers = workers
+        self.url_hashes = {}
+        self.findings = {}
+        self.lock = threading.Lock()
+        # Digests waiting for a batch in arrival order, and those in a running batch
+        self.queued = {}
+        self.queued_since = None
+        self.running = set()
+        self.processes = 0
+        self.batch_done = threading.Condition(self.lock)
+        
+        # One keep-alive connection pool shared by every fetch
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def body_path(self, digest):
+        return os.path.join(self.cache_folder, digest[:2], f"{digest}.js")
+
+    def _fetch(self, url, gateway=None):
+        tmp_path = None
+        try:
+            # Bundles on the target's own hosts count against its rate budget like any other request
+            rate_governor.acquire(url.split("://", 1)[-1].split("/", 1)[0])
+            request_url, auth = route_request(url, gateway)
+            with self.session.get(request_url, timeout=JS_FETCH_TIMEOUT, verify=False, stream=True, auth=auth) as response:
+                if response.status_code != 200:
+                    return None
+                sha256 = hashlib.sha256()
+                os.makedirs(self.cache_folder, exist_ok=True)
+                with tempfile.NamedTemporaryFile(dir=self.cache_folder, delete=False) as tmp:
+                    tmp_path = tmp.name
+                    size = 0
+                    for chunk in response.iter_content(chunk_size=65536):
+                        size += len(chunk)
+                        if size > JS_MAX_BYTES:
+                            break
+                        sha256.update(chunk)
+                        tmp.write(chunk)
+            if size > JS_MAX_BYTES or size == 0:
+                return None
+            digest = sha256.hexdigest()
+            body_path = self.body_path(digest)
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            if not os.path.exists(body_path):
+                os.replace(tmp_path, body_path)
+                tmp_path = None
+            return digest
+        except (requests.RequestException, urllib3.exceptions.HTTPError, OSError):
+            return None
+        finally:
+            # Oversized, duplicate and half-downloaded bodies never outlive the fetch
+            if tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+
+    def fetch_many(self, urls, gateway=None):
+        """Download the URLs not fetched yet and return {url: sha256 or None} for all of them"""
+        with self.lock:
+            pending = [url for url in dict.fromkeys(urls) if url not in self.url_hashes]
+        if pending:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+                digests = list(executor.map(lambda url: self._fetch(url, gateway), pending))
+            with self.lock:
+                self.url_hashes.update(zip(pending, digests))
+        with self.lock:
+            return {url: self.url_hashes.get(url) for url in urls}
+
+    def _run_jsluice(self, digests):
+        paths = {self.body_path(digest): digest for digest in digests}
+        findings = {digest: [] for digest in digests}
+        process = start_process(["jsluice", "secrets"] + list(paths), "jsluice", stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        output = process.stdout.read()
+        process.stdout.close()
+        returncode = finish_process(process, stdout_bytes=len(output.encode()))
+        if returncode != 0 or process.timed_out:
+            # A crashed or killed run says nothing about these bundles; they stay unanalyzed and are retried
+            return None
+        for line in output.splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            digest = paths.get(record.get("filename")) if isinstance(record, dict) else None
+            if digest is None and len(digests) == 1:
+                digest = digests[0]
+            if digest is not None:
+                findings[digest].append(record)
+        return findings
+
+    def _take_batch(self, wanted):
+        """Under the lock: the next batch for this caller to run, or None while it should keep waiting.
+        A caller only runs a batch while bodies of its own are queued, so a batch never waits for nobody.
+        Callers only wait here on probe slots; the jsluice runs take the governor's cpu class limit instead"""
+        if not any(digest in self.queued for digest in wanted) or self.processes >= load_governor.limits["cpu"]:
+            return None
+        if len(self.queued) < JSLUICE_BATCH_SIZE and time.monotonic() - self.queued_since < JSLUICE_BATCH_WAIT:
+            return None
+        batch = list(itertools.islice(self.queued, JSLUICE_BATCH_SIZE))
+        for digest in batch:
+            del self.queued[digest]
+        self.running.update(batch)
+        self.processes += 1
+        self.queued_since = time.monotonic() if self.queued else None
+        return batch
+
+    def analyze(self, digests):
+        """Run jsluice over each body not analyzed yet and return once they are done. Bodies join a shared queue that
+        the waiting callers run in batches of JSLUICE_BATCH_SIZE, or smaller once the oldest has waited JSLUICE_BATCH_WAIT"""
+        wanted = [digest for digest in dict.fromkeys(digests) if digest]
+        with self.lock:
+            pending = [digest for digest in wanted if digest not in self.findings and digest not in self.queued and digest not in self.running]
+        
+        # Findings persist next to the bodies so unchanged bundles are never re-analyzed
+        uncached = []
+        for digest in pending:
+            findings_path = f"{self.body_path(digest)}.jsluice.json"
+            try:
+                with open(findings_path, "r") as f:
+                    records = json.load(f)
+                with self.lock:
+                    self.findings[digest] = records
+            except (OSError, json.JSONDecodeError):
+                uncached.append(digest)
+        
+        with self.batch_done:
+            for digest in uncached:
+                if digest not in self.findings and digest not in self.queued and digest not in self.running:
+                    if not self.queued:
+                        self.queued_since = time.monotonic()
+                    self.queued[digest] = None
+        
+        while True:
+            with self.batch_done:
+                batch = self._take_batch(wanted)
+                while batch is None:
+                    if not any(digest in self.queued or digest in self.running for digest in wanted):
+                        return
+                    # With every process slot taken only a finished batch can change anything
+                    full = self.processes >= load_governor.limits["cpu"]
+                    timeout = JSLUICE_BATCH_WAIT - (time.monotonic() - self.queued_since) if self.queued and not full else None
+                    self.batch_done.wait(max(timeout, 0.01) if timeout is not None else None)
+                    batch = self._take_batch(wanted)
+            batch_findings = None
+            try:
+                # The process runs in this job's context, so its deadline and attribution cover the whole batch
+                batch_findings = self._run_jsluice(batch)
+                for digest, records in (batch_findings or {}).items():
+                    with open(f"{self.body_path(digest)}.jsluice.json", "w") as f:
+                        json.dump(records, f)
+            finally:
+                with self.batch_done:
+                    self.running.difference_update(batch)
+                    self.processes -= 1
+                    self.findings.update(batch_findings or {})
+                    self.batch_done.notify_all()
+
+js_cache = JSCache()
+
+def run_jsluice_analysis(js_urls, jsluice_folder, js_cache, gateway=None):
+    """Fetch, analyze and fan findings back out to every URL that served the same content; returns {url: records}"""
+    url_hashes = js_cache.fetch_many(js_urls, gateway)
+    js_cache.analyze(url_hashes.values())
+    findings = {}
+    for js_url, digest in url_hashes.items():
+        records = js_cache.findings.get(digest) if digest else None
+        if not records:
+            continue
+        findings[js_url] = records
+        js_file_name = js_url.split("/")[-1]
+        jsluice_findings_file = os.path.join(jsluice_folder, f"{js_file_name}_findings.md")
+        with open(jsluice_findings_file, "w") as f:
+            for record in records:
+                f.write(json.dumps(dict(record, filename=js_url)) + "\n")
+    return findings
+
+def run_dnsreaper_scan(subdomains_file):
+    command = ["dnsreaper", "file", "--filename", subdomains_file, "--out", "stdout", "--out-format", "json"]
+    stream = ToolStream(command)
+    result = list(stream)
+    if stream.returncode != 0:
+        raise subprocess.CalledProcessError(stream.returncode, command)
+    return result
+
+def ffuf_worker_rate(rate, workers):
+    """Split the global requests/second budget evenly across concurrent ffuf processes"""
+    return max(1, rate // workers) if rate else 0
+
+def ffuf_max_time(config_file):
+    """ffuf's own run time limit in seconds from the config's maxtime, 0 when it has none"""
+    try:
+        with open(config_file, "r") as f:
+            match = re.search(r'^\s*maxtime\s*=\s*(\d+)\s*$', f.read(), re.MULTILINE)
+    except OSError:
+        match = None
+    return int(match.group(1)) if match else 0
+
+def scan_timeouts(config_file):
+    """(tool, stage) deadlines for a target. Outside -budget runs nothing cuts ffuf shorter than its config allows"""
+    tool_timeouts = dict(TOOL_TIMEOUTS)
+    stage_timeouts = dict(STAGE_TIMEOUTS)
+    max_time = ffuf_max_time(config_file)
+    own = max_time + FFUF_MAXTIME_GRACE if max_time else 0
+    if deadlines.budget_deadline is None:
+        tool_timeouts["ffuf"] = stage_timeouts["ffuf"] = own
+    elif own:
+        # Under -budget the fixed limits still cut stragglers short, but never leave ffuf more time than it would take
+        tool_timeouts["ffuf"] = min(filter(None, (TOOL_TIMEOUTS.get("ffuf", TOOL_TIMEOUT), own)))
+        stage_timeouts["ffuf"] = min(filter(None, (STAGE_TIMEOUTS.get("ffuf"), own)))
+    return tool_timeouts, stage_timeouts
+
+def ffuf_matcher_status(config_file):
+    """Read the status matcher from an ffuf config so 429s can be matched alongside it"""
+    try:
+        with open(config_file, "r") as f:
+            match = re.search(r'\[matcher\][^\[]*?\bstatus\s*=\s*"([^"]*)"', f.read())
+    except OSError:
+        match = None
+    codes = [code.strip() for code in (match.group(1) if match else "200").split(",") if code.strip()]
+    return ",".join(dict.fromkeys(codes + ["429"]))
+
+def run_ffuf_for_url(url, ffuf_dir, config_file, proxy_config=None, rate=0, filters=()):
+    """Return (results note, matched URLs, status counts); the note is None when ffuf did not complete,
+    though the matches it streamed before failing are kept. filters are extra ffuf filter flags for catch-all hosts"""
+    subdomain_or_root = url.replace("https://", "").split("/")[0]
+    # 429s are matched too so throttling is visible to the rate governor; they are left out of the note
+    # Matches are read from stdout; the config's output file and debug log would be one file shared by every worker
+    ffuf_command = ["ffuf", "-config", config_file, "-u", f"{url}/FUZZ", "-json", "-s", "-mc", ffuf_matcher_status(config_file),
+                    "-o", os.devnull, "-debug-log", os.devnull]
+    if rate:
+        ffuf_command += ["-rate", str(rate)]
+    ffuf_command = proxychains_prefix(proxy_config) + ffuf_command + list(filters)
+    urls = []
+    statuses = collections.Counter()
+    ffuf_results_file = os.path.join(ffuf_dir, f"{subdomain_or_root}_ffuf.md")
+    try:
+        # Matches arrive as JSON lines and go into the note as they come; the exit code tells us whether the run completed
+        stream = ToolStream(ffuf_command)
+        with open(ffuf_results_file, "w", buffering=1) as file:
+            for result in stream:
+                statuses[result.get("status")] += 1
+                if result.get("status") == 429:
+                    continue
+                file.write(f"{result.get('status', 'N/A')} - {result.get('url', 'N/A')}\n")
+                if result.get("url"):
+                    urls.append(result["url"])
+            file.write("\n")
+        if stream.returncode == 0:
+            return ffuf_results_file, urls, statuses
+    except Exception as e:
+        print(f"Error during FFUF scan for {url}: {e}")
+    return None, urls, statuses
 
 def run_cloudbrute_scan(domain, vault_folder):
     keyword = domain.split('.')[0]
@@ -499,7 +3397,7 @@ def run_cloudbrute_scan(domain, vault_folder):
             "-C", CLOUDBRUTE_CONFIG,
             "-o", output_file
         ]
-        run_command(cloudbrute_command)
+        run_command(cloudbrute_command, output_files=(output_file,))
         
         # Only process if file has content
         if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
@@ -508,19 +3406,84 @@ def run_cloudbrute_scan(domain, vault_folder):
             unique_lines = list(dict.fromkeys(lines))
             with open(output_file, 'w') as f:
                 f.writelines(unique_lines)
-        return True
+            return unique_lines
+        return []
     except Exception as e:
         print(f"Error in cloudbrute: {str(e)}")
-        return False
+        return None
         
-def run_wafw00f_scan(domain, subdomains_file):
-    with open(subdomains_file, 'r') as f:
-        subdomains = [line.strip() for line in f]
-    all_domains = [domain] + subdomains
-    wafw00f_command = ["wafw00f"] + [f"https://{d}" for d in all_domains] + ["-a", "-o", WAFW00F_OUTPUT, "-f", "json"]
-    run_command(wafw00f_command)
-    with open(WAFW00F_OUTPUT, 'r') as f:
-        waf_data = json.load(f)
+def run_wafw00f(urls):
+    # "-o -" puts the JSON verdicts on stdout
+    return list(ToolStream(["wafw00f"] + urls + ["-a", "-o", "-", "-f", "json"]))
+
+class WafVerdicts:
+    """Runs wafw00f once per edge and hands its verdict to every other host behind that edge"""
+    def __init__(self, cache_path=WAF_CACHE_PATH, ttl=WAF_CACHE_TTL):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.verdicts = None
+        self.probing = {}
+        self.lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.cache_path) as f:
+                verdicts = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {edge: verdict for edge, verdict in verdicts.items() if now - verdict["checked"] < self.ttl}
+
+    def edge(self, host, ips):
+        """The CDN or load balancer host sits behind: its final CNAME target, else its addresses; None when unknown"""
+        chain = dns_client.cname_chain(host)
+        if chain:
+            return f"cname:{chain[-1]}"
+        return f"ip:{','.join(sorted(ips))}" if ips else None
+
+    def detect(self, host, ips):
+        """Return wafw00f's records for https://host, reusing the verdict of a host already checked behind the same edge"""
+        edge = self.edge(host, ips)
+        with self.lock:
+            if self.verdicts is None:
+                self.verdicts = self._load()
+            waiting = self.probing.get(edge) if edge and edge not in self.verdicts else None
+            probe = edge is None or (edge not in self.verdicts and waiting is None)
+            if probe and edge:
+                done = self.probing[edge] = threading.Event()
+        if waiting:
+            waiting.wait()
+        if not probe:
+            with self.lock:
+                verdict = self.verdicts.get(edge)
+            if verdict:
+                return [{"url": f"https://{host}", "detected": verdict["detected"], "firewall": verdict["firewall"],
+                         "manufacturer": verdict["manufacturer"]}]
+            # The host that probed this edge got no answer, so this one tries for itself
+            return self._run(host)
+        try:
+            records = self._run(host)
+            if records and edge:
+                record = records[0]
+                with self.lock:
+                    self.verdicts[edge] = {"detected": record["detected"], "firewall": record["firewall"],
+                                           "manufacturer": record["manufacturer"], "checked": time.time()}
+                    os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                    write_file_atomic(self.cache_path, json.dumps(self.verdicts))
+            return records
+        finally:
+            if edge:
+                with self.lock:
+                    del self.probing[edge]
+                done.set()
+
+    def _run(self, host):
+        rate_governor.acquire(host, WAFW00F_REQUEST_COST)
+        return run_wafw00f([f"https://{host}"])
+
+waf_verdicts = WafVerdicts()
+
+def summarize_wafw00f(domain, waf_data):
     root_waf = None
     different_wafs = {}
     processed_domains = set()
@@ -549,55 +3512,39 @@ def run_wafw00f_scan(domain, subdomains_file):
         }
     return root_waf, different_wafs
 
-def run_arjun_scan(domain, scan_data):
-    arjun_dir = os.path.join(VAULT_FOLDER, domain, "Arjun")
-    os.makedirs(arjun_dir, exist_ok=True)
-    
-    def is_api_endpoint(url):
-        return 'api' in url.lower() or any('api' in part.lower() for part in url.split('/'))
-    
-    urls_to_scan = [f"https://{domain}"] + [f"https://{item['domain']}" for item in scan_data[1:] if not item['domain'].startswith("www.")]
-    api_urls = [url for url in urls_to_scan if is_api_endpoint(url)]
-    
-    arjun_results = {}
-    for url in api_urls:
-        safe_filename = re.sub(r'[^\w\-_\. ]', '_', url.replace('https://', ''))
-        output_file = os.path.join(arjun_dir, f"arjun_{safe_filename}.json")
-        arjun_command = ["arjun", "-u", url, "-oJ", output_file]
-        
-        # Run Arjun and wait for completion
-        process = subprocess.Popen(arjun_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        process.wait()  # Wait for the process to complete
-        
-        try:
-            if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                with open(output_file, 'r') as f:
-                    result = json.load(f)
-                if result:  # Only add results if there are actual findings
-                    arjun_results[url] = result
-        except json.JSONDecodeError:
-            print(f"Invalid JSON in Arjun output file for {url}")
-    
-    if arjun_results:
-        with open(ARJUN_OUTPUT, 'w') as f:
-            json.dump(arjun_results, f, indent=2)
-    
-    return arjun_results
+def is_api_endpoint(url):
+    return 'api' in url.lower() or any('api' in part.lower() for part in url.split('/'))
 
-def run_corsy_scan(domain, subdomains):
-    corsy_input_file = f"corsy_{domain}_input.txt"
-    corsy_output_file = f"corsy_{domain}_output.json"
-    
+def start_arjun_for_url(url, arjun_dir, rate=0):
+    """Launch Arjun against url without waiting; returns (process, JSON output path)"""
+    safe_filename = re.sub(r'[^\w\-_\. ]', '_', url.replace('https://', ''))
+    output_file = os.path.join(arjun_dir, f"arjun_{safe_filename}.json")
+    arjun_command = ["arjun", "-u", url, "-oJ", output_file]
+    if rate:
+        arjun_command += ["--rate-limit", str(max(1, int(rate)))]
+    process = start_process(arjun_command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, text=True)
+    return process, output_file
+
+def read_arjun_output(url, output_file):
+    try:
+        if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+            with open(output_file, 'r') as f:
+                return json.load(f)
+    except json.JSONDecodeError:
+        print(f"Invalid JSON in Arjun output file for {url}")
+    return None
+
+def run_corsy(urls, corsy_input_file, corsy_output_file, rate=0):
     # Create input file with HTTPS URLs
     with open(corsy_input_file, 'w') as f:
-        f.write(f"https://{domain}\n")
-        for sub in subdomains:
-            f.write(f"https://{sub}\n")
+        for url in urls:
+            f.write(f"{url}\n")
     
     # Run Corsy and wait for completion
     corsy_command = ["corsy", "-i", corsy_input_file, "-o", corsy_output_file]
-    process = subprocess.Popen(corsy_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    process.wait()  # Wait for the process to complete
+    if rate:
+        corsy_command += ["-t", "1", "-d", f"{1 / rate:.2f}"]
+    run_process(corsy_command, output_files=(corsy_output_file,))
     
     # Read and return results
     if os.path.exists(corsy_output_file) and os.path.getsize(corsy_output_file) > 0:
@@ -651,18 +3598,57 @@ def create_overview_note(domain_folder, domain, txt_records, scan_data, dnsreape
         for record in txt_records:
             file.write(f"> {record}\n")
         file.write("\n")
+        
+        # The apex's other records
+        apex_records = {rtype: values for rtype, values in (scan_data.root.dns or {}).items() if values and rtype != "TXT"}
+        if apex_records:
+            file.write("> [!note]+ DNS Records\n")
+            for rtype, values in apex_records.items():
+                file.write(f"> {rtype} : {', '.join(values)}\n")
+            file.write("\n")
 
+        # Wildcard DNS zones and the subdomains dropped because they only resolved through them
+        wildcards = scan_data.wildcards
+        if wildcards:
+            file.write(f"> [!note]- Wildcard DNS ({len(wildcards['pruned'])} subdomains pruned)\n")
+            for zone, addresses in wildcards["zones"].items():
+                file.write(f"> *.{zone} : {', '.join(addresses)}\n")
+            if wildcards["pruned"]:
+                file.write(">\n")
+                file.write(f"> {', '.join(sorted(wildcards['pruned']))}\n")
+            file.write("\n")
+        
+        # Hosts whose tools were stopped by a deadline; their notes hold partial results
+        timed_out = [record for record in scan_data if record.timeouts]
+        if timed_out:
+            file.write(f"> [!warning]- Timed Out ({len(timed_out)} hosts)\n")
+            for record in timed_out:
+                stages = ", ".join(f"{stage} ({reason})" for stage, reason in sorted(record.timeouts.items()))
+                file.write(f"> {record.domain} : {stages}\n")
+            file.write("\n")
+        
+        # Hosts that were not scanned with Gospider/FFUF/Arjun because their cluster's representative was
+        clusters = {}
+        for record in scan_data.subdomains():
+            if record.cluster:
+                clusters.setdefault(record.cluster, []).append(record.domain)
+        if clusters:
+            file.write("> [!note]- Host Clusters (members' Gospider, FFUF and Arjun notes link to the first host's)\n")
+            for representative, members in clusters.items():
+                file.write(f"> {representative} : {', '.join(members)}\n")
+            file.write("\n")
+        
         # Subdomains table
         file.write('<h2 style="text-align:center;text-decoration:underline;">Subdomains</h2>\n\n')
         file.write("| Subdomain | IP | HTTP Status | HTTPS Status | Server |\n")
         file.write("|:-----------:|:----:|:-----------:|:------------:|:--------:|\n")
-        for item in scan_data[1:]:
-            if item["domain"] != domain and item["domain"] != www_subdomain:
-                subdomain = item["domain"]
-                ip = ", ".join(item.get("ip", ["N/A"]))
-                http_status = item.get('http', ['N/A'])[0]
-                https_status = item.get('https', ['N/A'])[0]
-                server = item.get('http', ['', '', 'N/A'])[2] or item.get('https', ['', '', 'N/A'])[2]
+        for record in scan_data.subdomains():
+            if record.domain != www_subdomain:
+                subdomain = record.domain
+                ip = ", ".join(record.ip if record.ip is not None else ["N/A"])
+                http_status = (record.http or ['N/A'])[0]
+                https_status = (record.https or ['N/A'])[0]
+                server = (record.http or ['', '', 'N/A'])[2] or (record.https or ['', '', 'N/A'])[2]
                 
                 file.write(f"| {subdomain} | {ip} | {http_status} | {https_status} | {server} |\n")
     return overview_note_path
@@ -673,74 +3659,192 @@ def save_to_obsidian(vault_folder, domain, txt_records, scan_data, dnsreaper_dat
     create_overview_note(domain_folder, domain, txt_records, scan_data, dnsreaper_data, root_waf, different_wafs, corsy_results)
     return domain_folder
 
-if __name__ == "__main__":
-    args = parse_arguments()
-    if args is None:
-        sys.exit(1)
-    
-    output_file = None
-    subdomains_file = None
-    ffuf_output_files = []
+def run_target(domain, args, scan_store, scheduler=None, run_id=None):
+    """Scan one target end to end and save its vault notes; returns the vault folder, or None when nothing was found.
+    With a shared scheduler the target's jobs are interleaved with the other targets of a -targets batch"""
     api_id = None
+    checkpoint = None
+    run_finished = False
+    domain_folder = None
     
     try:
-        domain = args.domain
-        run_full = args.full
-        use_aws = args.aws
-        
-        # Print the header
-        os.system('clear')        
-        print(f"{COLORS['BLUE']}secＯ•Ｓ -- RECON")
-        print(f"{COLORS['BLUE']}----------------------")
-        print()
-                
-        for i in range(len(BUILD_STEPS)):
-            task_tracker.add_task(i)
-            update_step_status(i, "idle")
+        telemetry.begin_target(domain)
+        checkpoint = RunCheckpoint(run_id or RunCheckpoint.new_run_id(domain))
+        if not checkpoint.resumed:
+            checkpoint.update(domain=domain, full=args.full, aws=args.aws, stream=args.stream, incremental=args.incremental, started=time.time())
+        config_file = FFUF_FULL_CONFIG if args.full else FFUF_DEFAULT_CONFIG
         
-        if use_aws:
-            proxy_url, api_id = configure_aws_and_fireprox(domain)
+        proxy_config = None
+        if args.aws:
+            proxy_url, api_id = reuse_fireprox_api(checkpoint.state.get("proxy_url"), checkpoint.state.get("api_id"))
             if proxy_url is None:
-                sys.exit(1)
+                proxy_url, api_id = configure_aws_and_fireprox(domain)
+            if proxy_url is None:
+                raise RuntimeError(f"Fireprox setup failed for {domain}")
+            checkpoint.update(proxy_url=proxy_url, api_id=api_id)
+            proxy_config = write_proxychains_config(proxy_url, work_path(f"proxychains_{domain}.conf"))
             print(f"\n{COLORS['GREEN']}AWS configured successfully")
             print(f"Fireprox proxy set up: {proxy_url}{COLORS['NC']}")
         
-        # Start BBOT scan
-        task_tracker.start_task(0)
-        subdomains_file = run_bbot_scan(domain)
-        task_tracker.complete_task(0)
-        
-        # Fetch TXT records without progress tracking
-        txt_records = fetch_txt_records(domain)
-        
-        if subdomains_file:
-            # Create scan_data structure
-            scan_data = [{"domain": domain, "txt_records": txt_records}]
-            with open(subdomains_file, 'r') as f:
-                for subdomain in f.readlines():
-                    scan_data.append({"domain": subdomain.strip(), "ip": []})
+        if args.stream:
+            # Fetch TXT records up front, then stream BBOT results straight into the scanners
+            txt_records = fetch_txt_records_once(domain, checkpoint)
+            scan_data = HostTable(domain, txt_records)
+            subdomains_file, scan_results = run_streaming_scans(domain, scan_data, config_file, proxy_config, scan_store, args.incremental, checkpoint, scheduler,
+                                                                 args.cluster_hosts, args.cluster_sample, args.ffuf_workers, args.ffuf_rate,
+                                                                 args.gospider_workers)
+        else:
+            subdomains = checkpoint.subdomains()
+            if subdomains is None:
+                # Start BBOT scan
+                with bbot_slots:
+                    if scheduler and scheduler.cancelled:
+                        raise KeyboardInterrupt
+                    task_tracker.start_task(0)
+                    subdomains_file, resolved = run_bbot_scan(domain)
+                checkpoint.save_subdomains(resolved)
+            else:
+                # BBOT had already finished before the interruption
+                subdomains_file = os.path.join(bbot_output_dir(domain), "secos", "subdomains.txt")
+                os.makedirs(os.path.dirname(subdomains_file), exist_ok=True)
+                with open(subdomains_file, 'w') as f:
+                    f.write('\n'.join(subdomains))
+                # Nothing is cached after a restart, so resolve them again in one bulk pass
+                resolved = dns_resolver.resolve_many(subdomains)
+            task_tracker.advance(0)
             
-            _, dnsreaper_data, root_waf, different_wafs, _, ffuf_output_files, arjun_results, corsy_results = run_parallel_scans(domain, subdomains_file, scan_data, use_aws)
+            # Fetch TXT records without progress tracking
+            txt_records = fetch_txt_records_once(domain, checkpoint)
+            
+            scan_results = None
+            if subdomains_file:
+                # Create the host table
+                scan_data = HostTable(domain, txt_records)
+                for subdomain, addresses in resolved.items():
+                    scan_data.add(subdomain, addresses)
+                
+                scan_results = run_scans(domain, subdomains_file, scan_data, config_file, proxy_config, scan_store, args.incremental, checkpoint, scheduler,
+                                         args.cluster_hosts, args.cluster_sample, args.ffuf_workers, args.ffuf_rate, args.gospider_workers)
+        
+        if scan_results:
+            _, dnsreaper_data, root_waf, different_wafs, _, ffuf_output_files, arjun_results, corsy_results = scan_results
             
             domain_folder = save_to_obsidian(VAULT_FOLDER, domain, txt_records, scan_data, dnsreaper_data, root_waf, different_wafs, corsy_results)
                         
             # Clear the AWS configuration and Fireprox setup messages
-            if use_aws:
+            if args.aws and scheduler is None:
                 print("\033[2A\033[J", end="")
             
             print(f"\n{COLORS['GREEN']}Results saved to {domain_folder}{COLORS['NC']}")
         else:
-            print(f"{COLORS['RED']}Error: No subdomains found or BBOT scan failed.{COLORS['NC']}")
+            print(f"{COLORS['RED']}Error: No subdomains found or BBOT scan failed for {domain}.{COLORS['NC']}")
+        run_finished = True
+        return domain_folder
+    
+    finally:
+        # An unfinished target keeps its gateway and checkpoint for -resume
+        if api_id and run_finished:
+            delete_fireprox_api(api_id)
+        elif api_id:
+            print(f"{COLORS['YELLOW']}Fireprox API Gateway (ID: {api_id}) kept for the resumed run{COLORS['NC']}")
+        
+        if checkpoint and run_finished:
+            checkpoint.remove()
+        elif checkpoint:
+            checkpoint.close()
+            print(f"{COLORS['YELLOW']}Resume with: recon -resume {checkpoint.run_id}{COLORS['NC']}")
+        
+        # Performance telemetry for the target, including interrupted runs
+        try:
+            telemetry_folder = os.path.join(VAULT_FOLDER, domain)
+            if os.path.isdir(telemetry_folder):
+                telemetry.write(telemetry_folder, domain)
+        except Exception as e:
+            print(f"{COLORS['RED']}Error writing telemetry for {domain}: {str(e)}{COLORS['NC']}")
+
+def run_targets(args, scan_store):
+    """-targets batch mode: a few target drivers feed one shared scheduler so the worker pool stays busy across targets"""
+    scheduler = DAGScheduler(build_scan_stages(), shared=True)
+    drivers = concurrent.futures.ThreadPoolExecutor(max_workers=args.target_workers)
+    
+    def drive(domain):
+        if scheduler.cancelled:
+            return None
+        try:
+            return run_target(domain, args, scan_store, scheduler)
+        except KeyboardInterrupt:
+            return None
+        except Exception as e:
+            print(f"{COLORS['RED']}Error scanning {domain}: {str(e)}{COLORS['NC']}")
+            return None
+    
+    try:
+        futures = [drivers.submit(drive, domain) for domain, _ in args.targets]
+        # Completion marks wait until every target has registered its jobs
+        concurrent.futures.wait(futures)
+        scheduler.close_targets()
+        finished = [future.result() for future in futures]
+        print(f"\n{COLORS['GREEN']}{sum(1 for folder in finished if folder)}/{len(args.targets)} targets saved to {VAULT_FOLDER}{COLORS['NC']}")
+    except BaseException:
+        scheduler.cancel()
+        drivers.shutdown(wait=True, cancel_futures=True)
+        raise
+    drivers.shutdown(wait=True)
+    scheduler.shutdown()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    if args is None:
+        sys.exit(1)
+    
+    scan_store = None
+    
+    try:
+        dns_resolver.configure(args.dns_concurrency)
+        dns_client.configure(args.resolvers, args.dns_timeout, args.dns_retries)
+        rate_governor.configure(args.target_rate)
+        deadlines.start_budget(args.budget)
+        load_governor.configure(args.adaptive, args.nice, args.cgroups)
+        for target, rate in args.targets:
+            if rate is not None:
+                rate_governor.configure_target(target, rate)
+        scan_store = ScanStore()
+        run_id = args.resume or RunCheckpoint.new_run_id(args.domain or "batch")
+        work_dir = create_work_dir(run_id)
+        
+        # Print the header
+        if not task_tracker.headless:
+            os.system('clear')
+            print(f"{COLORS['BLUE']}secＯ•Ｓ -- RECON")
+            print(f"{COLORS['BLUE']}----------------------")
+            print()
+                
+        for i in range(len(BUILD_STEPS)):
+            task_tracker.add_task(i)
+        task_tracker.add_progress(0, total=len(args.targets))
+        task_tracker.render()
+        
+        if args.domain:
+            run_target(args.domain, args, scan_store, run_id=run_id)
+        else:
+            run_targets(args, scan_store)
     
     except KeyboardInterrupt:
+        deadlines.kill_all()
         print(f"\n{COLORS['YELLOW']}Scan interrupted by user. Cleaning up...{COLORS['NC']}")
     except Exception as e:
         print(f"{COLORS['RED']}An unexpected error occurred: {str(e)}{COLORS['NC']}")
     finally:
-        # Cleanup operations
-        if api_id:
-            delete_fireprox_api(api_id)
+        clean_up(work_dir)
+        if load_governor.cgroups:
+            load_governor.cgroups.remove()
+        if scan_store:
+            scan_store.close()
         
-        clean_up(output_file, subdomains_file, *ffuf_output_files, WAFW00F_OUTPUT)
+        if args.prometheus_file:
+            try:
+                telemetry.write_prometheus(args.prometheus_file, [domain for domain, _ in args.targets])
+            except Exception as e:
+                print(f"{COLORS['RED']}Error writing telemetry: {str(e)}{COLORS['NC']}")
         
         print(f"{COLORS['GREEN']}Scan completed.{COLORS['NC']}")
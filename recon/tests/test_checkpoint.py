@@ -0,0 +1,80 @@
+"""RunCheckpoint journals: what an interrupted run wrote is what -resume reads back"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+class RunCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def test_fresh_run(self):
+        checkpoint = recon.RunCheckpoint("example.com-1", folder=self.folder)
+        self.addCleanup(checkpoint.close)
+        self.assertFalse(checkpoint.resumed)
+        self.assertIsNone(checkpoint.subdomains())
+        self.assertEqual(checkpoint.completed("ffuf", "a.example.com"), (False, None))
+        self.assertIsNone(recon.RunCheckpoint.read_state("example.com-1", folder=self.folder))
+
+    def test_round_trip(self):
+        checkpoint = recon.RunCheckpoint("example.com-1", folder=self.folder)
+        checkpoint.update(domain="example.com", full=False, proxy_url=None)
+        checkpoint.save_subdomains(["example.com", "a.example.com"])
+        checkpoint.add_subdomain("b.example.com")
+        checkpoint.record("ffuf", "a.example.com", ("/vault/a.example.com_ffuf.md", ["https://a.example.com/admin"]))
+        checkpoint.record("gospider", "a.example.com", None)
+        checkpoint.record("cloudbrute", None, ["bucket"])
+        checkpoint.close()
+
+        resumed = recon.RunCheckpoint("example.com-1", folder=self.folder)
+        self.addCleanup(resumed.close)
+        self.assertTrue(resumed.resumed)
+        self.assertEqual(resumed.state, {"domain": "example.com", "full": False, "proxy_url": None})
+        self.assertEqual(resumed.subdomains(), ["example.com", "a.example.com", "b.example.com"])
+        # Stage results come back in the form the stage returns, not the journaled one
+        self.assertEqual(resumed.completed("ffuf", "a.example.com"), (True, (None, ["https://a.example.com/admin"])))
+        self.assertEqual(resumed.completed("gospider", "a.example.com"), (True, None))
+        self.assertEqual(resumed.completed("cloudbrute", None), (True, ["bucket"]))
+        self.assertEqual(resumed.completed("ffuf", "b.example.com"), (False, None))
+
+    def test_restored_results_are_not_journaled_twice(self):
+        checkpoint = recon.RunCheckpoint("example.com-1", folder=self.folder)
+        checkpoint.record("corsy", "a.example.com", {"https://a.example.com": {"class": "origin reflected"}})
+        checkpoint.close()
+        resumed = recon.RunCheckpoint("example.com-1", folder=self.folder)
+        resumed.record("corsy", "a.example.com", {"https://a.example.com": {"class": "origin reflected"}})
+        resumed.close()
+        with open(os.path.join(self.folder, "example.com-1", "stages", "corsy.jsonl")) as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+    def test_torn_writes_are_skipped(self):
+        checkpoint = recon.RunCheckpoint("example.com-1", folder=self.folder)
+        checkpoint.record("wafw00f", "a.example.com", [])
+        checkpoint.add_subdomain("a.example.com")
+        checkpoint.close()
+        run_folder = os.path.join(self.folder, "example.com-1")
+        # A crash mid-append leaves a partial last line in each journal
+        with open(os.path.join(run_folder, "stages", "wafw00f.jsonl"), "a") as f:
+            f.write('{"host": "b.example.com", "res')
+        with open(os.path.join(run_folder, "subdomains.txt"), "a") as f:
+            f.write("b.exam")
+        resumed = recon.RunCheckpoint("example.com-1", folder=self.folder)
+        self.addCleanup(resumed.close)
+        self.assertEqual(resumed.completed("wafw00f", "a.example.com"), (True, []))
+        self.assertEqual(resumed.completed("wafw00f", "b.example.com"), (False, None))
+        self.assertEqual(resumed.subdomains(), ["a.example.com"])
+
+    def test_remove(self):
+        checkpoint = recon.RunCheckpoint("example.com-1", folder=self.folder)
+        checkpoint.update(domain="example.com")
+        checkpoint.remove()
+        self.assertFalse(os.path.exists(os.path.join(self.folder, "example.com-1")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Tool and stage deadlines, and the ffuf limits taken from its config's maxtime"""
+
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "ffuf")
+
+class ScanTimeoutsTest(unittest.TestCase):
+    def timeouts(self, config, budget=None):
+        with mock.patch.object(recon.deadlines, "budget_deadline", budget):
+            return recon.scan_timeouts(os.path.join(CONFIG, config))
+
+    def test_max_time(self):
+        self.assertEqual(recon.ffuf_max_time(os.path.join(CONFIG, "ffuf_default.conf")), 3600)
+        self.assertEqual(recon.ffuf_max_time(os.path.join(CONFIG, "ffuf_full.conf")), 28800)
+        self.assertEqual(recon.ffuf_max_time(os.path.join(CONFIG, "missing.conf")), 0)
+
+    def test_ffuf_runs_to_its_own_maxtime_without_budget(self):
+        tools, stages = self.timeouts("ffuf_full.conf")
+        self.assertEqual(tools["ffuf"], 28800 + recon.FFUF_MAXTIME_GRACE)
+        self.assertEqual(stages["ffuf"], 28800 + recon.FFUF_MAXTIME_GRACE)
+        # Other tools keep their fixed limits
+        self.assertEqual(tools["wafw00f"], recon.TOOL_TIMEOUTS["wafw00f"])
+
+    def test_budget_keeps_the_straggler_limits(self):
+        tools, stages = self.timeouts("ffuf_full.conf", budget=recon.time.monotonic() + 7200)
+        self.assertEqual(tools["ffuf"], recon.TOOL_TIMEOUT)
+        self.assertEqual(stages["ffuf"], recon.STAGE_TIMEOUTS["ffuf"])
+
+    def test_no_maxtime_means_no_limit(self):
+        tools, stages = self.timeouts("missing.conf")
+        self.assertEqual((tools["ffuf"], stages["ffuf"]), (0, 0))
+
+class RegisterTest(unittest.TestCase):
+    def setUp(self):
+        self.deadlines = recon.Deadlines()
+        self.deadlines.watcher = object()
+
+    def test_job_tool_limits(self):
+        process = types.SimpleNamespace(pid=-1)
+        with self.deadlines.job(None, tool_timeouts={"ffuf": 0}):
+            self.deadlines.register(process, "ffuf")
+        self.assertIsNone(process.deadline)
+        with self.deadlines.job(60):
+            self.deadlines.register(process, "ffuf")
+        self.assertEqual(process.deadline[1], "stage")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""DNS wire format, the cached stub resolver and wildcard detection, against canned replies instead of the network"""
+
+import os
+import socket
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+def dns_record(rtype, ttl, rdata, owner=b"\xc0\x0c"):
+    """One resource record; the owner defaults to a compression pointer at the question name"""
+    return owner + struct.pack("!HHIH", recon.DNS_TYPES[rtype], 1, ttl, len(rdata)) + rdata
+
+def dns_response(name, rtype, answers=(), authority=(), rcode=0, query_id=0x1234):
+    header = struct.pack("!HHHHHH", query_id, 0x8180 | rcode, 1, len(answers), len(authority), 0)
+    question = recon.encode_dns_name(name) + struct.pack("!HH", recon.DNS_TYPES[rtype], 1)
+    return header + question + b"".join(answers) + b"".join(authority)
+
+class WireFormatTest(unittest.TestCase):
+    def test_encode_name(self):
+        self.assertEqual(recon.encode_dns_name("www.Example.com."), b"\x03www\x07Example\x03com\x00")
+        self.assertEqual(recon.encode_dns_name(""), b"\x00")
+
+    def test_encode_idna_label(self):
+        self.assertEqual(recon.encode_dns_name("bücher.de"), b"\x0dxn--bcher-kva\x02de\x00")
+
+    def test_decode_name_follows_compression(self):
+        message = b"\x00" * 12 + b"\x07example\x03com\x00" + b"\x03www\xc0\x0c"
+        self.assertEqual(recon.decode_dns_name(message, 12), ("example.com", 25))
+        self.assertEqual(recon.decode_dns_name(message, 25), ("www.example.com", 31))
+
+    def test_decode_name_rejects_pointer_loop(self):
+        message = b"\x00" * 12 + b"\xc0\x0c"
+        with self.assertRaises(ValueError):
+            recon.decode_dns_name(message, 12)
+
+    def test_query_carries_question_and_edns(self):
+        message = recon.build_dns_query(0xBEEF, "example.com", "AAAA")
+        query_id, flags, questions, answers, authority, additional = struct.unpack("!HHHHHH", message[:12])
+        self.assertEqual((query_id, flags, questions, answers, authority, additional), (0xBEEF, 0x0100, 1, 0, 0, 1))
+        name, offset = recon.decode_dns_name(message, 12)
+        self.assertEqual(name, "example.com")
+        self.assertEqual(struct.unpack("!HH", message[offset:offset + 4]), (28, 1))
+        self.assertEqual(struct.unpack("!HH", message[offset + 5:offset + 9]), (41, 1232))
+
+    def test_parse_answers(self):
+        target = recon.encode_dns_name("lb.example.net")
+        message = dns_response("www.example.com", "A", answers=[
+            dns_record("CNAME", 300, target),
+            dns_record("A", 60, socket.inet_aton("192.0.2.1"), owner=target),
+        ])
+        rcode, answers, _ = recon.parse_dns_response(message)
+        self.assertEqual(rcode, 0)
+        self.assertEqual(answers, [("www.example.com", "CNAME", 300, "lb.example.net"), ("lb.example.net", "A", 60, "192.0.2.1")])
+
+    def test_parse_record_types(self):
+        mx = struct.pack("!H", 10) + recon.encode_dns_name("mail.example.com")
+        txt = b"\x05hello\x06 world"
+        caa = b"\x00\x05issue" + b"letsencrypt.org"
+        aaaa = socket.inet_pton(socket.AF_INET6, "2001:db8::1")
+        for rtype, rdata, expected in (("MX", mx, "10 mail.example.com"), ("TXT", txt, "hello world"),
+                                       ("CAA", caa, '0 issue "letsencrypt.org"'), ("AAAA", aaaa, "2001:db8::1")):
+            _, answers, _ = recon.parse_dns_response(dns_response("example.com", rtype, answers=[dns_record(rtype, 60, rdata)]))
+            self.assertEqual(answers[0][3], expected, rtype)
+
+    def test_negative_ttl_from_soa(self):
+        soa = recon.encode_dns_name("ns.example.com") + recon.encode_dns_name("admin.example.com") + struct.pack("!IIIII", 1, 2, 3, 4, 120)
+        message = dns_response("missing.example.com", "A", authority=[dns_record("SOA", 900, soa)], rcode=3)
+        rcode, answers, negative_ttl = recon.parse_dns_response(message)
+        self.assertEqual((rcode, answers, negative_ttl), (3, [], 120))
+
+class ResolverTest(unittest.TestCase):
+    def setUp(self):
+        self.client = recon.DNSClient(resolvers=["192.0.2.53"], retries=1)
+        self.resolver = recon.BulkResolver(self.client, concurrency=4)
+        self.queries = []
+
+    def exchange(self, answers):
+        """Stand-in for DNSClient._exchange serving {(name, rtype): reply}; unknown names are NXDOMAIN"""
+        def exchange(name, rtype, server):
+            self.queries.append((name, rtype))
+            reply = answers.get((name, rtype), (3, [], 60))
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+        return exchange
+
+    def test_resolve_many_merges_a_and_aaaa(self):
+        self.client._exchange = self.exchange({
+            ("www.example.com", "A"): (0, [("www.example.com", "CNAME", 60, "lb.example.net"), ("lb.example.net", "A", 60, "192.0.2.2"),
+                                           ("lb.example.net", "A", 60, "192.0.2.1")], 60),
+            ("www.example.com", "AAAA"): (0, [("lb.example.net", "AAAA", 60, "2001:db8::1")], 60),
+        })
+        resolved = self.resolver.resolve_many(["www.example.com", "gone.example.com", "www.example.com"])
+        self.assertEqual(resolved, {"www.example.com": ["192.0.2.1", "192.0.2.2", "2001:db8::1"], "gone.example.com": []})
+
+    def test_cached_names_keep_their_order(self):
+        self.client._exchange = self.exchange({(name, "A"): (0, [(name, "A", 60, "192.0.2.1")], 60) for name in ("a.example.com", "b.example.com")})
+        self.resolver.resolve("b.example.com")
+        self.assertEqual(list(self.resolver.resolve_many(["a.example.com", "b.example.com"])), ["a.example.com", "b.example.com"])
+
+    def test_answers_are_cached_until_their_ttl(self):
+        self.client._exchange = self.exchange({("www.example.com", "A"): (0, [("www.example.com", "A", 60, "192.0.2.1")], 60)})
+        self.resolver.resolve("www.example.com")
+        self.resolver.resolve("www.example.com")
+        self.assertEqual(len(self.queries), 2)
+        self.assertEqual(self.resolver.cached("www.example.com"), ["192.0.2.1"])
+        self.assertIsNone(self.resolver.cached("other.example.com"))
+        with mock.patch.object(recon.time, "monotonic", return_value=recon.time.monotonic() + 61):
+            self.assertIsNone(self.resolver.cached("www.example.com"))
+
+    def test_failures_move_to_the_next_attempt(self):
+        self.client._exchange = self.exchange({("www.example.com", "A"): TimeoutError("no answer")})
+        with mock.patch.object(recon, "DNS_BACKOFF", 0):
+            self.assertEqual(self.client.query("www.example.com", "A"), [])
+        self.assertEqual(self.queries, [("www.example.com", "A")] * 2)
+        # A timeout is not an answer, so nothing was cached
+        self.assertNotIn(("www.example.com", "A"), self.client.cache)
+
+class WildcardTest(unittest.TestCase):
+    def setUp(self):
+        client = recon.DNSClient(resolvers=["192.0.2.53"], retries=0)
+        def exchange(name, rtype, server):
+            # *.apps.example.com is a wildcard; everything else under example.com only resolves when it exists
+            if rtype == "A" and name.endswith(".apps.example.com"):
+                return 0, [(name, "A", 60, "192.0.2.10")], 60
+            return 3, [], 60
+        client._exchange = exchange
+        patcher = mock.patch.object(recon, "dns_resolver", recon.BulkResolver(client))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.cache_path = os.path.join(folder.name, "wildcards.json")
+        self.filter = recon.WildcardFilter(cache_path=self.cache_path)
+
+    def test_zone_parents(self):
+        self.assertEqual(recon.zone_parents("a.b.example.com", "example.com"), ["b.example.com", "example.com"])
+        self.assertEqual(recon.zone_parents("example.com", "example.com"), [])
+
+    def test_is_wildcard(self):
+        self.assertTrue(self.filter.is_wildcard("example.com", "x.apps.example.com", ["192.0.2.10"]))
+        # Its own address, not the wildcard's, means the name exists on its own
+        self.assertFalse(self.filter.is_wildcard("example.com", "y.apps.example.com", ["192.0.2.99"]))
+        self.assertFalse(self.filter.is_wildcard("example.com", "www.example.com", ["192.0.2.10"]))
+
+    def test_prune_and_summary(self):
+        resolved = {"x.apps.example.com": ["192.0.2.10"], "www.example.com": ["192.0.2.1"]}
+        self.assertEqual(self.filter.prune("example.com", list(resolved), resolved), ["www.example.com"])
+        self.assertEqual(self.filter.summary("example.com"), {"zones": {"apps.example.com": ["192.0.2.10"]}, "pruned": ["x.apps.example.com"]})
+
+    def test_verdicts_are_reused_from_disk(self):
+        self.filter.wildcard_answers(["apps.example.com"])
+        self.assertTrue(os.path.isfile(self.cache_path))
+        with mock.patch.object(recon.dns_resolver, "resolve_many") as resolve_many:
+            answers = recon.WildcardFilter(cache_path=self.cache_path).wildcard_answers(["apps.example.com"])
+        resolve_many.assert_not_called()
+        self.assertEqual(answers, {"apps.example.com": {"192.0.2.10"}})
+
+if __name__ == "__main__":
+    unittest.main()
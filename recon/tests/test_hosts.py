@@ -0,0 +1,35 @@
+"""The slotted host table"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+class HostTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = recon.HostTable("example.com", ["v=spf1 -all"])
+
+    def test_add_keeps_first_record(self):
+        first = self.table.add("a.example.com", ["192.0.2.1"])
+        self.assertIs(self.table.add("a.example.com", ["192.0.2.9"]), first)
+        self.assertIs(self.table.add("example.com"), self.table.root)
+        self.assertIsNone(self.table.add(""))
+        self.assertEqual(len(self.table), 2)
+        self.assertIn("a.example.com", self.table)
+        self.assertEqual([record.domain for record in self.table.subdomains()], ["a.example.com"])
+        self.assertEqual(list(self.table.hostnames()), ["example.com", "a.example.com"])
+
+    def test_attach(self):
+        a = self.table.add("a.example.com", ["192.0.2.1"])
+        b = self.table.add("b.example.com", ["192.0.2.1", "2001:db8::1"])
+        self.table.attach("a.example.com", http=[301, "", "nginx", "https://a.example.com/", []], https=[200, "A", "nginx", "", []])
+        self.table.attach("b.example.com", https=[200, "B", "nginx", "", []], cluster="a.example.com", timeouts={"ffuf": "stage"})
+        self.table.attach("missing.example.com", https=[200, "", "", "", []])
+        self.assertEqual((a.http[0], a.https[0], b.https[1]), (301, 200, "B"))
+        self.assertIsNone(self.table.get("missing.example.com"))
+        self.assertEqual((b.cluster, b.timeouts, b.http), ("a.example.com", {"ffuf": "stage"}, None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""The JavaScript cache: downloads, and the cross-host jsluice batches, with requests and jsluice replaced by stand-ins"""
+
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+class JSCacheBatchTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.cache = recon.JSCache(cache_folder=folder.name)
+        self.batches = []
+        self.cache._run_jsluice = self.run_jsluice
+
+    def run_jsluice(self, digests):
+        self.batches.append(list(digests))
+        return None if any(digest.startswith("broken") for digest in digests) else {digest: [{"kind": "secret", "data": digest}] for digest in digests}
+
+    def digests(self, prefix, count):
+        names = [f"{prefix}{index:02d}" for index in range(count)]
+        for name in names:
+            os.makedirs(os.path.dirname(self.cache.body_path(name)), exist_ok=True)
+        return names
+
+    def test_hosts_share_full_batches(self):
+        hosts = [self.digests(f"h{host}", 5) for host in range(6)]
+        threads = [threading.Thread(target=self.cache.analyze, args=(digests,)) for digests in hosts]
+        with mock.patch.object(recon, "JSLUICE_BATCH_SIZE", 10), mock.patch.object(recon, "JSLUICE_BATCH_WAIT", 5):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(sorted(len(batch) for batch in self.batches), [10, 10, 10])
+        self.assertTrue(all(digest in self.cache.findings for digests in hosts for digest in digests))
+
+    def test_runs_are_bounded_by_the_cpu_class(self):
+        hosts = [self.digests(f"h{host}", 2) for host in range(4)]
+        running, overlap = [0], []
+        run_jsluice = self.run_jsluice
+        def slow_jsluice(digests):
+            with self.cache.lock:
+                running[0] += 1
+                overlap.append(running[0])
+            time.sleep(0.05)
+            with self.cache.lock:
+                running[0] -= 1
+            return run_jsluice(digests)
+        self.cache._run_jsluice = slow_jsluice
+        threads = [threading.Thread(target=self.cache.analyze, args=(digests,)) for digests in hosts]
+        with mock.patch.object(recon, "JSLUICE_BATCH_SIZE", 2), mock.patch.dict(recon.load_governor.limits, cpu=1):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(max(overlap), 1)
+        self.assertEqual(len(self.batches), 4)
+        self.assertEqual(self.cache.processes, 0)
+
+    def test_partial_batch_runs_after_the_wait(self):
+        digests = self.digests("a", 3)
+        with mock.patch.object(recon, "JSLUICE_BATCH_SIZE", 10), mock.patch.object(recon, "JSLUICE_BATCH_WAIT", 0.05):
+            self.cache.analyze(digests + [None, digests[0]])
+        self.assertEqual(self.batches, [digests])
+
+    def test_findings_are_reused_from_disk(self):
+        digests = self.digests("a", 2)
+        with mock.patch.object(recon, "JSLUICE_BATCH_WAIT", 0):
+            self.cache.analyze(digests)
+            fresh = recon.JSCache(cache_folder=self.cache.cache_folder)
+            fresh._run_jsluice = self.run_jsluice
+            fresh.analyze(digests)
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(fresh.findings[digests[0]], [{"kind": "secret", "data": digests[0]}])
+
+    def test_failed_batch_is_not_cached(self):
+        digests = self.digests("a", 1) + self.digests("broken", 1)
+        with mock.patch.object(recon, "JSLUICE_BATCH_WAIT", 0):
+            self.cache.analyze(digests)
+        self.assertEqual(self.cache.findings, {})
+        self.assertEqual((self.cache.queued, self.cache.running), ({}, set()))
+
+class JSCacheFetchTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.cache = recon.JSCache(cache_folder=folder.name, workers=2)
+
+    def response(self, status, body, **headers):
+        response = recon.requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response.raw = io.BytesIO(body) if isinstance(body, bytes) else body
+        return response
+
+    def files(self):
+        return sorted(os.path.relpath(os.path.join(root, name), self.cache.cache_folder)
+                      for root, _, names in os.walk(self.cache.cache_folder) for name in names)
+
+    def test_same_body_is_stored_once(self):
+        with mock.patch.object(self.cache.session, "get", side_effect=lambda url, **kwargs: self.response(200, b"var a = 1;")):
+            hashes = self.cache.fetch_many(["https://a.example.com/app.js", "https://b.example.com/app.js"])
+        digest = hashes["https://a.example.com/app.js"]
+        self.assertEqual(hashes["https://b.example.com/app.js"], digest)
+        self.assertEqual(self.files(), [os.path.relpath(self.cache.body_path(digest), self.cache.cache_folder)])
+
+    def test_broken_download_leaves_no_temp_file(self):
+        class Broken(io.RawIOBase):
+            sent = False
+            def readable(self):
+                return True
+            def readinto(self, buffer):
+                if self.sent:
+                    raise recon.urllib3.exceptions.ProtocolError("connection reset")
+                self.sent = True
+                buffer[:4] = b"var "
+                return 4
+        with mock.patch.object(self.cache.session, "get", return_value=self.response(200, io.BufferedReader(Broken()))):
+            self.assertEqual(self.cache.fetch_many(["https://a.example.com/app.js"]), {"https://a.example.com/app.js": None})
+        self.assertEqual(self.files(), [])
+
+    def test_gateway_route(self):
+        gateway = recon.FireproxGateway("example.com", "https://abc123.execute-api.us-east-1.amazonaws.com/fireprox/")
+        with mock.patch.object(self.cache.session, "get", return_value=self.response(200, b"var a = 1;")) as get:
+            self.cache.fetch_many(["https://example.com/static/app.js"], gateway)
+        self.assertEqual(get.call_args.args, ("https://abc123.execute-api.us-east-1.amazonaws.com/fireprox/static/app.js",))
+        self.assertIs(get.call_args.kwargs["auth"], gateway)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tool output parsing, catch-all calibration verdicts and crawl URL dedup"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+class IterJsonRecordsTest(unittest.TestCase):
+    def records(self, text):
+        return list(recon.iter_json_records(text.splitlines(keepends=True)))
+
+    def test_newline_delimited(self):
+        self.assertEqual(self.records('{"a": 1}\n{"a": 2}\n'), [{"a": 1}, {"a": 2}])
+
+    def test_array_split_across_lines(self):
+        self.assertEqual(self.records('[\n  {"a": 1,\n   "b": [1, 2]},\n  {"a": 2}\n]\n'), [{"a": 1, "b": [1, 2]}, {"a": 2}])
+
+    def test_banners_and_broken_lines_are_skipped(self):
+        text = 'wafw00f v2.2\n{not json\n{"a": 1}\n[+] done\n{"a": 2}'
+        self.assertEqual(self.records(text), [{"a": 1}, {"a": 2}])
+
+    def test_truncated_last_record_is_dropped(self):
+        self.assertEqual(self.records('{"a": 1}\n{"a": '), [{"a": 1}])
+
+class CatchAllVerdictTest(unittest.TestCase):
+    def test_unknown_paths_not_matched(self):
+        self.assertEqual(recon.catch_all_verdict([[404, 10, 2, 1], [404, 10, 2, 1]], ["200", "301"]), ("scan", []))
+
+    def test_too_few_signatures(self):
+        self.assertEqual(recon.catch_all_verdict([[200, 10, 2, 1]], ["200"]), ("scan", []))
+        self.assertEqual(recon.catch_all_verdict([], ["200"]), ("scan", []))
+
+    def test_mixed_statuses(self):
+        self.assertEqual(recon.catch_all_verdict([[200, 10, 2, 1], [302, 0, 1, 1]], ["200", "302"]), ("scan", []))
+
+    def test_stable_words_filter(self):
+        signatures = [[200, 1200, 40, 9], [200, 1216, 40, 9], [200, 1232, 40, 9]]
+        self.assertEqual(recon.catch_all_verdict(signatures, ["200"]), ("filter", ["-fw", "40"]))
+
+    def test_stable_lines_filter(self):
+        signatures = [[200, 1200, 40, 9], [200, 1216, 41, 9]]
+        self.assertEqual(recon.catch_all_verdict(signatures, ["all"]), ("filter", ["-fl", "9"]))
+
+    def test_varying_catch_all_is_skipped(self):
+        signatures = [[200, 1200, 40, 9], [200, 1316, 45, 12]]
+        self.assertEqual(recon.catch_all_verdict(signatures, ["200"]), ("skip", []))
+
+class URLDeduperTest(unittest.TestCase):
+    def test_first_sighting_only(self):
+        deduper = recon.URLDeduper()
+        self.assertTrue(deduper.add("[url] - https://a.example.com/"))
+        self.assertFalse(deduper.add("[url] - https://a.example.com/"))
+        self.assertTrue(deduper.add("[url] - https://b.example.com/"))
+
+if __name__ == "__main__":
+    unittest.main()
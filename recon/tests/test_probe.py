@@ -0,0 +1,117 @@
+"""HTTP probing and its route through the -aws Fireprox gateway, with requests answered by stand-ins"""
+
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+GATEWAY_URL = "https://abc123.execute-api.us-east-1.amazonaws.com/fireprox/"
+
+class FireproxGatewayTest(unittest.TestCase):
+    def setUp(self):
+        self.gateway = recon.FireproxGateway("example.com", GATEWAY_URL)
+
+    def test_region(self):
+        self.assertEqual(self.gateway.region, "us-east-1")
+
+    def test_route(self):
+        base = GATEWAY_URL.rstrip("/")
+        self.assertEqual(self.gateway.route("https://example.com"), f"{base}/")
+        self.assertEqual(self.gateway.route("https://example.com/app.js?v=2"), f"{base}/app.js?v=2")
+        self.assertEqual(self.gateway.route("https://example.com?q=1"), f"{base}/?q=1")
+        # The gateway only forwards to the apex over https
+        for url in ("http://example.com/", "https://www.example.com/", "https://example.com.evil.test/", "https://example.com:8443/"):
+            self.assertIsNone(self.gateway.route(url), url)
+
+    def test_route_request(self):
+        self.assertEqual(recon.route_request("https://example.com/a", None), ("https://example.com/a", None))
+        self.assertEqual(recon.route_request("https://www.example.com/a", self.gateway), ("https://www.example.com/a", None))
+        self.assertEqual(recon.route_request("https://example.com/a", self.gateway), (GATEWAY_URL + "a", self.gateway))
+
+class ProbeTest(unittest.TestCase):
+    def setUp(self):
+        self.prober = recon.HTTPProber(workers=2)
+        self.addCleanup(self.prober.executor.shutdown)
+        self.gateway = recon.FireproxGateway("example.com", GATEWAY_URL)
+        self.requests = []
+
+    def answer(self, https):
+        def request(host, scheme, path="/", gateway=None):
+            self.requests.append((host, scheme, gateway))
+            return (https if scheme == "https" else (None, None))
+        return request
+
+    def test_gateway_failure_is_not_a_dead_host(self):
+        with mock.patch.object(self.prober, "_request", self.answer((None, None))), \
+             mock.patch.object(self.prober, "_certificate_sans") as sans:
+            self.assertEqual(self.prober.probe("example.com", self.gateway), (None, None))
+        # The certificate would take a direct connection to the target
+        sans.assert_not_called()
+
+    def test_hosts_the_gateway_does_not_forward_are_probed_directly(self):
+        with mock.patch.object(self.prober, "_request", self.answer((None, None))), \
+             mock.patch.object(self.prober, "_certificate_sans", return_value=[]):
+            self.assertEqual(self.prober.probe("www.example.com", self.gateway), ({"http": None, "https": None}, None))
+
+    def test_gateway_answer(self):
+        https = ([200, "Example", "nginx", "", []], [200, "hash", 10, "Example"])
+        with mock.patch.object(self.prober, "_request", self.answer(https)):
+            http, fingerprint = self.prober.probe("example.com", self.gateway)
+        self.assertEqual(http, {"http": None, "https": https[0]})
+        self.assertEqual(fingerprint, https[1])
+
+class GatewayRequestTest(unittest.TestCase):
+    def response(self, status, body, **headers):
+        response = recon.requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response.raw = io.BytesIO(body)
+        return response
+
+    def test_gateway_errors_are_not_answers(self):
+        prober = recon.HTTPProber(workers=1)
+        self.addCleanup(prober.executor.shutdown)
+        gateway = recon.FireproxGateway("example.com", GATEWAY_URL)
+        forbidden = self.response(403, b'{"message":"Forbidden"}', **{"x-amzn-ErrorType": "ForbiddenException"})
+        with mock.patch.object(prober.session, "get", return_value=forbidden) as get:
+            self.assertEqual(prober._request("example.com", "https", gateway=gateway), (None, None))
+        self.assertEqual(get.call_args.args, (GATEWAY_URL.rstrip("/") + "/",))
+        self.assertIs(get.call_args.kwargs["auth"], gateway)
+        with mock.patch.object(prober.session, "get", return_value=self.response(403, b"<title>Denied</title>")):
+            status, _ = prober._request("example.com", "https", gateway=gateway)
+        self.assertEqual(status[:2], [403, "Denied"])
+
+    def test_calibration_skips_gateway_errors(self):
+        prober = recon.HTTPProber(workers=1)
+        self.addCleanup(prober.executor.shutdown)
+        gateway = recon.FireproxGateway("example.com", GATEWAY_URL)
+        replies = [self.response(404, b"not found"), self.response(502, b'{"message": "Internal server error"}', **{"x-amzn-ErrorType": "InternalServerErrorException"}),
+                   self.response(404, b"not found")]
+        with mock.patch.object(prober.session, "get", side_effect=replies) as get:
+            self.assertEqual(prober.path_signatures("example.com", gateway=gateway), [[404, 9, 2, 1], [404, 9, 2, 1]])
+        self.assertTrue(all(call.args[0].startswith(GATEWAY_URL) and call.kwargs["auth"] is gateway for call in get.call_args_list))
+
+    def test_endpoint_fingerprints_share_the_gateway_route(self):
+        prober = recon.HTTPProber(workers=2)
+        self.addCleanup(prober.executor.shutdown)
+        gateway = recon.FireproxGateway("example.com", GATEWAY_URL)
+        urls = ["https://example.com/api?id=1", "https://api.example.com/v1", "https://example.com/down"]
+        def get(url, **kwargs):
+            if url.endswith("/down"):
+                return self.response(504, b"", **{"x-amzn-ErrorType": "IntegrationTimeout"})
+            return self.response(200, url.encode())
+        with mock.patch.object(prober.session, "get", side_effect=get) as session_get:
+            fingerprints = prober.url_fingerprints(urls, gateway)
+        self.assertEqual(list(fingerprints), urls)
+        self.assertTrue(fingerprints[urls[0]] and fingerprints[urls[1]])
+        self.assertIsNone(fingerprints[urls[2]])
+        routes = {call.args[0]: call.kwargs["auth"] for call in session_get.call_args_list}
+        self.assertIs(routes[GATEWAY_URL + "api?id=1"], gateway)
+        self.assertIsNone(routes["https://api.example.com/v1"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""Per-origin rate budget shares and backoff"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+class RateGovernorTest(unittest.TestCase):
+    def setUp(self):
+        self.governor = recon.RateGovernor(rate=40)
+        cached = mock.patch.object(recon.dns_resolver, "cached", lambda host: {"a.example.com": ["192.0.2.1"], "b.example.com": ["192.0.2.1"]}.get(host))
+        cached.start()
+        self.addCleanup(cached.stop)
+
+    def test_unlimited(self):
+        with recon.RateGovernor(rate=0).lease("a.example.com") as share:
+            self.assertEqual(share, 0)
+
+    def test_leases_split_the_bucket_per_process(self):
+        with self.governor.lease("a.example.com") as first:
+            self.assertEqual(first, 40)
+            # b resolves to the same address, so it draws on the same bucket
+            with self.governor.lease("b.example.com", 3) as batch:
+                self.assertEqual(batch, 10)
+        with self.governor.lease("a.example.com") as again:
+            self.assertEqual(again, 40)
+
+    def test_per_target_rate(self):
+        self.governor.configure_target("example.org", 0)
+        with self.governor.lease("www.example.org") as share:
+            self.assertEqual(share, 0)
+
+    def test_report_backs_off_and_recovers(self):
+        self.governor.report("a.example.com", {429: 10, 200: 90})
+        with self.governor.lease("a.example.com") as share:
+            self.assertEqual(share, 20)
+        self.governor.report("a.example.com", {200: 100})
+        with self.governor.lease("a.example.com") as share:
+            self.assertEqual(share, 25)
+
+if __name__ == "__main__":
+    unittest.main()
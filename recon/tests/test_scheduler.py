@@ -0,0 +1,119 @@
+"""DAG scheduler: dependency order, and one failed target of a shared -targets scheduler leaving the others running"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+class Target:
+    """The parts of ReconTarget the scheduler touches"""
+    def __init__(self, domain):
+        self.domain = domain
+        self.results = {}
+        self.hosts_closed = False
+        self.cancelled = False
+        self.outstanding = 0
+        self.checkpoint = None
+        self.timeouts = {}
+        self.tool_timeouts = recon.TOOL_TIMEOUTS
+        self.stage_timeouts = recon.STAGE_TIMEOUTS
+        self.stage_workers = {}
+
+    def stored_result(self, stage, host):
+        return False, None
+
+    def mark_timed_out(self, stage, host, reason):
+        self.timeouts[(stage, host)] = reason
+
+class ResourceClassTest(unittest.TestCase):
+    def test_every_class_has_stages(self):
+        self.assertEqual({stage.resource for stage in recon.build_scan_stages()}, set(recon.SCAN_RESOURCE_LIMITS))
+
+    def test_governor_also_scales_the_cpu_class(self):
+        self.assertEqual(set(recon.load_governor.limits), set(recon.SCAN_RESOURCE_LIMITS) | {"cpu"})
+        self.assertEqual(recon.LoadGovernor().adjust({"load": 3.0, "available_memory": 0.5, "child_rss": 0.1, "fds": 0.1})["cpu"],
+                         max(1, recon.CPU_SLOTS // 2))
+
+class StageWorkersTest(unittest.TestCase):
+    def test_target_worker_count_replaces_the_stage_default(self):
+        lock = threading.Lock()
+        running, peak = [0], [0]
+        def crawl(target, host, inputs):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return host
+        scheduler = recon.DAGScheduler([recon.Stage("gospider", None, crawl, concurrency=4)], resource_limits={"network": 4, "probe": 4})
+        self.addCleanup(scheduler.shutdown)
+        target = Target("example.com")
+        target.stage_workers = {"gospider": 1}
+        scheduler.add_target(target)
+        for host in ("a.example.com", "b.example.com", "c.example.com"):
+            scheduler.add_host(target, host)
+        scheduler.close_hosts(target)
+        scheduler.wait(target)
+        self.assertEqual(len(target.results["gospider"]), 3)
+        self.assertEqual(peak[0], 1)
+
+class SharedSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.slow_started = threading.Event()
+        self.returncodes = {}
+        stages = [
+            recon.Stage("probe", None, lambda target, host, inputs: f"{host} up", resource="probe"),
+            recon.Stage("tool", None, self.tool, inputs=("probe",), concurrency=4),
+        ]
+        self.scheduler = recon.DAGScheduler(stages, resource_limits={"network": 4, "probe": 4}, shared=True)
+        self.addCleanup(self.scheduler.shutdown)
+
+    def tool(self, target, host, inputs):
+        if target.domain == "bad.example":
+            process = recon.start_process(["sleep", "30"], stdout=recon.subprocess.DEVNULL)
+            self.slow_started.set()
+            self.returncodes[host] = recon.finish_process(process)
+            return None
+        return inputs["probe"]
+
+    def test_dependencies(self):
+        target = Target("good.example")
+        self.scheduler.add_target(target)
+        for host in ("good.example", "a.good.example"):
+            self.scheduler.add_host(target, host)
+        self.scheduler.close_targets()
+        self.scheduler.close_hosts(target)
+        self.scheduler.wait(target)
+        self.assertEqual(target.results["tool"], {"good.example": "good.example up", "a.good.example": "a.good.example up"})
+
+    def test_cancelled_target_leaves_the_others_running(self):
+        good, bad = Target("good.example"), Target("bad.example")
+        self.scheduler.add_target(good)
+        self.scheduler.add_target(bad)
+        self.scheduler.add_host(bad, "bad.example")
+        self.assertTrue(self.slow_started.wait(10))
+        started = time.monotonic()
+        self.scheduler.cancel_target(bad)
+        with self.assertRaises(KeyboardInterrupt):
+            self.scheduler.wait(bad)
+
+        self.scheduler.add_host(good, "good.example")
+        self.scheduler.close_targets()
+        self.scheduler.close_hosts(good)
+        self.scheduler.wait(good)
+        self.scheduler.shutdown()
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertFalse(self.scheduler.cancelled)
+        self.assertEqual(good.results["tool"], {"good.example": "good.example up"})
+        # Only the failed target's tool was killed
+        self.assertEqual(self.returncodes, {"bad.example": -9})
+        self.scheduler.add_host(bad, "late.bad.example")
+        self.assertEqual(bad.outstanding, 0)
+
+if __name__ == "__main__":
+    unittest.main()
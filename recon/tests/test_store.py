@@ -0,0 +1,99 @@
+"""ScanStore history and the diff -incremental runs write to the changes note"""
+
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recon
+
+class ScanStoreTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.store = recon.ScanStore(os.path.join(folder.name, "recon.db"))
+        self.addCleanup(self.store.close)
+
+    def test_empty_store(self):
+        self.assertIsNone(self.store.last_run("example.com"))
+        self.assertEqual(self.store.latest_hosts("example.com"), {})
+        self.assertEqual(self.store.latest_results("example.com"), {})
+
+    def test_latest_rows_win(self):
+        first = self.store.record_run("example.com", 1.0, False,
+                                      [("a.example.com", ["192.0.2.1"], {"https": [200]}, "f1"), ("b.example.com", [], None, None)],
+                                      {"ffuf": {"a.example.com": {"urls": ["https://a.example.com/old"]}}})
+        second = self.store.record_run("example.com", 2.0, True, [("a.example.com", ["192.0.2.2"], None, "f2")],
+                                       {"ffuf": {"a.example.com": {"urls": ["https://a.example.com/new"]}}, "cloudbrute": {None: ["bucket"]}})
+        self.store.record_run("other.example", 3.0, False, [("c.other.example", [], None, None)], {})
+        self.assertEqual(self.store.last_run("example.com")["id"], second)
+        hosts = self.store.latest_hosts("example.com")
+        self.assertEqual(hosts["a.example.com"], {"ips": ["192.0.2.2"], "http": None, "fingerprint": "f2", "run_id": second})
+        # Hosts missing from the newest run keep their last known row
+        self.assertEqual(hosts["b.example.com"]["run_id"], first)
+        self.assertEqual(self.store.latest_results("example.com"),
+                         {"ffuf": {"a.example.com": {"urls": ["https://a.example.com/new"]}}, "cloudbrute": {None: ["bucket"]}})
+
+    def test_baselines_and_endpoints_are_keyed_by_fingerprint(self):
+        self.store.save_baseline("a.example.com", "f1", [[200, 10, 2, 1]])
+        self.assertEqual(self.store.baseline("a.example.com", "f1"), [[200, 10, 2, 1]])
+        self.assertIsNone(self.store.baseline("a.example.com", "f2"))
+        self.assertIsNone(self.store.baseline("a.example.com", "f1", max_age=-1))
+        self.store.save_endpoint_result("arjun", "https://a.example.com/api", "f1", {"params": ["id"]})
+        self.assertEqual(self.store.endpoint_result("arjun", "https://a.example.com/api", "f1"), (True, {"params": ["id"]}))
+        self.assertEqual(self.store.endpoint_result("arjun", "https://a.example.com/api", "f2"), (False, None))
+
+    def test_record_scan_uses_the_target_start(self):
+        target = types.SimpleNamespace(domain="example.org", scan_data=recon.HostTable("example.org"),
+                                       results={"fingerprint": {"example.org": {"ips": ["192.0.2.1"]}}}, timeouts={}, previous_run=None,
+                                       incremental=False, store=self.store)
+        with mock.patch.dict(recon.telemetry.target_started, {"example.org": recon.telemetry.started + 600}):
+            recon.record_scan(target)
+        self.assertEqual(self.store.last_run("example.org")["started"], recon.telemetry.started + 600)
+
+class ScanChangesTest(unittest.TestCase):
+    def target(self, previous_hosts, previous_results, hosts):
+        scan_data = recon.HostTable("example.com")
+        for host in hosts:
+            scan_data.add(host)
+        return types.SimpleNamespace(previous_run={"id": 1}, previous_hosts=previous_hosts, previous_results=previous_results, scan_data=scan_data)
+
+    def test_host_changes(self):
+        previous_hosts = {
+            "a.example.com": {"ips": ["192.0.2.1"], "http": None, "fingerprint": "f1", "run_id": 1},
+            "b.example.com": {"ips": ["192.0.2.2"], "http": None, "fingerprint": "f2", "run_id": 1},
+            "old.example.com": {"ips": [], "http": None, "fingerprint": None, "run_id": 0},
+        }
+        hosts = [("a.example.com", ["192.0.2.9"], {"https": [200]}, "f9"), ("c.example.com", ["192.0.2.3"], None, "f3")]
+        changes = recon.scan_changes(self.target(previous_hosts, {}, {"a.example.com", "c.example.com"}), hosts, {})
+        self.assertEqual(changes["new_hosts"], ["c.example.com"])
+        # Only hosts the last run saw can have been removed since
+        self.assertEqual(changes["removed_hosts"], ["b.example.com"])
+        self.assertEqual(changes["changed_hosts"], [("a.example.com", ["192.0.2.1"], None, ["192.0.2.9"], {"https": [200]})])
+
+    def test_finding_changes(self):
+        previous_results = {"ffuf": {"a.example.com": {"urls": ["https://a.example.com/admin", "https://a.example.com/old"]}}}
+        results = {"ffuf": {"a.example.com": {"urls": ["https://a.example.com/admin", "https://a.example.com/new"]}},
+                   "arjun": {"a.example.com": {"https://a.example.com/api": {"params": ["id", "q"]}}}}
+        changes = recon.scan_changes(self.target({}, previous_results, {"a.example.com"}), [], results)
+        self.assertEqual(changes["findings"], {
+            "ffuf": (["https://a.example.com/new"], ["https://a.example.com/old"]),
+            "arjun": (["https://a.example.com/api: id, q"], []),
+        })
+
+    def test_unchanged_findings_are_left_out(self):
+        results = {"gospider": {"a.example.com": {"js_urls": ["https://a.example.com/app.js"], "endpoints": []}}}
+        changes = recon.scan_changes(self.target({}, results, {"a.example.com"}), [], results)
+        self.assertEqual(changes["findings"], {})
+
+    def test_results_round_trip_through_normalization(self):
+        ffuf = ("/vault/a.example.com_ffuf.md", ["https://a.example.com/admin"])
+        self.assertEqual(recon.normalize_result("ffuf", ffuf), {"urls": ffuf[1]})
+        self.assertEqual(recon.restore_result("ffuf", recon.normalize_result("ffuf", ffuf)), (None, ffuf[1]))
+        self.assertIsNone(recon.restore_result("ffuf", recon.normalize_result("ffuf", None)))
+
+if __name__ == "__main__":
+    unittest.main()